@@ -0,0 +1,98 @@
+"""Microbenchmark of inline JSON detection on large code-heavy messages.
+
+Compares `gptctl.utils.utils.replace_inline_json` with the original
+character-by-character scanner it replaced.
+
+    $ python benchmarks/bench_inline_json.py --size 200000 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import timeit
+
+from gptctl.utils.utils import replace_inline_json
+
+
+def legacy_extract_json_fragments(text: str):
+    results = []
+    stack = []
+    start_idx = None
+    for i, ch in enumerate(text):
+        if ch in "{[":
+            if not stack:
+                start_idx = i
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                opening = stack.pop()
+                if (opening == "{" and ch != "}") or (opening == "[" and ch != "]"):
+                    stack = []
+                    start_idx = None
+                elif not stack and start_idx is not None:
+                    results.append((start_idx, i + 1, text[start_idx : i + 1]))
+                    start_idx = None
+    return results
+
+
+def legacy_replace_inline_json(text: str) -> str:
+    out = []
+    last = 0
+    for start, end, snippet in legacy_extract_json_fragments(text):
+        out.append(text[last:start])
+        obj = None
+        try:
+            obj = json.loads(snippet)
+        except Exception:
+            pass
+        if obj is not None:
+            out.append("\n```json\n" + json.dumps(obj, indent=2, ensure_ascii=False) + "\n```\n")
+        else:
+            out.append(snippet)
+        last = end
+    out.append(text[last:])
+    return "".join(out)
+
+
+SNIPPETS = [
+    "Here is how the parser works, step by step, with the edge cases explained. ",
+    "def load(path):\n    with open(path) as f:\n        return [json.loads(l) for l in f]\n",
+    "if (x) { return items[i]; } else { throw new Error(`bad ${x}`); }\n",
+    'The response was {"status": "ok", "items": [1, 2, 3], "next": null}. ',
+    "See [the docs](https://example.com/docs) for details. ",
+    "const cfg = { retries: 3, backoff: [100, 200, 400] };\n",
+]
+
+
+def make_text(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < size:
+        part = rng.choice(SNIPPETS)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000, help="message size, characters")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = {
+        "prose": "Plain prose without any brackets. " * (args.size // 34),
+        "code": make_text(args.size),
+    }
+    for name, text in texts.items():
+        assert replace_inline_json(text) == legacy_replace_inline_json(text)
+        legacy = min(timeit.repeat(lambda: legacy_replace_inline_json(text), number=1, repeat=args.repeat))
+        fast = min(timeit.repeat(lambda: replace_inline_json(text), number=1, repeat=args.repeat))
+        print(
+            f"{name:>6}: {len(text):>9} chars  legacy {legacy * 1000:8.2f} ms"
+            f"  current {fast * 1000:8.2f} ms  x{legacy / fast:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
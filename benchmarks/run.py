@@ -0,0 +1,180 @@
+"""End-to-end benchmark suite.
+
+Generates a synthetic archive (see `synthetic.py`), times the CLI commands
+and the hot `gptctl.utils` functions on it and writes the results as JSON,
+so runs of different versions can be compared.
+
+    $ python benchmarks/run.py --conversations 500 --messages 40 --output bench-new.json
+    $ python benchmarks/run.py --compare bench-old.json bench-new.json
+"""
+
+import argparse
+from dataclasses import asdict
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import SyntheticSpec, write_archive  # noqa: E402
+from typer.testing import CliRunner  # noqa: E402
+
+from gptctl import __version__  # noqa: E402
+from gptctl.cli import app  # noqa: E402
+from gptctl.definitions import SortFields, SortOrder  # noqa: E402
+from gptctl.utils.loader import iter_conversations  # noqa: E402
+from gptctl.utils.utils import (  # noqa: E402
+    collect_conv,
+    conversation_to_md,
+    normalize_messages,
+    replace_inline_json,
+    sort_conv,
+    thread_msg_count,
+)
+
+Benchmark = Tuple[str, Callable[[], Any]]
+
+
+def cli(*args: str) -> Callable[[], Any]:
+    runner = CliRunner()
+
+    def run():
+        result = runner.invoke(app, list(args))
+        if result.exit_code != 0:
+            raise RuntimeError(f"gptctl {' '.join(args)} failed:\n{result.output}")
+
+    return run
+
+
+def cli_benchmarks(input_file: str, workdir: str, spec: SyntheticSpec) -> List[Benchmark]:
+    out_dir = os.path.join(workdir, "out")
+    combined = os.path.join(workdir, "combined.md")
+    paths = ["--input", input_file, "--output-dir", out_dir, "--output", combined]
+    middle = spec.conversations // 2
+    title = next(iter_conversations(input_file))["title"]
+    start = f"conv-{middle:06d}-m{min(2, spec.messages - 1):04d}"
+    end = f"conv-{middle:06d}-m{spec.messages - 1:04d}"
+    return [
+        ("cli.list", cli(*paths, "list", "--no-cache")),
+        ("cli.list.cached", cli(*paths, "list")),
+        ("cli.show", cli(*paths, "show", title)),
+        ("cli.export.json", cli(*paths, "export", "json", "-t", "*")),
+        ("cli.export.markdown", cli(*paths, "export", "markdown", "-t", "*")),
+        ("cli.export.markdown.combined", cli(*paths, "export", "markdown", "-t", "*", "--combined")),
+        ("cli.export.partial", cli(*paths, "export", "partial", "--start", start, "--end", end)),
+    ]
+
+
+def function_benchmarks(input_file: str) -> List[Benchmark]:
+    conversations = list(iter_conversations(input_file))
+    collected = collect_conv(conversations)
+    texts = [
+        part
+        for conv in conversations
+        for msg in normalize_messages(conv)
+        for part in msg.parts
+        if isinstance(part, str)
+    ]
+    return [
+        ("utils.iter_conversations", lambda: sum(1 for _ in iter_conversations(input_file))),
+        ("utils.normalize_messages", lambda: [normalize_messages(c) for c in conversations]),
+        ("utils.thread_msg_count", lambda: [thread_msg_count(c, "") for c in conversations]),
+        ("utils.collect_conv", lambda: collect_conv(conversations)),
+        (
+            "utils.sort_conv",
+            lambda: sort_conv(collected, sort=SortFields.CREATED, order=SortOrder.ASC),
+        ),
+        ("utils.conversation_to_md", lambda: [conversation_to_md(c, anchor="a") for c in conversations]),
+        ("utils.replace_inline_json", lambda: [replace_inline_json(t) for t in texts]),
+    ]
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - started)
+    return {"best": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def run_suite(spec: SyntheticSpec, repeat: int, only: Optional[str] = None) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="gptctl-bench-") as workdir:
+        input_file = os.path.join(workdir, "conversations.json")
+        size = write_archive(input_file, spec)
+        results = {}
+        for name, fn in cli_benchmarks(input_file, workdir, spec) + function_benchmarks(input_file):
+            if only and only not in name:
+                continue
+            results[name] = measure(fn, repeat)
+            print(f"{name:<32} best {results[name]['best'] * 1000:10.1f} ms", file=sys.stderr)
+    return {
+        "gptctl": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "spec": asdict(spec),
+        "input_bytes": size,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float = 0.1) -> int:
+    """Print best-time ratios of two result files. Returns the number of regressions."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    if old.get("spec") != new.get("spec"):
+        print("warning: results were produced from different archives", file=sys.stderr)
+    regressions = 0
+    print(f"{'benchmark':<32} {'old, ms':>10} {'new, ms':>10} {'ratio':>7}")
+    for name, result in new["results"].items():
+        if name not in old["results"]:
+            continue
+        before, after = old["results"][name]["best"], result["best"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<32} {before * 1000:10.1f} {after * 1000:10.1f} {ratio:7.2f}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    defaults = SyntheticSpec()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the best is reported")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this")
+    parser.add_argument("--output", "-o", help="write results JSON here (default: stdout)")
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="slowdown ratio reported as regression"
+    )
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+
+    spec = SyntheticSpec(**{k: getattr(args, k) for k in asdict(defaults)})
+    report = json.dumps(run_suite(spec, args.repeat, args.only), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
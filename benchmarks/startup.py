@@ -0,0 +1,111 @@
+"""CLI startup benchmark.
+
+Times `gptctl --version`, shell completion, `gptctl --help` and a
+subcommand's `--help` in fresh interpreters, next to bare `python` and
+`import typer` for reference, and lists the slowest imports of `gptctl.cli`
+(`python -X importtime`).
+
+`--version` and completion import no command module and no rich: they
+cost about a bare `import typer`. The `--help` paths don't import command
+modules either, but Typer renders help with `typer.rich_utils`, which
+imports rich, rich.markdown (markdown_it, pygments) and rich.traceback at
+module level. That import and the markdown rendering cost about twice the
+`--version` time, which gptctl can't defer.
+
+    $ python benchmarks/startup.py
+    $ python benchmarks/startup.py --budget 100   # exit 1 if --version or completion is slower
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+RUN_CLI = "import sys; from gptctl.cli import app; sys.argv[0] = 'gptctl'; app()"
+
+COMMANDS: Dict[str, List[str]] = {
+    "python": ["-c", "pass"],
+    "import typer": ["-c", "import typer"],
+    "gptctl --version": ["-c", RUN_CLI, "--version"],
+    "gptctl completion": ["-c", RUN_CLI],
+    "gptctl --help": ["-c", RUN_CLI, "--help"],
+    "gptctl export --help": ["-c", RUN_CLI, "export", "--help"],
+}
+
+# Environment of the commands that need one, e.g. bash completing `gptctl ex`
+ENVIRONMENTS: Dict[str, Dict[str, str]] = {
+    "gptctl completion": {
+        "_GPTCTL_COMPLETE": "complete_bash",
+        "COMP_WORDS": "gptctl ex",
+        "COMP_CWORD": "1",
+    },
+}
+
+BUDGETED = ("gptctl --version", "gptctl completion")
+
+
+def measure(args: List[str], repeat: int, env: Optional[Dict[str, str]] = None) -> float:
+    """Best wall time of *repeat* runs of `python *args*`, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            capture_output=True,
+            check=True,
+            env={**os.environ, **env} if env else None,
+        )
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def slowest_imports(module: str = "gptctl.cli", top: int = 10) -> List[Tuple[int, str]]:
+    """Cumulative import time in microseconds of the *top* slowest imports of *module*."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def run(repeat: int = 10) -> Dict[str, float]:
+    return {
+        name: measure(args, repeat, ENVIRONMENTS.get(name))
+        for name, args in COMMANDS.items()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="runs per command, the best is reported")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument(
+        "--budget", type=float, help="fail if `gptctl --version` or completion takes more ms"
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    for name, seconds in results.items():
+        print(f"{name:<24} {seconds * 1000:8.1f} ms")
+    print("\nSlowest imports of gptctl.cli (cumulative):")
+    for micros, name in slowest_imports(top=args.top):
+        print(f"{micros / 1000:8.1f} ms {name}")
+
+    if args.budget is not None and any(
+        results[name] * 1000 > args.budget for name in BUDGETED
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
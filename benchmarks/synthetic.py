@@ -0,0 +1,200 @@
+"""Deterministic synthetic ChatGPT export generator.
+
+Produces a `conversations.json` shaped like a real export (`mapping` trees
+with a hidden system message, regenerated branches, code blocks, inline
+JSON, images and canvas `updates`). The same arguments and seed always give
+byte-identical output.
+
+    $ python benchmarks/synthetic.py ./data/synthetic.json --conversations 2000 --messages 40
+"""
+
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+WORDS = (
+    "agent archive branch cache context data deploy diagram export format graph "
+    "index json latency markdown memory message model parser pipeline prompt "
+    "python query render schema search stream table thread token vector workflow"
+).split()
+
+LANGUAGES = ("python", "javascript", "bash", "sql")
+
+START_TIME = 1_700_000_000.0
+
+
+@dataclass
+class SyntheticSpec:
+    """Shape of the generated archive. Rates are per-message probabilities."""
+
+    conversations: int = 100
+    messages: int = 20
+    branching: float = 0.1
+    code_blocks: float = 0.3
+    inline_json: float = 0.2
+    images: float = 0.05
+    canvas: float = 0.05
+    seed: int = 0
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def paragraph(rng: random.Random, sentences: int = 3) -> str:
+    return " ".join(sentence(rng, rng.randint(6, 16)) for _ in range(sentences))
+
+
+def code_block(rng: random.Random) -> str:
+    lang = rng.choice(LANGUAGES)
+    name = rng.choice(WORDS)
+    lines = [f"def {name}_{i}(items):\n    return [x for x in items if x]" for i in range(rng.randint(1, 4))]
+    return f"```{lang}\n" + "\n\n".join(lines) + "\n```"
+
+
+def inline_json(rng: random.Random) -> str:
+    obj = {
+        rng.choice(WORDS): rng.randint(0, 1000),
+        "items": [rng.choice(WORDS) for _ in range(rng.randint(1, 5))],
+        "nested": {"ok": rng.random() < 0.5, "value": None},
+    }
+    return f"The result was {json.dumps(obj)} as expected."
+
+
+def make_message(
+    msg_id: str,
+    role: str,
+    parts: List[Any],
+    create_time: Optional[float],
+    content_type: str = "text",
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    return {
+        "id": msg_id,
+        "author": {"role": role, "name": None, "metadata": {}},
+        "create_time": create_time,
+        "update_time": None,
+        "content": {"content_type": content_type, "parts": parts},
+        "status": "finished_successfully",
+        "end_turn": True,
+        "weight": 1.0,
+        "metadata": metadata or {},
+        "recipient": "all",
+        "channel": None,
+    }
+
+
+def user_message(rng: random.Random, spec: SyntheticSpec, msg_id: str, t: float) -> Dict[str, Any]:
+    parts: List[Any] = [paragraph(rng, rng.randint(1, 3))]
+    if rng.random() < spec.images:
+        parts.append(
+            {
+                "content_type": "image_asset_pointer",
+                "asset_pointer": f"file-service://{msg_id}-img",
+                "width": 1024,
+                "height": 768,
+            }
+        )
+        return make_message(msg_id, "user", parts, t, content_type="multimodal_text")
+    return make_message(msg_id, "user", parts, t)
+
+
+def assistant_message(rng: random.Random, spec: SyntheticSpec, msg_id: str, t: float) -> Dict[str, Any]:
+    if rng.random() < spec.canvas:
+        update = {"pattern": ".*", "replacement": paragraph(rng, 2) + "\n\n" + code_block(rng)}
+        return make_message(msg_id, "assistant", [{"updates": [update]}], t)
+    chunks = [paragraph(rng, rng.randint(2, 5))]
+    if rng.random() < spec.code_blocks:
+        chunks.append(code_block(rng))
+    if rng.random() < spec.inline_json:
+        chunks.append(inline_json(rng))
+    chunks.append(paragraph(rng, 1))
+    return make_message(msg_id, "assistant", ["\n\n".join(chunks)], t)
+
+
+def generate_conversation(rng: random.Random, spec: SyntheticSpec, index: int) -> Dict[str, Any]:
+    conv_id = f"conv-{index:06d}"
+    created = START_TIME + index * 3600.0
+    root_id = f"{conv_id}-root"
+    sys_id = f"{conv_id}-sys"
+    mapping: Dict[str, Dict[str, Any]] = {
+        root_id: {"id": root_id, "message": None, "parent": None, "children": [sys_id]},
+        sys_id: {
+            "id": sys_id,
+            "message": make_message(
+                sys_id, "system", [""], None,
+                metadata={"is_visually_hidden_from_conversation": True},
+            ),
+            "parent": root_id,
+            "children": [],
+        },
+    }
+
+    def add(node_id: str, message: Dict[str, Any], parent: str) -> None:
+        mapping[node_id] = {"id": node_id, "message": message, "parent": parent, "children": []}
+        mapping[parent]["children"].append(node_id)
+
+    parent = sys_id
+    t = created
+    for j in range(spec.messages):
+        node_id = f"{conv_id}-m{j:04d}"
+        t += rng.uniform(5, 120)
+        if j % 2 == 0:
+            add(node_id, user_message(rng, spec, node_id, t), parent)
+        else:
+            if rng.random() < spec.branching:
+                # A regenerated answer which is not on the active branch
+                alt_id = f"{node_id}-alt"
+                add(alt_id, assistant_message(rng, spec, alt_id, t), parent)
+                t += rng.uniform(5, 60)
+            add(node_id, assistant_message(rng, spec, node_id, t), parent)
+        parent = node_id
+
+    return {
+        "title": f"Synthetic {rng.choice(WORDS)} {index}",
+        "create_time": created,
+        "update_time": t,
+        "mapping": mapping,
+        "moderation_results": [],
+        "current_node": parent,
+        "conversation_id": conv_id,
+        "id": conv_id,
+    }
+
+
+def generate_archive(spec: SyntheticSpec) -> Iterator[Dict[str, Any]]:
+    """Yield *spec.conversations* conversations, deterministically for *spec.seed*."""
+    rng = random.Random(spec.seed)
+    for index in range(spec.conversations):
+        yield generate_conversation(rng, spec, index)
+
+
+def write_archive(path: str, spec: SyntheticSpec) -> int:
+    """Stream the archive to *path* as a JSON array. Returns the bytes written."""
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("[")
+        for i, conv in enumerate(generate_archive(spec)):
+            chunk = ("," if i else "") + json.dumps(conv, ensure_ascii=False)
+            written += f.write(chunk)
+        f.write("]\n")
+    return written + 3
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="conversations.json file to write")
+    defaults = SyntheticSpec()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args(argv)
+    spec = SyntheticSpec(**{k: getattr(args, k) for k in asdict(defaults)})
+    size = write_archive(args.output, spec)
+    print(f"Wrote {spec.conversations} conversations ({size / 1e6:.1f} MB) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-# read version from installed package
-from importlib.metadata import version
-__version__ = version("gptctl")
\ No newline at end of file
+# Kept in sync with pyproject.toml by semantic-release (see version_variables),
+# so reading it doesn't need importlib.metadata
+__version__ = "0.1.1"
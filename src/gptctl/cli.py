@@ -1,28 +1,48 @@
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import Annotated, List, Optional
 import logging
 
 from gptctl.config import check_config_exists, default_config_path
 
 from gptctl import __version__
 
-from rich.console import Console
-from rich.logging import RichHandler
-
 import typer
-from .commands.view import app as view_app
-from .commands.export import app as export_app
-from .commands.config import app as config_app
+from .commands import LazyTyperGroup
+from .commands.search import SearchGroup
+from .commands.serve import ServeGroup
+from .commands.view import ViewGroup
 from .config import AppConfig
+from .definitions import Phase
 
 APP_NAME = "gptctl"
-DEFAULT_CONFIG = AppConfig().to_dict()
 logger = logging.getLogger("rich")
-console = Console()
 
 
-def setup_logging(verbose: int = 0, debug: bool = False) -> None:
+class RootGroup(LazyTyperGroup):
+    # Command modules (and rich, jinja2, ...) are imported only for the command being run
+    lazy_commands = {
+        **ViewGroup.lazy_commands,
+        "export": (
+            "gptctl.commands.export",
+            "Export conversations from the ***input*** conversations.json file to JSON or MARKDOWN format. See gptctl **export command --help** for details.",
+        ),
+        **SearchGroup.lazy_commands,
+        "analyze": (
+            "gptctl.commands.analyze",
+            "Archive-wide analytics of the ***input*** conversations.json file. See gptctl **analyze command --help** for details.",
+        ),
+        **ServeGroup.lazy_commands,
+        "config": (
+            "gptctl.commands.config",
+            "Configuration file(s) operations: show, create",
+        ),
+    }
+
+
+def setup_logging(verbose: int = 0, debug: bool = False, console=None) -> None:
     """Set up logging configuration."""
+    from rich.logging import RichHandler
+
     level = (
         logging.DEBUG
         if debug or verbose in [2, 3]
@@ -55,19 +75,11 @@ CLI manager to organize(show,list,export,explore) ChatGPT user ***conversations.
 
 app = typer.Typer(
     name=APP_NAME,
+    cls=RootGroup,
     no_args_is_help=True,
     rich_markup_mode="markdown",
     help=app_help,
 )
-app.add_typer(view_app)
-app.add_typer(
-    export_app,
-    name="export",
-    help="Export conversations from the ***input*** conversations.json file to JSON or MARKDOWN format. See gptctl **export command --help** for details.",
-)
-app.add_typer(
-    config_app, name="config", help="Configuration file(s) operations: show, create"
-)
 
 
 def check_exclusive_options(
@@ -112,7 +124,8 @@ def check_exclusive_options(
 
 def version_callback(value: bool):
     if value:
-        console.print(f"{APP_NAME}, version v[bold]{__version__}[/bold]")
+        # Plain echo: printing the version shouldn't import rich
+        typer.echo(f"{APP_NAME}, version v{__version__}")
         raise typer.Exit()
 
 
@@ -121,18 +134,18 @@ def version_callback(value: bool):
 def main_callback(
     ctx: typer.Context,
     input: Annotated[
-        str,
+        Optional[List[str]],
         typer.Option(
             "--input",
             "-i",
-            help="Path to input conversations.json file",
+            help="Path to input conversations.json file. Repeat it or use a glob (quoted) to merge several exports: a conversation found in more than one is shown once, from its most recently updated copy.",
             rich_help_panel="Path OPTIONS",
         ),
-    ] = "",
+    ] = None,
     output_dir: Annotated[
         str,
         typer.Option(help="Path to output directory", rich_help_panel="Path OPTIONS"),
-    ] = DEFAULT_CONFIG["output_dir"],
+    ] = AppConfig.output_dir,
     output: Annotated[
         str,
         typer.Option(
@@ -141,7 +154,7 @@ def main_callback(
             help="Path to output file. Depends on the command used.",
             rich_help_panel="Path OPTIONS",
         ),
-    ] = DEFAULT_CONFIG["output_file"],
+    ] = AppConfig.output_file,
     config: Annotated[
         Path,
         typer.Option(
@@ -167,7 +180,7 @@ def main_callback(
             help="Shorten long strings (for ***dry-run*** preview)",
             rich_help_panel="Miscellaneous OPTIONS",
         ),
-    ] = DEFAULT_CONFIG["truncate_len"],
+    ] = AppConfig.truncate_len,
     verbose: Annotated[
         int,
         typer.Option(
@@ -178,6 +191,55 @@ def main_callback(
             rich_help_panel="Miscellaneous OPTIONS",
         ),
     ] = 0,
+    profile: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--profile",
+            help="Profile the command with cProfile, write the stats to this ***pstats*** file and print the top hotspots. Work done in ***--jobs*** worker processes is not profiled.",
+            rich_help_panel="Profiling OPTIONS",
+        ),
+    ] = None,
+    profile_top: Annotated[
+        int,
+        typer.Option(
+            "--profile-top",
+            help="Number of hotspots printed with ***--profile***",
+            rich_help_panel="Profiling OPTIONS",
+        ),
+    ] = 20,
+    profile_phase: Annotated[
+        Optional[Phase],
+        typer.Option(
+            "--profile-phase",
+            case_sensitive=False,
+            help="Only profile this phase of the command",
+            rich_help_panel="Profiling OPTIONS",
+        ),
+    ] = None,
+    stats: Annotated[
+        bool,
+        typer.Option(
+            "--stats",
+            help="Print per-phase timings, counts, bytes read/written, throughput and peak memory of the command",
+            rich_help_panel="Profiling OPTIONS",
+        ),
+    ] = False,
+    stats_json: Annotated[
+        Optional[str],
+        typer.Option(
+            "--stats-json",
+            help="Write the ***--stats*** report as JSON to this file ('-' for the console)",
+            rich_help_panel="Profiling OPTIONS",
+        ),
+    ] = None,
+    trace_malloc: Annotated[
+        bool,
+        typer.Option(
+            "--trace-malloc",
+            help="Also report the Python heap peak measured by tracemalloc with ***--stats***. Slows the command down.",
+            rich_help_panel="Profiling OPTIONS",
+        ),
+    ] = False,
     version: Annotated[
         bool,
         typer.Option(
@@ -192,10 +254,13 @@ def main_callback(
 ):
     """
     Global  [OPTIONS] for ChatGpt Conversation Control. Use --help on subcommands for more details of another COMMAND [ARGS]..."""
+    from rich.console import Console
+
+    console = Console()
 
     if verbose >= 1:
         console.print(f"Verbose level set to [bold green]{verbose}[/bold green]")
-        console.print(f"Reading conversations from {input}...")
+        console.print(f"Reading conversations from {', '.join(input or [])}...")
 
     if verbose == 2:
         console.print("Debug output enabled.")
@@ -214,7 +279,7 @@ def main_callback(
     ctx.obj = {"verbose": verbose, "dry_run": dry_run}
 
     # Adjust the logging level based on the number of `-v` flags
-    setup_logging(verbose=verbose)
+    setup_logging(verbose=verbose, console=console)
 
     # file_config = load_config(config, verbose)
     # cfg = resolve_config(ctx.params, file_config, verbose)
@@ -243,6 +308,39 @@ def main_callback(
         cfg = AppConfig()
     ctx.obj["config"] = cfg.to_dict()
     ctx.obj["console"] = console
+    if input:
+        from .utils.loader import expand_inputs
+
+        try:
+            input_files = expand_inputs(input)
+        except FileNotFoundError as e:
+            raise typer.BadParameter(f"{e.strerror}: {e.filename}", param_hint="'--input'")
+    else:
+        input_files = [cfg.input_file]
+    # Commands reading a single file use the first one
+    ctx.obj["config"]["input_file"] = input_files[0]
+    ctx.obj["config"]["input_files"] = input_files
+
+    if profile is not None or stats or stats_json is not None:
+        from .utils.instrument import Instrumentation, activate
+
+        instrumentation = activate(
+            Instrumentation(
+                profile_path=str(profile) if profile is not None else None,
+                profile_top=profile_top,
+                profile_phase=profile_phase,
+                stats=stats,
+                stats_json=stats_json,
+                trace_malloc=trace_malloc,
+            )
+        )
+
+        def finish_instrumentation():
+            instrumentation.finish(console)
+            activate(Instrumentation())
+
+        ctx.call_on_close(finish_instrumentation)
+        instrumentation.start()
 
 
 def main():
@@ -0,0 +1,70 @@
+import importlib
+from typing import Dict, List, Tuple
+
+import typer
+from typer.core import TyperCommand, TyperGroup
+from typer.main import get_command_from_info, get_group
+
+
+class LazyTyperGroup(TyperGroup):
+    """Group whose subcommands are only imported when they are used.
+
+    `lazy_commands` maps a command name to ``(module, short help)``. The
+    module's `app` Typer is imported when the command is run or its own
+    `--help` is shown; listing the group's commands (`--help` of the group,
+    shell completion) uses the short help and imports nothing.
+    """
+
+    lazy_commands: Dict[str, Tuple[str, str]] = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._listing = False
+
+    def list_commands(self, ctx: typer.Context) -> List[str]:
+        names = super().list_commands(ctx)
+        return names + [name for name in self.lazy_commands if name not in names]
+
+    def get_command(self, ctx: typer.Context, name: str):
+        if name in self.commands or name not in self.lazy_commands:
+            return super().get_command(ctx, name)
+        module, short_help = self.lazy_commands[name]
+        if self._listing:
+            return TyperCommand(name, short_help=short_help)
+        command = self._load(name, module)
+        self.commands[name] = command
+        return command
+
+    def _load(self, name: str, module: str):
+        sub = importlib.import_module(module).app
+        if (
+            sub.registered_groups
+            or sub.registered_callback
+            or sub.info.callback
+            or len(sub.registered_commands) != 1
+        ):
+            group = get_group(sub)
+            # As if added with `add_typer(sub, name=name)` to this group
+            group.name = name
+            group.rich_markup_mode = self.rich_markup_mode
+            return group
+        return get_command_from_info(
+            sub.registered_commands[0],
+            pretty_exceptions_short=sub.pretty_exceptions_short,
+            rich_markup_mode=self.rich_markup_mode,
+        )
+
+    def format_help(self, ctx: typer.Context, formatter) -> None:
+        self._listing = True
+        try:
+            super().format_help(ctx, formatter)
+        finally:
+            self._listing = False
+
+    def shell_complete(self, ctx: typer.Context, incomplete: str):
+        self._listing = True
+        try:
+            return super().shell_complete(ctx, incomplete)
+        finally:
+            self._listing = False
+
@@ -0,0 +1,19 @@
+import typer
+
+from gptctl.commands import LazyTyperGroup
+
+
+class AnalyzeGroup(LazyTyperGroup):
+    lazy_commands = {
+        "suggestions": (
+            "gptctl.commands.analyze.suggestions",
+            "Count assistant suggestions (\"Would you like me to…?\") across the whole ***input*** archive. :bar_chart:",
+        ),
+    }
+
+
+app = typer.Typer(
+    cls=AnalyzeGroup,
+    help="Archive-wide analytics of the ***input*** conversations.json file. See gptctl **analyze command --help** for details.",
+    no_args_is_help=True,
+)
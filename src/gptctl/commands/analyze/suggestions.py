@@ -0,0 +1,124 @@
+import csv
+import json
+import sys
+from typing import Annotated, Any, Dict, List, Optional
+import typer
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from gptctl.definitions import Phase, ReportFormat, SuggestionKey
+from gptctl.utils.instrument import count, phase
+from gptctl.utils.suggestions import aggregate_suggestions, analyze_files
+
+app = typer.Typer()
+
+
+def create_report_table(rows: List[Dict[str, Any]], title: str) -> Table:
+    table = Table(title=title)
+    for column in rows[0] if rows else ["count"]:
+        table.add_column(column, justify="right" if column == "count" else "left")
+    for row in rows:
+        table.add_row(*(escape(str(v)) for v in row.values()))
+    return table
+
+
+@app.command("suggestions")
+def analyze_suggestions(
+    ctx: typer.Context,
+    by: Annotated[
+        Optional[List[SuggestionKey]],
+        typer.Option(
+            "--by",
+            "-b",
+            case_sensitive=False,
+            help="Count suggestions per key phrase, month and/or conversation. May be used multiple times. Defaults to phrase.",
+        ),
+    ] = None,
+    output_format: Annotated[
+        ReportFormat,
+        typer.Option("--format", "-f", case_sensitive=False, help="Report format"),
+    ] = ReportFormat.TABLE,
+    report: Annotated[
+        Optional[str],
+        typer.Option(
+            "--report",
+            "-r",
+            help="Write the CSV/JSON report to this file instead of the console",
+        ),
+    ] = None,
+    limit: Annotated[
+        Optional[int],
+        typer.Option("--limit", "-n", min=0, help="Only the ***limit*** most frequent rows"),
+    ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=0, help="Number of worker processes. 0 means all CPUs."),
+    ] = 0,
+):
+    """
+    Count assistant suggestions ("Would you like me to…?") across the whole ***input*** archive. :bar_chart:
+
+    Conversations are parsed and matched by ***jobs*** worker processes; the counts are aggregated per key phrase, month and/or conversation.
+
+    Example Usage:
+
+    ```bash
+    $ gptctl analyze suggestions --by phrase --by month
+    $ gptctl analyze suggestions --by conversation --format csv --report suggestions.csv
+    ```
+    """
+    cfg = ctx.obj["config"]
+    input_files = cfg["input_files"]
+    console: Console = ctx.obj["console"]
+    keys = by or [SuggestionKey.PHRASE]
+
+    try:
+        with phase(Phase.COLLECT):
+            n_conversations, counts = analyze_files(input_files, jobs=jobs)
+    except FileNotFoundError as e:
+        console.print(f"[red]File or directory {e.filename} is not found[/red]")
+        raise typer.Exit(1)
+    except ValueError as e:
+        console.print(f"[red]Can't read {', '.join(input_files)}: {e}[/red]")
+        raise typer.Exit(1)
+    count("conversations", n_conversations)
+
+    with phase(Phase.SORT):
+        rows = aggregate_suggestions(counts, keys)[:limit]
+
+    with phase(Phase.WRITE):
+        if output_format == ReportFormat.TABLE:
+            total = sum(counts.values())
+            if not total:
+                console.print(f"No suggestions found in {n_conversations} conversation(s).")
+                return
+            console.print(
+                create_report_table(
+                    rows,
+                    f"{total} suggestion(s) in {n_conversations} conversation(s) by {', '.join(k.value for k in keys)}",
+                )
+            )
+            return
+        out = open(report, "w", encoding="utf-8", newline="") if report else sys.stdout
+        try:
+            if output_format == ReportFormat.CSV:
+                writer = csv.DictWriter(out, fieldnames=list(rows[0]) if rows else ["count"])
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump(rows, out, ensure_ascii=False, indent=2)
+                out.write("\n")
+        finally:
+            if report:
+                out.close()
+    if report:
+        console.print(f"✅ Wrote {len(rows)} row(s) to {report}")
+
+
+def main():
+    app()
+
+
+if __name__ == "__main__":
+    main()
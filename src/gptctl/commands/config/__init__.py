@@ -1,8 +1,8 @@
 import typer
 from typer.core import TyperGroup
 from click.core import Command
-from .show import app as config_show_app
-from .config_init import app as config_init_app
+
+from gptctl.commands import LazyTyperGroup
 
 
 class CustomTyperGroup(TyperGroup):
@@ -14,8 +14,18 @@ class CustomTyperGroup(TyperGroup):
         return super().get_command(ctx, name)
 
 
+class ConfigGroup(LazyTyperGroup):
+    lazy_commands = {
+        "show": ("gptctl.commands.config.show", "Show configuration"),
+        "init": (
+            "gptctl.commands.config.config_init",
+            "**Initialize/create** configuration file with defaults in a default location.",
+        ),
+    }
+
+
 app = typer.Typer(
-    help="See individual command --help for details", no_args_is_help=True
+    cls=ConfigGroup,
+    help="Configuration file(s) operations: show, create",
+    no_args_is_help=True,
 )
-app.add_typer(config_show_app)
-app.add_typer(config_init_app)
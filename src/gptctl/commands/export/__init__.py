@@ -1,11 +1,27 @@
 import typer
-from .json import app as exp_json_app
-from .markdown import app as exp_md_app
-from .extract import app as exp_partial
+
+from gptctl.commands import LazyTyperGroup
+
+
+class ExportGroup(LazyTyperGroup):
+    lazy_commands = {
+        "json": (
+            "gptctl.commands.export.json",
+            "Export one or ___more___ (in a batch) conversations to a ___\\*.json___ file(s). :rocket:",
+        ),
+        "markdown": (
+            "gptctl.commands.export.markdown",
+            "Export one or ___more___ (in a batch) conversations to a ___markdown (\\*.md)___ file(s). :rocket:",
+        ),
+        "partial": (
+            "gptctl.commands.export.extract",
+            "Export a range or subtree of messages, preserving parent-child structure and chronology.",
+        ),
+    }
+
 
 app = typer.Typer(
-    help="See individual command --help for details", no_args_is_help=True
+    cls=ExportGroup,
+    help="Export conversations from the ***input*** conversations.json file to JSON or MARKDOWN format. See gptctl **export command --help** for details.",
+    no_args_is_help=True,
 )
-app.add_typer(exp_json_app)
-app.add_typer(exp_md_app)
-app.add_typer(exp_partial)
\ No newline at end of file
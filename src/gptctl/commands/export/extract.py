@@ -1,121 +1,112 @@
-import json
 from pathlib import Path
+from typing import List, Optional
 import typer
 
+from gptctl.definitions import Phase
+from gptctl.utils.instrument import count, iterate, phase
+from gptctl.utils.cache import iter_selected
+from gptctl.utils.tree import PartialRange, parse_ranges, resolve_ranges
+
 app = typer.Typer(help="ChatGPT conversation export CLI")
 
 
+def node_content(node: dict) -> str:
+    content = node["message"].get("content")
+    parts = content.get("parts") if isinstance(content, dict) else None
+    first = (parts or [""])[0]
+    return first if isinstance(first, str) else str(first)
+
+
+def format_nodes(nodes: List[dict], output_format: str = "markdown") -> List[str]:
+    if output_format == "markdown":
+        lines = ["# Exported Conversation\n"]
+        for node in nodes:
+            role = node["message"]["author"]["role"]
+            lines.append(f"**{role.capitalize()}:** {node_content(node)}\n")
+        return lines
+    return [f"{node['message']['author']['role']}: {node_content(node)}" for node in nodes]
+
+
 @app.command("partial")
 def thread_partial (
+    ctx: typer.Context,
     thread: str = typer.Option(None, help="Thread ID (optional, auto-detected)"),
-    start: str = typer.Option(..., help="Start message title or ID"),
+    start: str = typer.Option(None, help="Start message title or ID"),
     end: str = typer.Option(None, help="End message title or ID (optional)"),
+    ranges_file: Optional[Path] = typer.Option(
+        None,
+        "--ranges",
+        help="File with one range per line: START<TAB>END (END optional). Extracts all of them in one pass over the input.",
+    ),
     include_children: bool = typer.Option(
         False, "--include-children", help="Include children recursively"
     ),
     depth: int = typer.Option(None, "--depth", help="Limit child recursion depth"),
     context_limit: int = typer.Option(
-        None, "--context-limit", help="Limit number of ancestors to include"
+        None, "--context-limit", help="Limit number of (nearest) ancestors to include"
     ),
     output_format: str = typer.Option(
         "markdown", "--format", help="Output format: markdown or text"
     ),
-    data_file: Path = typer.Option(
-        Path("conversations.json"), help="Path to ChatGPT export JSON file"
+    data_file: Optional[Path] = typer.Option(
+        None,
+        help="Path to ChatGPT export JSON file. Deprecated: use the global --input option",
     ),
 ):
     """
     Export a range or subtree of messages, preserving parent-child structure and chronology.
     Example Usage:
-    gptctl export --start "AI Agentic Workflows" --end "Dust / Pydust" --include-children --depth 2 --context-limit 3 --format markdown
+    gptctl export partial --start "AI Agentic Workflows" --end "Dust / Pydust" --include-children --depth 2 --context-limit 3 --format markdown
     """
-    data = json.loads(data_file.read_text())
-    messages = {
-        m["id"]: m for t in data for m in t["mapping"].values() if "message" in m
-    }
+    input_files = [str(data_file)] if data_file else ctx.obj["config"]["input_files"]
 
-    def find_by_key(key):
-        for msg in messages.values():
-            if msg["message"].get("id") == key or msg["message"].get("title") == key:
-                return msg
-        return None
-
-    start_msg = find_by_key(start)
-    if not start_msg:
-        typer.echo(f"Start message '{start}' not found")
+    ranges: List[PartialRange] = []
+    if start:
+        ranges.append(PartialRange(start, end))
+    if ranges_file:
+        with open(ranges_file, "r", encoding="utf-8") as f:
+            ranges.extend(parse_ranges(f))
+    if not ranges:
+        typer.echo("Provide --start or --ranges")
         raise typer.Exit(1)
 
-    # Auto-detect thread root
-    if not thread:
-        root = start_msg
-        while root.get("parent") and root["parent"] in messages:
-            root = messages[root["parent"]]
-        thread = root["message"]["id"]
-        typer.echo(f"Auto-detected thread ID: {thread}")
-
-    # Helper: get parent chain (context)
-    def get_parents(msg):
-        parents = []
-        current = msg
-        while current.get("parent") and current["parent"] in messages:
-            parent = messages[current["parent"]]
-            parents.append(parent)
-            current = parent
-        return (
-            list(reversed(parents))[:context_limit]
-            if context_limit
-            else list(reversed(parents))
-        )
-
-    # Helper: get children recursively (with depth)
-    def get_children(msg, level=0):
-        if depth is not None and level >= depth:
-            return []
-        children = [
-            messages[cid]
-            for cid in messages
-            if messages[cid].get("parent") == msg["id"]
-        ]
-        children.sort(key=lambda x: x["message"]["create_time"])
-        result = []
-        for child in children:
-            result.append(child)
-            result.extend(get_children(child, level + 1))
-        return result
-
-    # Collect messages
-    exported = get_parents(start_msg) + [start_msg]
-    if end:
-        end_msg = find_by_key(end)
-        if not end_msg:
-            typer.echo(f"End message '{end}' not found")
-            raise typer.Exit(1)
-        # Include all messages between start and end (inclusive)
-        all_sorted = sorted(
-            messages.values(), key=lambda x: x["message"]["create_time"]
+    with phase(Phase.COLLECT):
+        resolve_ranges(
+            iterate(Phase.LOAD, iter_selected(input_files)), ranges, thread=thread
         )
-        start_idx = all_sorted.index(start_msg)
-        end_idx = all_sorted.index(end_msg)
-        exported += all_sorted[start_idx + 1 : end_idx + 1]
 
-    if include_children:
-        exported += get_children(start_msg)
+    failed = False
+    for n, r in enumerate(ranges):
+        if r.tree is None or r.start_id is None:
+            typer.echo(f"Start message '{r.start}' not found")
+            failed = True
+            continue
+        if r.end and r.end_id is None:
+            typer.echo(f"End message '{r.end}' not found")
+            failed = True
+            continue
+        if not thread and len(ranges) == 1:
+            root = r.tree.nodes[r.tree.root(r.start_id)]
+            typer.echo(f"Auto-detected thread ID: {root['message']['id']}")
 
-    # Deduplicate + sort chronologically
-    exported = sorted(set(exported), key=lambda x: x["message"]["create_time"])
+        with phase(Phase.RENDER):
+            nodes = r.tree.extract(
+                r.start_id,
+                r.end_id,
+                include_children=include_children,
+                depth=depth,
+                context_limit=context_limit,
+            )
+            lines = format_nodes(nodes, output_format)
+        count("ranges")
+        count("messages", len(nodes))
+        with phase(Phase.WRITE):
+            if n:
+                typer.echo("\n---\n")
+            typer.echo("\n".join(lines))
 
-    # Format output
-    if output_format == "markdown":
-        lines = ["# Exported Conversation\n"]
-        for msg in exported:
-            role = msg["message"]["author"]["role"]
-            content = msg["message"]["content"].get("parts", [""])[0]
-            lines.append(f"**{role.capitalize()}:** {content}\n")
-        typer.echo("\n".join(lines))
-    else:
-        for msg in exported:
-            content = msg["message"]["content"].get("parts", [""])[0]
-            typer.echo(f"{msg['message']['author']['role']}: {content}")
+    if failed:
+        raise typer.Exit(1)
 
 
 if __name__ == "__main__":
@@ -1,49 +1,162 @@
+from collections import deque
+from itertools import chain
 import json
 import os
-from typing import Annotated, Any, List, Optional
+from typing import (
+    IO,
+    Annotated,
+    Any,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 from rich.console import Console
 
 import typer
-from gptctl.definitions import Conversation, SortFields, SortOrder
+from gptctl.definitions import (
+    Conversation,
+    ExecutorKind,
+    MatchMode,
+    Phase,
+    SortFields,
+    SortOrder,
+)
+from gptctl.utils.instrument import count, iterate, phase
+from gptctl.utils.cache import iter_selected
+from gptctl.utils.lookup import conversation_id
+from gptctl.utils.manifest import Manifest, content_hash
+from gptctl.utils.parallel import default_jobs, imap_ordered, make_executor
 from gptctl.utils.utils import (
-    collect_conv,
     get_batch_filepath,
     get_batch_list,
     get_filepath,
+    iter_conv,
     sort_conv,
 )
 
 app = typer.Typer()
 
+T = TypeVar("T")
+
+
+WRITE_BUFFER = 1 << 20  # 1 MiB
+
+
+def json_encoder(compact: bool = False) -> json.JSONEncoder:
+    if compact:
+        return json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    return json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def as_json_dict(item: Any) -> Optional[dict]:
+    if isinstance(item, dict):
+        return item
+    if isinstance(item, Conversation):
+        return item.to_dict()
+    return None
+
 
-def write_json(data: Any = {}, path: str = "", ensure_linux_lines: bool = True):
+def write_array(f: IO[str], items: Iterable[Any], encoder: json.JSONEncoder) -> None:
+    """Write *items* as a JSON array, encoding one item at a time.
+
+    The output is the same as encoding the whole list at once, but only one
+    conversation is held in memory (span-backed ones are loaded one by one).
+    """
+    if encoder.indent is None:
+        pad = ""
+        opening, separator, closing = "[", encoder.item_separator, "]"
+    else:
+        pad = "\n" + " " * int(encoder.indent)
+        opening, separator, closing = "[" + pad, "," + pad, "\n]"
+    first = True
+    for item in items:
+        j = as_json_dict(item)
+        if j is None:
+            continue
+        text = encoder.encode(j)
+        if pad:
+            # Newlines in strings are escaped: these are all indentation
+            text = text.replace("\n", pad)
+        f.write(opening if first else separator)
+        f.write(text)
+        first = False
+    f.write("[]" if first else closing)
+
+
+def write_json(
+    data: Any = {},
+    path: str = "",
+    ensure_linux_lines: bool = True,
+    compact: bool = False,
+    make_dirs: bool = True,
+) -> int:
+    """Write *data* (a conversation or a list of them) to *path*.
+
+    Returns:
+        int: the number of bytes written, 0 if nothing was written
+    """
     try:
-        dirname = os.path.dirname(path)
-        os.makedirs(dirname, exist_ok=True)
-
-        if isinstance(data, dict):
-            j = data
-        elif isinstance(data, Conversation):
-            j = data.to_dict()
-        elif isinstance(data, list):
-            j = []
-            for it in data:
-                if isinstance(it, dict):
-                    j.append(it)
-                elif isinstance(it, Conversation):
-                    j.append(it.to_dict())
-                else:
-                    continue
-        else:
-            return
-
-        with open(path, "w", encoding="utf-8", newline="\n") as f:
-            f.write(json.dumps(j, ensure_ascii=False, indent=2))
+        if not isinstance(data, (dict, Conversation, list)):
+            return 0
+        if make_dirs:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        encoder = json_encoder(compact)
+        with open(
+            path, "w", encoding="utf-8", newline="\n", buffering=WRITE_BUFFER
+        ) as f:
+            if isinstance(data, list):
+                write_array(f, data, encoder)
+            else:
+                f.write(encoder.encode(as_json_dict(data)))
             f.write("\n")
+            return f.tell()
     except FileNotFoundError:
         print(f"Error: The file '{path}' was not found.")
     except Exception as e:
         print(f"An error occurred: {e}")
+    return 0
+
+
+def write_task(task: Tuple[dict, str, bool]) -> int:
+    data, path, compact = task
+    return write_json(data=data, path=path, compact=compact, make_dirs=False)
+
+
+def write_files(
+    files: Iterable[Tuple[dict, str, T]], jobs: int = 1, compact: bool = False
+) -> Iterator[Tuple[int, T]]:
+    """Write ``(data, path, tag)`` items, yielding ``(bytes written, tag)`` in input order.
+
+    With *jobs* > 1 files are written by a pool of threads, at most two
+    per thread pending, so the next conversations are loaded and encoded
+    while slow storage (e.g. a network share) creates the previous files.
+    The directories must exist.
+    """
+    if jobs == 1:
+        for data, path, tag in files:
+            with phase(Phase.WRITE):
+                written = write_json(data=data, path=path, compact=compact, make_dirs=False)
+            yield written, tag
+        return
+    jobs = jobs or default_jobs()
+    tags: Deque[T] = deque()
+
+    def tasks() -> Iterator[Tuple[dict, str, bool]]:
+        for data, path, tag in files:
+            tags.append(tag)
+            yield data, path, compact
+
+    with make_executor(jobs, ExecutorKind.THREAD) as pool:
+        # Waiting for the writers is writing time
+        for written in iterate(
+            Phase.WRITE, imap_ordered(pool, write_task, tasks(), window=2 * jobs)
+        ):
+            yield written, tags.popleft()
 
 
 def write_console(console: Console, data: dict = {}, path: str = "./"):
@@ -82,6 +195,22 @@ def export_json(
             help="**Title** of the conversation to export. May be used multiple times. Use asterisk('*') to export all titles",
         ),
     ] = None,
+    conv_id: Annotated[
+        Optional[List[str]],
+        typer.Option(
+            "--id",
+            help="**Id** of the conversation to export. May be used multiple times.",
+        ),
+    ] = None,
+    match: Annotated[
+        MatchMode,
+        typer.Option(
+            "--match",
+            "-m",
+            case_sensitive=False,
+            help="How **titles** are matched: exactly, case-insensitively or by title prefix. Every conversation with a matching title is exported.",
+        ),
+    ] = MatchMode.EXACT,
     batch_size: Annotated[
         int,
         Optional[int],
@@ -108,10 +237,59 @@ def export_json(
         SortOrder,
         typer.Option("--order", "-o", case_sensitive=False, help="Sort order"),
     ] = SortOrder.DESC,
+    limit: Annotated[
+        Optional[int],
+        typer.Option(
+            "--limit",
+            "-n",
+            min=0,
+            help="Only the first ***limit*** conversations, after sorting",
+        ),
+    ] = None,
+    offset: Annotated[
+        int,
+        typer.Option(
+            "--offset", min=0, help="Skip the first ***offset*** conversations, after sorting"
+        ),
+    ] = 0,
     skip_system: Annotated[
         bool,
         typer.Option("--skip-system / --no-skip-system", help="Skip system messages"),
     ] = True,
+    compact: Annotated[
+        bool,
+        typer.Option(
+            "--compact",
+            help="Write JSON without indentation or spaces",
+            rich_help_panel="Formatting Options",
+        ),
+    ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=0,
+            help="Write one file per conversation with ***jobs*** threads, so encoding overlaps with slow storage. 0 means all CPUs, 1 writes sequentially.",
+            rich_help_panel="Performance Options",
+        ),
+    ] = 1,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            "--incremental",
+            help="Only write conversations that are new or changed since the last export to ***output-dir***",
+            rich_help_panel="Incremental Options",
+        ),
+    ] = False,
+    prune: Annotated[
+        bool,
+        typer.Option(
+            "--prune",
+            help="Remove files of conversations that are no longer in the input file. Requires exporting all titles ('*') without --limit/--offset",
+            rich_help_panel="Incremental Options",
+        ),
+    ] = False,
 ):
     """
     Export one or ___more___ (in a batch) conversations to a ___\\*.json___ file(s). :rocket:
@@ -125,37 +303,59 @@ def export_json(
     $ gptctl --output-dir export json -t 'My conversation title 5' -t 'My conversation title 2' -t 'My conversation title 15'
     # Export all titles
     $ gptctl export json --title "*"
+    # Nightly: only rewrite new/changed conversations, remove deleted ones
+    $ gptctl export json --title "*" --incremental --prune
     ```
     """
     cfg = ctx.obj["config"]
-    input_file = cfg["input_file"]
+    input_files = cfg["input_files"]
     output_dir = cfg["output_dir"]
     dry_run = ctx.obj.get("dry_run", False)
     console: Console = ctx.obj["console"]
 
-    if not title:
+    if not title and not conv_id:
         console.print(f"[red]No title(s) provided (raw input = {title})[/red]")
         raise typer.Abort()
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        conversations = json.load(f)
-
     titles = []
-    if len(title) and title[0] == "*":
+    if title and title[0] == "*":
         titles = []
     else:
-        titles = title
+        titles = title or []
 
-    conv_objs = collect_conv(
-        conversations=conversations,
-        titles=titles,
-        skip_system=skip_system,
-        console=console,
+    if batch_size and (incremental or prune):
+        console.print("[red]--incremental/--prune can't be used with --batch[/red]")
+        raise typer.Abort()
+    if prune and (titles or conv_id or limit is not None or offset):
+        console.print("[red]--prune requires exporting all titles ('*'), without --limit/--offset[/red]")
+        raise typer.Abort()
+
+    conv_iter = iterate(
+        Phase.COLLECT,
+        iter_conv(
+            conversations=iterate(
+                Phase.LOAD,
+                iter_selected(
+                    input_files, titles=titles, ids=conv_id or [], match=match, console=console
+                ),
+            ),
+            skip_system=skip_system,
+            console=console,
+        ),
     )
-    if not len(conv_objs):
+    first = next(conv_iter, None)
+    if first is None:
         console.print(f"No title(s) found (raw input = {title})")
         raise typer.Abort()
-    conv_sorted = sort_conv(data=conv_objs, sort=sort, order=order)
+    # Unsorted exports stream conversations straight from the input file
+    with phase(Phase.SORT):
+        conv_sorted = sort_conv(
+            data=chain([first], conv_iter),
+            sort=sort,
+            order=order,
+            limit=limit,
+            offset=offset,
+        )
 
     if batch_size:
         counter = 1
@@ -177,29 +377,74 @@ def export_json(
                     number=counter,
                 )
             else:
-                write_json(data=chunk, path=filepath)
+                with phase(Phase.WRITE):
+                    written = write_json(data=chunk, path=filepath, compact=compact)
+                if written:
+                    count("files_written")
+                    count("bytes_written", written)
+            count("conversations", len(chunk))
             counter += 1
 
         raise typer.Exit(0)
 
     # Single file
-    for i, conv in enumerate(conv_sorted, start=1):
-        filepath = get_filepath(
-            conv=conv,
-            output_dir=output_dir,
-            number=i,
-            with_date_prefix=prefix_with_date if prefix_with_date else False,
-        )
-        if dry_run:
-            write_console(console=console, data=conv, path=filepath)
-        else:
-            write_json(data=conv, path=filepath)
+    # Indented output keeps manifests written before --compact existed
+    manifest = Manifest.load(output_dir, "json", {"compact": True} if compact else None)
+    exported = unchanged = 0
+
+    def changed() -> Iterator[Tuple[dict, str, Tuple[str, Optional[str], Any, str]]]:
+        nonlocal unchanged
+        for i, conv in enumerate(conv_sorted, start=offset + 1):
+            data = conv.to_dict()
+            c_id = conversation_id(data)
+            update_time = data.get("update_time")
+            # Hashing serializes the whole conversation: only pay for it when it's compared
+            digest = content_hash(data) if incremental else ""
+            if manifest.is_current(c_id, update_time, digest) and incremental:
+                unchanged += 1
+                continue
+            filepath = get_filepath(
+                conv=data,
+                output_dir=output_dir,
+                number=i,
+                with_date_prefix=prefix_with_date if prefix_with_date else False,
+            )
+            if incremental:
+                filepath = os.path.join(
+                    output_dir, manifest.assign(c_id, os.path.basename(filepath))
+                )
+            yield data, filepath, (filepath, c_id, update_time, digest)
 
     if dry_run:
-        write_console(console=console, data=conv, path=filepath)
+        for data, filepath, _ in changed():
+            write_console(console=console, data=data, path=filepath)
+            count("conversations")
+            exported += 1
     else:
-        write_json(data=conv, path=filepath)
-        console.print(f"✅ Exported to {filepath}")
+        # Every file goes to output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        for written, (filepath, c_id, update_time, digest) in write_files(
+            changed(), jobs=jobs, compact=compact
+        ):
+            if written:
+                count("files_written")
+                count("bytes_written", written)
+                manifest.record(c_id, update_time, digest, os.path.basename(filepath))
+            count("conversations")
+            exported += 1
+
+    removed = manifest.prune(dry_run=dry_run) if prune else []
+    if dry_run:
+        for path in removed:
+            console.print(f"[yellow]Would remove: [bold]\"{path}\"[/bold][/yellow]")
+        raise typer.Exit(0)
+
+    manifest.save()
+    console.print(f"✅ Exported {exported} conversation(s) to {output_dir}")
+    if incremental:
+        console.print(f"- Unchanged: {unchanged}")
+    if prune:
+        console.print(f"- Removed: {len(removed)}")
 
 
 def main():
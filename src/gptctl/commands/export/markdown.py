@@ -1,14 +1,24 @@
+from collections import deque
+from itertools import chain
 import os
+import shutil
+import tempfile
+import time
 import typer
-from typing import Annotated, List, Optional
-import json
+from typing import Annotated, Any, Deque, Dict, Iterable, List, Optional, Tuple
 from rich.console import Console
+from rich.table import Table
 
-from gptctl.definitions import SortFields, SortOrder
+from gptctl.definitions import ExecutorKind, MatchMode, Phase, SortFields, SortOrder
+from gptctl.utils.instrument import count, iterate, phase
+from gptctl.utils.cache import iter_selected
+from gptctl.utils.lookup import conversation_id
+from gptctl.utils.manifest import Manifest, content_hash
+from gptctl.utils.parallel import imap_ordered, make_executor, worker_name
 from gptctl.utils.utils import (
-    collect_conv,
     format_timestamp,
     conversation_to_md,
+    iter_conv,
     make_filename,
     md_anchor,
     sort_conv,
@@ -22,6 +32,111 @@ app = typer.Typer(
 )
 
 
+def render_conversation(
+    conv: dict,
+    anchor: str,
+    filepath: str,
+    keep_content: bool = False,
+    active_branch: bool = True,
+) -> Tuple[str, str, float, int]:
+    """Render one conversation to markdown and write it to *filepath*, if given.
+
+    Runs in pool workers, so it only gets plain picklable arguments.
+
+    Returns:
+        Tuple[str, str, float, int]: the markdown if *keep_content* (else ""),
+        the worker name, the seconds spent and the bytes written
+    """
+    started = time.perf_counter()
+    with phase(Phase.RENDER):
+        _, md_content = conversation_to_md(
+            conv, anchor=anchor, active_branch=active_branch
+        )
+    written = 0
+    if filepath:
+        with phase(Phase.WRITE), open(
+            filepath, "w", encoding="utf-8", newline="\n"
+        ) as md:
+            md.write(md_content)
+            written = md.tell()
+    return (
+        md_content if keep_content else "",
+        worker_name(),
+        time.perf_counter() - started,
+        written,
+    )
+
+
+def render_task(task: Tuple[dict, str, str, bool, bool]) -> Tuple[str, str, float, int]:
+    return render_conversation(*task)
+
+
+class CombinedMarkdownWriter:
+    """Write the combined markdown file with bounded memory.
+
+    Conversations are streamed to a temporary file next to *path* as soon as
+    they are rendered; only the short TOC lines are kept in memory. On
+    `close` the TOC is written to *path* followed by the streamed content.
+    """
+
+    def __init__(self, path: str, heading: str):
+        self.path = path
+        self.toc_lines: List[str] = [heading]
+        dirname = os.path.dirname(path) or "."
+        os.makedirs(dirname, exist_ok=True)
+        self._body = tempfile.NamedTemporaryFile(
+            "w+",
+            encoding="utf-8",
+            newline="\n",
+            dir=dirname,
+            prefix=".",
+            suffix=".part",
+            delete=False,
+        )
+        self._empty = True
+
+    def add_toc(self, line: str) -> None:
+        self.toc_lines.append(line)
+
+    def write(self, md_content: str) -> None:
+        if not self._empty:
+            self._body.write("\n")
+        self._body.write(md_content)
+        self._body.write("\n")
+        self._body.write("\n---\n")
+        self._empty = False
+
+    def close(self) -> None:
+        try:
+            with open(self.path, "w", encoding="utf-8", newline="\n") as big:
+                big.write("\n".join(self.toc_lines) + "\n\n")
+                self._body.seek(0)
+                shutil.copyfileobj(self._body, big, 1 << 20)
+                count("files_written")
+                count("bytes_written", big.tell())
+        finally:
+            self.discard()
+
+    def discard(self) -> None:
+        self._body.close()
+        try:
+            os.remove(self._body.name)
+        except FileNotFoundError:
+            pass
+
+
+def create_workers_table(stats: Dict[str, List[float]]) -> Table:
+    table = Table(title="Workers throughput")
+    table.add_column("Worker")
+    table.add_column("Conversations", justify="right")
+    table.add_column("Busy, s", justify="right")
+    table.add_column("Conversations/s", justify="right")
+    for worker, (count, seconds) in sorted(stats.items()):
+        rate = f"{count / seconds:.1f}" if seconds else "-"
+        table.add_row(worker, str(int(count)), f"{seconds:.2f}", rate)
+    return table
+
+
 @app.command(name="markdown")
 def export_markdown(
     ctx: typer.Context,
@@ -33,6 +148,22 @@ def export_markdown(
             help="**Title** of the conversation to export. May be used multiple times. Use asterisk('*') to export all titles",
         ),
     ] = None,
+    conv_id: Annotated[
+        Optional[List[str]],
+        typer.Option(
+            "--id",
+            help="**Id** of the conversation to export. May be used multiple times.",
+        ),
+    ] = None,
+    match: Annotated[
+        MatchMode,
+        typer.Option(
+            "--match",
+            "-m",
+            case_sensitive=False,
+            help="How **titles** are matched: exactly, case-insensitively or by title prefix. Every conversation with a matching title is exported.",
+        ),
+    ] = MatchMode.EXACT,
     combined: Annotated[
         bool,
         typer.Option(
@@ -64,11 +195,67 @@ def export_markdown(
         SortOrder,
         typer.Option("--order", "-o", case_sensitive=False, help="Sort order"),
     ] = SortOrder.DESC,
+    limit: Annotated[
+        Optional[int],
+        typer.Option(
+            "--limit",
+            "-n",
+            min=0,
+            help="Only the first ***limit*** conversations, after sorting",
+        ),
+    ] = None,
+    offset: Annotated[
+        int,
+        typer.Option(
+            "--offset", min=0, help="Skip the first ***offset*** conversations, after sorting"
+        ),
+    ] = 0,
     skip_system: Annotated[
         bool,
         typer.Option("--skip-system / --no-skip-system", help="Skip system messages"),
     ] = True,
-
+    active_branch: Annotated[
+        bool,
+        typer.Option(
+            "--active-branch / --all-branches",
+            help="Render only the messages shown in ChatGPT (the path to the current message), or every edited/regenerated branch too",
+        ),
+    ] = True,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=0,
+            help="Render and write conversations with ***jobs*** workers. 0 means all CPUs.",
+            rich_help_panel="Performance Options",
+        ),
+    ] = 1,
+    executor: Annotated[
+        ExecutorKind,
+        typer.Option(
+            "--executor",
+            case_sensitive=False,
+            help="Worker pool type used with ***--jobs***",
+            rich_help_panel="Performance Options",
+        ),
+    ] = ExecutorKind.PROCESS,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            "--incremental",
+            help="Only render and write conversations that are new or changed since the last export to ***output-dir***. With ***--combined*** all conversations are still rendered for the combined file.",
+            rich_help_panel="Incremental Options",
+        ),
+    ] = False,
+    prune: Annotated[
+        bool,
+        typer.Option(
+            "--prune",
+            help="Remove files of conversations that are no longer in the input file. Requires exporting all titles ('*') without --limit/--offset",
+            rich_help_panel="Incremental Options",
+        ),
+    ] = False,
 ):
     """Export one or ___more___ (in a batch) conversations to a ___markdown (\\*.md)___ file(s). :rocket:
 
@@ -82,78 +269,155 @@ def export_markdown(
 
     $ gptctl --input ./data/conversations.json --output-dir ./data/conversations-md --output ./data/conversations-all.md .data/conversations-md/ -t * --sort created --order asc --combined --prefix-with-date
 
+    # Nightly: only re-render new/changed conversations, remove deleted ones
+    $ gptctl --output-dir ./data/conversations-md export markdown -t "*" --incremental --prune
+
     ```
     """
     cfg = ctx.obj["config"]
-    input_file = cfg["input_file"]
+    input_files = cfg["input_files"]
     output_file = cfg["output_file"]
     output_dir = cfg["output_dir"]
     console: Console = ctx.obj["console"]
 
-    if not title:
+    if not title and not conv_id:
         console.print(f"No title(s) provided (raw input = {title})")
         raise typer.Abort()
 
     os.makedirs(output_dir, exist_ok=True)
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        conversations = json.load(f)
-
-        titles = []
-    if len(title) and title[0] == "*":
+    titles = []
+    if title and title[0] == "*":
         titles = []
     else:
-        titles = title
+        titles = title or []
 
-    conv_objs = collect_conv(
-        conversations=conversations,
-        titles=titles,
-        skip_system=skip_system,
-        console=console,
+    if prune and (titles or conv_id or limit is not None or offset):
+        console.print("--prune requires exporting all titles ('*'), without --limit/--offset")
+        raise typer.Abort()
+
+    conv_iter = iterate(
+        Phase.COLLECT,
+        iter_conv(
+            conversations=iterate(
+                Phase.LOAD,
+                iter_selected(
+                    input_files, titles=titles, ids=conv_id or [], match=match, console=console
+                ),
+            ),
+            skip_system=skip_system,
+            console=console,
+        ),
     )
-    if not len(conv_objs):
+    first = next(conv_iter, None)
+    if first is None:
         console.print(f"No title(s) found (raw input = {title})")
         raise typer.Abort()
 
-    conv_sorted = sort_conv(data=conv_objs, sort=sort, order=order)
+    # Unsorted exports stream conversations straight from the input file
+    with phase(Phase.SORT):
+        conv_sorted = sort_conv(
+            data=chain([first], conv_iter),
+            sort=sort,
+            order=order,
+            limit=limit,
+            offset=offset,
+        )
+    exported = unchanged = 0
+    manifest = Manifest.load(output_dir, "md", {"active_branch": active_branch})
 
-    combined_lines: List[str] = []
     chronological = " (Chronological)" if sort == SortFields.CREATED else ""
-    toc_lines: List[str] = [f"# Table of Contents{chronological}\n"]
+    toc_heading = f"# Table of Contents{chronological}\n"
+    writer = CombinedMarkdownWriter(output_file, toc_heading) if combined else None
+    # Manifest entries of the tasks in flight, recorded once their file is written
+    records: Deque[Optional[Tuple[Optional[str], Any, str, str]]] = deque()
 
-    for i, conversation in enumerate(conv_sorted, start=1):
-        conv = conversation.get("conversation", {})
-        c_title = conv.get("title") or conv.get("name") or f"Untitled-{i}"
-        created = conv.get("create_time") or conv.get("created") or ""
-        filename = make_filename(c_title, created, i)
-        filepath = os.path.join(output_dir, filename)
+    def tasks() -> Iterable[Tuple[dict, str, str, bool, bool]]:
+        # File names, anchors and TOC entries are assigned here, in sort
+        # order, so the output doesn't depend on which worker finishes first.
+        nonlocal exported, unchanged
+        for i, conversation in enumerate(conv_sorted, start=offset + 1):
+            conv = conversation.get("conversation", {})
+            c_title = conv.get("title") or conv.get("name") or f"Untitled-{i}"
+            created = conv.get("create_time") or conv.get("created") or ""
+            c_id = conversation_id(conv)
+            update_time = conv.get("update_time")
+            # Hashing serializes the whole conversation: only pay for it when it's compared
+            digest = content_hash(conv) if incremental else ""
+            if manifest.is_current(c_id, update_time, digest) and incremental:
+                unchanged += 1
+                if not combined:
+                    continue
+                # Rendered for the combined file only
+                filepath = ""
+                records.append(None)
+            else:
+                exported += 1
+                filename = make_filename(c_title, created, i)
+                if incremental:
+                    filename = manifest.assign(c_id, filename)
+                records.append((c_id, update_time, digest, filename))
+                filepath = os.path.join(output_dir, filename)
 
-        anchor = f"{md_anchor(c_title)}-{i}"
-        _, md_content = conversation_to_md(conv, anchor=anchor)
+            anchor = f"{md_anchor(c_title)}-{i}"
 
-        # Export individual file
-        with open(filepath, "w", encoding="utf-8", newline="\n") as md:
-            md.write(md_content)
+            # TOC entry (internal anchor)
+            date_str = format_timestamp(created) if created else "Unknown date"
+            if writer is not None:
+                writer.add_toc(f"- {date_str} — [{c_title}](#{anchor})")
+            yield conv, anchor, filepath, combined, active_branch
 
-        # TOC entry (internal anchor)
-        date_str = format_timestamp(created) if created else "Unknown date"
-        toc_lines.append(f"- {date_str} — [{title}](#{anchor})")
+    if jobs == 1:
+        results = map(render_task, tasks())
+        pool = None
+    else:
+        pool = make_executor(jobs, executor)
+        # Waiting for the workers is rendering time
+        results = iterate(Phase.RENDER, imap_ordered(pool, render_task, tasks()))
 
-        if combined:
-            # Add content to combined file
-            combined_lines.append(md_content)
-            combined_lines.append("\n---\n")
+    worker_stats: Dict[str, List[float]] = {}
+    try:
+        for md_content, worker, seconds, written in results:
+            stats = worker_stats.setdefault(worker, [0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            count("conversations")
+            record = records.popleft()
+            if record is not None:
+                manifest.record(*record)
+            if written:
+                count("files_written")
+                count("bytes_written", written)
+            if writer is not None:
+                # Add content to combined file
+                with phase(Phase.WRITE):
+                    writer.write(md_content)
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+    else:
+        if writer is not None:
+            # Write combined Markdown file
+            with phase(Phase.WRITE):
+                writer.close()
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
-    if combined:
-        # Write combined Markdown file
-        with open(output_file, "w", encoding="utf-8", newline="\n") as big:
-            big.write("\n".join(toc_lines) + "\n\n")
-            big.write("\n".join(combined_lines))
+    removed = manifest.prune() if prune else []
+    manifest.save()
 
-    console.print(f"✅ Exported {len(conv_sorted)} conversation(s).")
+    console.print(f"✅ Exported {exported} conversation(s).")
     console.print(f"- Individual files: {output_dir}/")
+    if incremental:
+        console.print(f"- Unchanged: {unchanged}")
+    if prune:
+        console.print(f"- Removed: {len(removed)}")
     if combined:
         console.print(f"- Combined Markdown with TOC: {output_file}")
+    if jobs != 1 or ctx.obj.get("verbose", 0) >= 1:
+        console.print(create_workers_table(worker_stats))
 
 
 def main():
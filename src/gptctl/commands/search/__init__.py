@@ -0,0 +1,18 @@
+from gptctl.commands import LazyTyperGroup
+
+
+class SearchGroup(LazyTyperGroup):
+    lazy_commands = {
+        "index": (
+            "gptctl.commands.search.index",
+            "Build a searchable SQLite catalog from the ***input OPTION*** conversations.json file. :mag:",
+        ),
+        "search": (
+            "gptctl.commands.search.search",
+            "Full-text search in the conversations catalog built by ***gptctl index***. :mag:",
+        ),
+        "grep": (
+            "gptctl.commands.search.grep",
+            "Search the ***input*** conversations.json file with a regular expression, without building an index. :mag:",
+        ),
+    }
@@ -0,0 +1,106 @@
+import re
+from typing import Annotated, Optional
+import typer
+from rich.console import Console
+from rich.markup import escape
+
+from gptctl.utils.grep import grep_files
+
+app = typer.Typer()
+
+
+@app.command("grep")
+def grep_conversations(
+    ctx: typer.Context,
+    pattern: Annotated[str, typer.Argument(help="Regular expression to search for")],
+    ignore_case: Annotated[
+        bool, typer.Option("--ignore-case", "-i", help="Case insensitive matching")
+    ] = False,
+    role: Annotated[
+        Optional[str],
+        typer.Option("--role", "-r", help="Only messages of this role, e.g. user or assistant"),
+    ] = None,
+    context: Annotated[
+        int,
+        typer.Option("--context", "-C", help="Number of characters shown around each match"),
+    ] = 40,
+    titles_only: Annotated[
+        bool,
+        typer.Option("--titles-only", "-l", help="Only print titles of matching conversations"),
+    ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=0, help="Number of worker processes. 0 means all CPUs."),
+    ] = 0,
+):
+    """
+    Search the ***input*** conversations.json file with a regular expression, without building an index. :mag:
+
+    The file is memory-mapped and split at conversation boundaries across ***jobs*** worker processes.
+
+    Example Usage:
+
+    ```bash
+    $ gptctl --input ./data/conversations.json grep -i "json\\s+schema" --role user
+    ```
+    """
+    cfg = ctx.obj["config"]
+    input_files = cfg["input_files"]
+    console: Console = ctx.obj["console"]
+
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        console.print(f"[red]Invalid pattern '{escape(pattern)}': {e}[/red]")
+        raise typer.Exit(2)
+
+    found = 0
+    seen = set()
+    try:
+        for m in grep_files(
+            input_files,
+            pattern,
+            ignore_case=ignore_case,
+            context=max(0, context),
+            role=role,
+            jobs=jobs,
+        ):
+            key = (m["conversation_id"], m["title"])
+            if titles_only:
+                if key not in seen:
+                    seen.add(key)
+                    console.print(escape(m["title"]), highlight=False)
+                continue
+            found += 1
+            seen.add(key)
+            snippet = (
+                escape(m["before"])
+                + "[bold yellow]"
+                + escape(m["match"])
+                + "[/bold yellow]"
+                + escape(m["after"])
+            ).replace("\n", " ")
+            console.print(
+                f"[bold]{escape(m['title'])}[/bold] [dim]{m['message_id']}[/dim] "
+                f"[green]{m['role']}[/green]: …{snippet}…",
+                highlight=False,
+            )
+    except FileNotFoundError as e:
+        console.print(f"[red]File or directory {e.filename} is not found[/red]")
+        raise typer.Exit(1)
+    except ValueError as e:
+        console.print(f"[red]Can't read {', '.join(input_files)}: {e}[/red]")
+        raise typer.Exit(1)
+
+    if not titles_only:
+        console.print(f"Found {found} match(es) in {len(seen)} conversation(s).")
+    if not seen:
+        raise typer.Exit(1)
+
+
+def main():
+    app()
+
+
+if __name__ == "__main__":
+    main()
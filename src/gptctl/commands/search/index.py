@@ -0,0 +1,78 @@
+from typing import Annotated, Optional
+import typer
+from rich.console import Console
+
+from gptctl.utils.cache import iter_selected, source_key
+from gptctl.utils.catalog import build_catalog, catalog_source, fts5_available
+
+app = typer.Typer()
+
+
+@app.command(
+    "index",
+    help="Build a searchable SQLite catalog from the ***input OPTION*** conversations.json file. :mag:",
+)
+def index_conversations(
+    ctx: typer.Context,
+    db: Annotated[
+        Optional[str],
+        typer.Option(
+            "--db",
+            help="Path to the catalog database. Defaults to ***catalog_file*** from the configuration.",
+        ),
+    ] = None,
+    force: Annotated[
+        bool,
+        typer.Option("--force", help="Rebuild even if the input file didn't change."),
+    ] = False,
+):
+    """
+    Build a searchable SQLite catalog (conversations, messages and a full-text index) from the ***input*** file. :mag:
+
+    Example Usage:
+
+    ```bash
+    $ gptctl --input ./data/conversations.json index
+    $ gptctl search "json schema" --role user
+    ```
+    """
+    cfg = ctx.obj["config"]
+    input_files = cfg["input_files"]
+    db_path = db or cfg["catalog_file"]
+    dry_run = ctx.obj.get("dry_run", False)
+    console: Console = ctx.obj["console"]
+
+    if not fts5_available():
+        console.print("[red]Your Python's sqlite3 is built without FTS5 support[/red]")
+        raise typer.Exit(1)
+
+    try:
+        sources = [source_key(f) for f in input_files]
+        # A single export keeps the key format of existing catalogs
+        source = sources[0] if len(sources) == 1 else sources
+    except FileNotFoundError as e:
+        console.print(f"[red]File or directory {e.filename} is not found[/red]")
+        raise typer.Exit(1)
+
+    if not force and catalog_source(db_path) == source:
+        console.print(f"Catalog [bold]{db_path}[/bold] is up to date.")
+        return
+
+    if dry_run:
+        console.print(
+            f"[yellow]Would index [bold]{', '.join(input_files)}[/bold] into [bold]{db_path}[/bold][/yellow]"
+        )
+        return
+
+    n_conv, n_msg = build_catalog(db_path, iter_selected(input_files), source)
+    console.print(
+        f"✅ Indexed {n_conv} conversation(s), {n_msg} message(s) into {db_path}"
+    )
+
+
+def main():
+    app()
+
+
+if __name__ == "__main__":
+    main()
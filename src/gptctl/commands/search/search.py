@@ -0,0 +1,119 @@
+from datetime import datetime
+from typing import Annotated, Optional
+import typer
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from gptctl.utils.catalog import CatalogError, connect, search, to_fts_query
+from gptctl.utils.utils import format_timestamp
+
+app = typer.Typer()
+
+# Control characters can't occur in rendered messages, so they are safe
+# highlight markers to swap for rich markup after escaping the snippet.
+HL_START, HL_END = "\x02", "\x03"
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"]
+
+
+@app.command(
+    "search",
+    help="Full-text search in the conversations catalog built by ***gptctl index***. :mag:",
+)
+def search_conversations(
+    ctx: typer.Context,
+    query: Annotated[str, typer.Argument(help="Words to search for")],
+    role: Annotated[
+        Optional[str],
+        typer.Option("--role", "-r", help="Only messages of this role, e.g. user or assistant"),
+    ] = None,
+    since: Annotated[
+        Optional[datetime],
+        typer.Option("--since", formats=DATE_FORMATS, help="Only messages created on/after this date"),
+    ] = None,
+    until: Annotated[
+        Optional[datetime],
+        typer.Option("--until", formats=DATE_FORMATS, help="Only messages created before this date"),
+    ] = None,
+    limit: Annotated[
+        int, typer.Option("--limit", "-n", help="Maximum number of results")
+    ] = 20,
+    fts: Annotated[
+        bool,
+        typer.Option(
+            "--fts",
+            help="Treat ***QUERY*** as raw SQLite FTS5 syntax (phrases, OR, NOT, prefix*)",
+        ),
+    ] = False,
+    db: Annotated[
+        Optional[str],
+        typer.Option(
+            "--db",
+            help="Path to the catalog database. Defaults to ***catalog_file*** from the configuration.",
+        ),
+    ] = None,
+):
+    cfg = ctx.obj["config"]
+    db_path = db or cfg["catalog_file"]
+    line_len = cfg["truncate_len"]
+    console: Console = ctx.obj["console"]
+
+    match = query if fts else to_fts_query(query)
+    if not match:
+        console.print(f"[red]Nothing to search for in '{query}'[/red]")
+        raise typer.Exit(1)
+
+    try:
+        conn = connect(db_path)
+    except CatalogError:
+        console.print(
+            f"[red]Catalog [bold]{db_path}[/bold] not found. Run [bold]gptctl index[/bold] first.[/red]"
+        )
+        raise typer.Exit(1)
+
+    try:
+        rows = search(
+            conn,
+            match,
+            role=role,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            limit=limit,
+            snippet_tokens=max(4, min(64, line_len // 8)),
+            highlight=(HL_START, HL_END),
+        )
+    except CatalogError as e:
+        console.print(f"[red]Search failed: {e}[/red]")
+        raise typer.Exit(1)
+    finally:
+        conn.close()
+
+    table = Table(title=f"Search: [bold green]{escape(query)}[/bold green]")
+    table.add_column("#", justify="center")
+    table.add_column("Conversation")
+    table.add_column("Role")
+    table.add_column("Created")
+    table.add_column("Snippet")
+    for i, row in enumerate(rows, start=1):
+        snippet = (
+            escape(row["snippet"].replace("\n", " "))
+            .replace(HL_START, "[bold yellow]")
+            .replace(HL_END, "[/bold yellow]")
+        )
+        table.add_row(
+            str(i),
+            escape(row["title"]),
+            row["role"],
+            format_timestamp(row["create_time"]),
+            snippet,
+        )
+    console.print(table)
+    console.print(f"Found {len(rows)} message(s).")
+
+
+def main():
+    app()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from gptctl.commands import LazyTyperGroup
+
+
+class ServeGroup(LazyTyperGroup):
+    lazy_commands = {
+        "serve": (
+            "gptctl.commands.serve.serve",
+            "Keep the ***input*** archive loaded and answer list/show/search/export queries locally. :rocket:",
+        ),
+        "query": (
+            "gptctl.commands.serve.query",
+            "Query a running ***gptctl serve***. :rocket:",
+        ),
+    }
@@ -0,0 +1,83 @@
+import json
+from typing import Annotated, List, Optional
+import typer
+from rich.console import Console
+from rich.markup import escape
+
+from gptctl.utils.server import DEFAULT_HOST, DEFAULT_PORT, query
+
+app = typer.Typer()
+
+
+@app.command("query")
+def query_server(
+    ctx: typer.Context,
+    endpoint: Annotated[
+        str,
+        typer.Argument(help="Endpoint: health, list, show, export or search"),
+    ],
+    params: Annotated[
+        Optional[List[str]],
+        typer.Argument(help="Query parameters as ***key=value***, e.g. id=... sort=created limit=10"),
+    ] = None,
+    host: Annotated[
+        str, typer.Option("--host", help="Address of the server")
+    ] = DEFAULT_HOST,
+    port: Annotated[
+        int, typer.Option("--port", "-p", min=0, help="HTTP port of the server")
+    ] = DEFAULT_PORT,
+    socket_path: Annotated[
+        Optional[str],
+        typer.Option("--socket", "-s", help="Unix socket of the server instead of ***host***:***port***"),
+    ] = None,
+):
+    """
+    Query a running ***gptctl serve***. :rocket:
+
+    JSON answers are printed indented, markdown (***format=markdown***) as plain text.
+
+    Example Usage:
+
+    ```bash
+    $ gptctl query list sort=created limit=10
+    $ gptctl query show "title=My Chat" format=markdown
+    $ gptctl query search "q=binary search" limit=5
+    ```
+    """
+    console: Console = ctx.obj["console"]
+    pairs = []
+    for param in params or []:
+        key, sep, value = param.partition("=")
+        if not sep or not key:
+            raise typer.BadParameter(f"Expected key=value, got '{param}'", param_hint="'PARAMS'")
+        pairs.append((key, value))
+
+    try:
+        status, content_type, body = query(
+            endpoint, pairs, host=host, port=port, socket_path=socket_path
+        )
+    except OSError as e:
+        console.print(
+            f"[red]Can't reach gptctl serve on {socket_path or f'{host}:{port}'}: {e}[/red]"
+        )
+        raise typer.Exit(1)
+
+    if status != 200:
+        try:
+            error = json.loads(body)["error"]
+        except (ValueError, KeyError, TypeError):
+            error = body
+        console.print(f"[red]{escape(str(error))}[/red]")
+        raise typer.Exit(1)
+    # Plain output, so it can be piped
+    if content_type.startswith("application/json"):
+        body = json.dumps(json.loads(body), ensure_ascii=False, indent=2)
+    typer.echo(body)
+
+
+def main():
+    app()
+
+
+if __name__ == "__main__":
+    main()
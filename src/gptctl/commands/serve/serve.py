@@ -0,0 +1,124 @@
+import errno
+import os
+import stat
+from typing import Annotated, Optional
+import typer
+from rich.console import Console
+
+from gptctl.definitions import Phase
+from gptctl.utils.instrument import count, phase
+from gptctl.utils.server import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    Archive,
+    ArchiveHTTPServer,
+    ArchiveUnixServer,
+)
+
+app = typer.Typer()
+
+
+def _is_socket(path: str) -> bool:
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+@app.command("serve")
+def serve(
+    ctx: typer.Context,
+    host: Annotated[
+        str, typer.Option("--host", help="Address to listen on")
+    ] = DEFAULT_HOST,
+    port: Annotated[
+        int, typer.Option("--port", "-p", min=0, help="HTTP port to listen on")
+    ] = DEFAULT_PORT,
+    socket_path: Annotated[
+        Optional[str],
+        typer.Option(
+            "--socket",
+            "-s",
+            help="Listen on this Unix socket instead of ***host***:***port***",
+        ),
+    ] = None,
+    cache_size: Annotated[
+        int,
+        typer.Option(
+            "--cache-size",
+            min=0,
+            help="Number of rendered markdown conversations kept in memory",
+        ),
+    ] = 256,
+):
+    """
+    Keep the ***input*** archive loaded and answer list/show/search/export queries locally. :rocket:
+
+    The listing records and an id/title index are built once (from the metadata cache when it is fresh); conversations are read from their byte spans on request and rendered markdown is cached. The archive is reloaded when an input file changes. Search uses the catalog built by ***gptctl index***.
+
+    Endpoints (GET, JSON unless ***format=markdown***): /health, /list, /show, /export, /search. Use ***gptctl query*** or any HTTP client.
+
+    Example Usage:
+
+    ```bash
+    $ gptctl serve --port 8765
+    $ curl 'http://127.0.0.1:8765/list?sort=created&limit=10'
+    $ gptctl serve --socket /tmp/gptctl.sock
+    ```
+    """
+    cfg = ctx.obj["config"]
+    input_files = cfg["input_files"]
+    console: Console = ctx.obj["console"]
+
+    try:
+        with phase(Phase.COLLECT):
+            archive = Archive(
+                input_files,
+                catalog_file=cfg["catalog_file"],
+                cache_size=cache_size,
+            )
+    except FileNotFoundError as e:
+        console.print(f"[red]File or directory {e.filename} is not found[/red]")
+        raise typer.Exit(1)
+    except ValueError as e:
+        console.print(f"[red]Can't read {', '.join(input_files)}: {e}[/red]")
+        raise typer.Exit(1)
+    count("conversations", len(archive.records))
+
+    try:
+        if socket_path:
+            if os.path.exists(socket_path):
+                # Only a stale socket is replaced, never a file that happens to be there
+                if not _is_socket(socket_path):
+                    raise FileExistsError(errno.EEXIST, "Not a socket", socket_path)
+                os.unlink(socket_path)
+            server = ArchiveUnixServer(socket_path, archive)
+            address = socket_path
+        else:
+            server = ArchiveHTTPServer((host, port), archive)
+            address = "http://%s:%d" % server.server_address[:2]
+    except OSError as e:
+        console.print(f"[red]Can't listen on {socket_path or f'{host}:{port}'}: {e}[/red]")
+        archive.close()
+        raise typer.Exit(1)
+
+    console.print(
+        f"Serving {len(archive.records)} conversation(s) on [bold]{address}[/bold]. Press Ctrl+C to stop."
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        archive.close()
+        if socket_path and _is_socket(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    app()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
-import typer
-from .list import app as list_app
-from .show import app as show_app
+from gptctl.commands import LazyTyperGroup
 
-app = typer.Typer(
-    help="See individual command --help for details", no_args_is_help=True
-)
-app.add_typer(list_app)
-app.add_typer(show_app)
+
+class ViewGroup(LazyTyperGroup):
+    lazy_commands = {
+        "list": (
+            "gptctl.commands.view.list",
+            "List conversations from the ***input OPTION*** conversations.json file. :sparkles:",
+        ),
+        "show": (
+            "gptctl.commands.view.show",
+            "Show conversation details from the ***input OPTION*** conversations.json file. :sparkles:",
+        ),
+    }
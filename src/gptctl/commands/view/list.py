@@ -1,11 +1,11 @@
-import json
-from typing import Annotated
+from typing import Annotated, Optional
 import typer
 from rich.console import Console
 
-from gptctl.definitions import SortFields, SortOrder
+from gptctl.definitions import Phase, SortFields, SortOrder
+from gptctl.utils.cache import cached_conv, count_records
+from gptctl.utils.instrument import count, phase
 from gptctl.utils.utils import (
-    collect_conv,
     format_timestamp,
     create_rich_table,
     sort_conv,
@@ -28,6 +28,21 @@ def list_conversations(
         SortOrder,
         typer.Option("--order", "-o", case_sensitive=False, help="Sort order"),
     ] = SortOrder.DESC,
+    limit: Annotated[
+        Optional[int],
+        typer.Option(
+            "--limit",
+            "-n",
+            min=0,
+            help="Only the first ***limit*** conversations, after sorting",
+        ),
+    ] = None,
+    offset: Annotated[
+        int,
+        typer.Option(
+            "--offset", min=0, help="Skip the first ***offset*** conversations, after sorting"
+        ),
+    ] = 0,
     skip_system: Annotated[
         bool,
         typer.Option("--skip-system / --no-skip-system", help="Skip system messages"),
@@ -40,33 +55,65 @@ def list_conversations(
             help="Show as a table. Otherwise as a comma-separated titles",
         ),
     ] = True,
+    use_cache: Annotated[
+        bool,
+        typer.Option(
+            "--cache / --no-cache",
+            help="Reuse conversations metadata cached next to the ***input*** file. The cache is rebuilt when the file changes.",
+        ),
+    ] = True,
 ):
     cfg = ctx.obj["config"]
     verbose = ctx.obj["verbose"]
-    input_file = cfg["input_file"]
+    input_files = cfg["input_files"]
+    # Merged exports: tell which one each conversation was taken from
+    show_source = len(input_files) > 1
     console: Console = ctx.obj["console"]
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        conversations = json.load(f)
-    conv_objs = collect_conv(
-        conversations=conversations, skip_system=skip_system, console=console
-    )
-    conv_sorted = sort_conv(data=conv_objs, sort=sort, order=order)
+    with phase(Phase.LOAD):
+        # Counted upfront to sort on them or to show (nearly) all of them,
+        # otherwise only the rows shown are counted
+        conv_objs = cached_conv(
+            input_file=input_files,
+            skip_system=skip_system,
+            use_cache=use_cache,
+            counts=sort == SortFields.COUNT or (show_table and limit is None),
+        )
+    count("conversations", len(conv_objs))
+    with phase(Phase.SORT):
+        conv_sorted = sort_conv(
+            data=conv_objs, sort=sort, order=order, limit=limit, offset=offset
+        )
 
     if show_table:
-        table = create_rich_table(input_file=input_file, sort=sort, order=order)
-        for i, cs in enumerate(conv_sorted, start=1):
-            msg_count = f"{cs.count} w/o system" if skip_system else f"{cs.count}"
-            table.add_row(str(i), cs.title, format_timestamp(cs.created), msg_count)
-        console.print(table)
+        conv_sorted = list(conv_sorted)
+        with phase(Phase.LOAD):
+            # Counted together and cached, so listing them again parses nothing
+            count_records(conv_sorted, use_cache=use_cache)
+        with phase(Phase.RENDER):
+            table = create_rich_table(
+                input_file=", ".join(input_files),
+                sort=sort,
+                order=order,
+                show_source=show_source,
+            )
+            for i, cs in enumerate(conv_sorted, start=offset + 1):
+                msg_count = f"{cs.count} w/o system" if skip_system else f"{cs.count}"
+                row = [str(i), cs.title, format_timestamp(cs.created), msg_count]
+                if show_source:
+                    row.append(cs.source or "")
+                table.add_row(*row)
+        with phase(Phase.WRITE):
+            console.print(table)
     else:
         separated = []
         for cs in conv_sorted:
             separated.append(cs.title)
-        console.print("Conversations:" if verbose >= 1 else "")
-        console.print("|".join(separated))
+        with phase(Phase.WRITE):
+            console.print("Conversations:" if verbose >= 1 else "")
+            console.print("|".join(separated))
 
-    console.print(f"Total conversations: {len(conversations)}" if verbose >= 1 else "")
+    console.print(f"Total conversations: {len(conv_objs)}" if verbose >= 1 else "")
 
 
 def main():
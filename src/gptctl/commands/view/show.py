@@ -1,14 +1,15 @@
-import json
-from typing import Annotated, Dict, List
+from typing import Annotated, Dict, List, Optional
 import typer
 from rich.console import Console
 from rich.table import Table
 from rich.markdown import Markdown
 
+from gptctl.definitions import MatchMode, Phase
+from gptctl.utils.instrument import count, iterate, phase
+from gptctl.utils.cache import iter_selected
 from gptctl.utils.suggestions import analyze_conversations, export_markdown
 from gptctl.utils.utils import (
     conversation_to_md,
-    find_by_title,
     truncate_string_with_ellipsis,
 )
 
@@ -37,7 +38,22 @@ def create_rich_table(
 )
 def show_conversation(
     ctx: typer.Context,
-    title: Annotated[str, typer.Argument(help="Title of the conversation to show")],
+    title: Annotated[
+        Optional[str], typer.Argument(help="Title of the conversation to show")
+    ] = None,
+    conv_id: Annotated[
+        Optional[str],
+        typer.Option("--id", help="Id of the conversation to show instead of its title"),
+    ] = None,
+    match: Annotated[
+        MatchMode,
+        typer.Option(
+            "--match",
+            "-m",
+            case_sensitive=False,
+            help="How ***TITLE*** is matched: exactly, case-insensitively or by title prefix",
+        ),
+    ] = MatchMode.EXACT,
     toc_only: Annotated[
         bool,
         typer.Option(
@@ -58,19 +74,49 @@ def show_conversation(
         bool,
         typer.Option("--skip-system / --no-skip-system", help="Skip system messages"),
     ] = True,
+    active_branch: Annotated[
+        bool,
+        typer.Option(
+            "--active-branch / --all-branches",
+            help="Show only the messages shown in ChatGPT (the path to the current message), or every edited/regenerated branch too",
+        ),
+    ] = True,
 ):
+    if title is None and conv_id is None:
+        raise typer.BadParameter("Missing argument 'TITLE' (or --id).")
     try:
         cfg = ctx.obj["config"]
-        input_file = cfg["input_file"]
+        input_files = cfg["input_files"]
         line_len = cfg["truncate_len"]
         console: Console = ctx.obj["console"]
 
-        with open(input_file, "r", encoding="utf-8") as f:
-            conversations = json.load(f)
-        conv = find_by_title(conversations, title)
+        with phase(Phase.COLLECT):
+            # Only the matching conversations are parsed, see iter_selected
+            found = list(
+                iterate(
+                    Phase.LOAD,
+                    iter_selected(
+                        input_files,
+                        titles=[title] if conv_id is None and title is not None else [],
+                        ids=[conv_id] if conv_id is not None else [],
+                        match=match,
+                    ),
+                )
+            )
+        conv = found[0] if found else None
+        count("conversations", 1 if conv is not None else 0)
+        if len(found) > 1:
+            others = ", ".join(c.get("id") or "?" for c in found)
+            console.print(
+                f"[yellow]{len(found)} conversations match '{title}', showing the first. Use --id to pick one of: {others}[/yellow]"
+            )
         if conv is not None:
+            title = conv.get("title") or title
             if toc_only:
-                md_quests, _ = conversation_to_md(conv, "", skip_system)
+                with phase(Phase.RENDER):
+                    md_quests, _ = conversation_to_md(
+                        conv, "", skip_system, active_branch=active_branch
+                    )
                 toc_table = create_rich_table(
                     title=f"{title} TOC",
                     columns={"#": "No", "Type": "❓", "Content": "", "Created": ""},
@@ -87,15 +133,19 @@ def show_conversation(
                         ),
                         md_quest["created"],
                     )
-                console.print(toc_table, markup=True)
+                with phase(Phase.WRITE):
+                    console.print(toc_table, markup=True)
             elif suggestions:
-                rows = analyze_conversations(data= [conv])
-                md_table = export_markdown(rows)
-                console.print(Markdown(md_table), markup=True)
+                with phase(Phase.RENDER):
+                    rows = analyze_conversations(data=[conv], active_branch=active_branch)
+                    md_table = export_markdown(rows)
+                with phase(Phase.WRITE):
+                    console.print(Markdown(md_table), markup=True)
             else:
-                console.print_json(data=conv)
+                with phase(Phase.WRITE):
+                    console.print_json(data=conv)
         else:
-            console.print(f"[red]{title} not found[/red]")
+            console.print(f"[red]{title if conv_id is None else conv_id} not found[/red]")
     except FileNotFoundError as e:
         console.print(f"[red]File or directory {e.filename} is not found[/red]")
     # except Exception as e:
@@ -1,10 +1,12 @@
 from dataclasses import dataclass, field, asdict
 import json
 from pathlib import Path
-from typing import Any, Optional
-from rich.console import Console
+from typing import TYPE_CHECKING, Any, Optional
 import typer
 
+if TYPE_CHECKING:
+    from rich.console import Console
+
 
 @dataclass
 class ViewFormat:
@@ -21,9 +23,10 @@ class AppConfig:
     output_file: str = "./data/messages_summary.json"
     output_dir: str = "./data/conversations"
     combined_file: str = "all_conversations.md"
+    catalog_file: str = "./data/conversations.sqlite"
     prefix_with_date: bool = True
     truncate_len: int = 120
-    console: Optional[Console] = field(
+    console: Optional["Console"] = field(
         compare=False, repr=False, default=None
     )  # class defaults: eq=True, frozen=False
 
@@ -49,6 +52,9 @@ class AppConfig:
                         combined_file=file_config.get(
                             "combined_file", cls.combined_file
                         ),
+                        catalog_file=file_config.get(
+                            "catalog_file", cls.catalog_file
+                        ),
                         prefix_with_date=file_config.get(
                             "prefix_with_date", cls.prefix_with_date
                         ),
@@ -76,12 +82,13 @@ class AppConfig:
         # 1) Start with defaults
         # eff_cfg = AppConfig()
 
-        if Path(config_path).exists():
+        if file_config and isinstance(file_config, AppConfig):
+            # Already loaded by the caller, don't read the file again
+            eff_cfg = AppConfig(**file_config.to_dict())
+        elif config_path and Path(config_path).exists():
             eff_cfg = AppConfig.load(config_path=config_path, verbosity=verbosity)
             if eff_cfg and isinstance(eff_cfg, AppConfig):
                 eff_cfg = AppConfig(**eff_cfg.to_dict())
-        elif file_config and isinstance(file_config, AppConfig):
-            eff_cfg = AppConfig(**file_config.to_dict())
         else:
             eff_cfg = AppConfig()
 
@@ -172,7 +179,7 @@ def default_config_path(app_name: str = "gptctl") -> Path:
     return default_config_path
 
 
-def check_config_exists(config: Path, console: Optional[Console] = None) -> bool:
+def check_config_exists(config: Path, console: Optional["Console"] = None) -> bool:
     if not config.exists():
         if console:
             console.print(
@@ -1,16 +1,82 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any
+from typing import Any, List, Optional
+
+# Roles hidden from transcripts when skipping system messages
+SYSTEM_ROLES = frozenset(("system", "error_reporting_system", "tool"))
 
 
 class Conversation:
+    """Listing record of a conversation: title, date and message count.
+
+    The full conversation dict is either kept in memory (*conversation*) or,
+    for records built from the metadata cache, loaded from the byte span
+    `start:end` of the *source* file when `to_dict()` is called. Such
+    records take about a hundred bytes, so 100k of them can be sorted and
+    listed without keeping the archive in memory.
+
+    A *count* of None is computed from the conversation when first read,
+    so records that are never displayed or sorted by count don't pay for
+    counting their messages.
+    """
+
+    __slots__ = (
+        "title",
+        "created",
+        "_count",
+        "skip_system",
+        "id",
+        "update_time",
+        "source",
+        "start",
+        "end",
+        "_conversation",
+    )
+
     def __init__(
-        self, title: str, created: datetime | str, count: int, conversation: dict = {}
+        self,
+        title: str,
+        created: datetime | str,
+        count: Optional[int],
+        conversation: Optional[dict] = None,
+        id: Optional[str] = None,
+        update_time: Optional[float] = None,
+        source: Optional[str] = None,
+        start: int = 0,
+        end: int = 0,
+        skip_system: bool = True,
     ):
         self.title: str = title
         self.created: datetime | str = created
-        self.count: int = count
-        self.conversation: dict = conversation
+        self._count = count
+        self.skip_system = skip_system
+        self.id = id
+        self.update_time = update_time
+        self.source = source
+        self.start = start
+        self.end = end
+        self._conversation = conversation or None
+
+    @property
+    def count(self) -> int:
+        if self._count is None:
+            from gptctl.utils.utils import thread_msg_count
+
+            self._count = thread_msg_count(self.to_dict(), skip_system=self.skip_system)
+        return self._count
+
+    @count.setter
+    def count(self, value: int) -> None:
+        self._count = value
+
+    @property
+    def counted(self) -> bool:
+        """Whether `count` is known without reading the conversation."""
+        return self._count is not None
+
+    @property
+    def conversation(self) -> dict:
+        return self.to_dict()
 
     def get(self, key: str, default: Any = "Not found"):
         try:
@@ -27,7 +93,62 @@ class Conversation:
 
     # Convert the object to a dictionary
     def to_dict(self) -> dict[Any, Any]:
-        return self.conversation
+        """The full conversation; read from *source* (and not kept) if it isn't in memory."""
+        if self._conversation is not None:
+            return self._conversation
+        if self.source and self.end > self.start:
+            from gptctl.utils.loader import load_span
+
+            return load_span(self.source, self.start, self.end)
+        return {}
+
+
+class Message:
+    """One message of a conversation, normalized from the export's various layouts.
+
+    Built once per conversation by `gptctl.utils.utils.normalize_messages`
+    and shared by counting, rendering and suggestions analysis.
+    """
+
+    __slots__ = (
+        "id",
+        "role",
+        "hidden",
+        "create_time",
+        "update_time",
+        "parent",
+        "children",
+        "parts",
+        "raw",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        role: str,
+        hidden: bool = False,
+        create_time: Optional[float] = None,
+        update_time: Optional[float] = None,
+        parent: Optional[str] = None,
+        children: Optional[List[str]] = None,
+        parts: Optional[list] = None,
+        raw: Optional[dict] = None,
+    ):
+        self.id = id
+        self.role = role
+        self.hidden = hidden
+        self.create_time = create_time
+        self.update_time = update_time
+        self.parent = parent
+        self.children = children or []
+        self.parts = parts or []
+        self.raw = raw or {}
+
+    def is_visible(self, skip_system: bool = True) -> bool:
+        return not (skip_system and (self.role in SYSTEM_ROLES or self.hidden))
+
+    def __repr__(self):
+        return f"Message(id={self.id}, role={self.role}, parts={len(self.parts)})"
 
 
 class SortFields(str, Enum):
@@ -39,4 +160,35 @@ class SortFields(str, Enum):
 
 class SortOrder(str, Enum):
     ASC = "asc"
-    DESC = "desc"
\ No newline at end of file
+    DESC = "desc"
+
+class ExecutorKind(str, Enum):
+    PROCESS = "process"
+    THREAD = "thread"
+
+
+class MatchMode(str, Enum):
+    EXACT = "exact"
+    CASEFOLD = "casefold"
+    PREFIX = "prefix"
+
+
+class Phase(str, Enum):
+    READ = "read"
+    LOAD = "load"
+    COLLECT = "collect"
+    SORT = "sort"
+    RENDER = "render"
+    WRITE = "write"
+
+
+class SuggestionKey(str, Enum):
+    PHRASE = "phrase"
+    MONTH = "month"
+    CONVERSATION = "conversation"
+
+
+class ReportFormat(str, Enum):
+    TABLE = "table"
+    CSV = "csv"
+    JSON = "json"
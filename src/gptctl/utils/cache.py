@@ -0,0 +1,392 @@
+import json
+import logging
+import os
+from pathlib import Path
+from itertools import repeat
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from rich.console import Console
+
+from gptctl.definitions import Conversation, MatchMode
+from gptctl.utils.loader import (
+    SpanReader,
+    iter_conversations,
+    iter_stream_elements,
+    open_input,
+)
+from gptctl.utils.lookup import Selector, select_conversations
+from gptctl.utils.parallel import default_jobs, make_executor
+from gptctl.utils.utils import (
+    count_user_messages,
+    get_created_date,
+    normalize_messages,
+)
+
+CACHE_VERSION = 3
+CACHE_SUFFIX = ".gptctl-cache.json"
+
+# One cached row per conversation; rows are much smaller than dicts, both
+# in the cache file and in memory
+META_COLUMNS = (
+    "id",
+    "title",
+    "create_time",
+    "update_time",
+    "created",
+    "count_skip_system",
+    "count_all",
+    "start",
+    "end",
+)
+ID, TITLE, UPDATE_TIME = (META_COLUMNS.index(c) for c in ("id", "title", "update_time"))
+COUNT_SKIP_SYSTEM, COUNT_ALL, START, END = (
+    META_COLUMNS.index(c) for c in ("count_skip_system", "count_all", "start", "end")
+)
+
+# One conversations.json file or several exports to merge
+Inputs = Union[str, Sequence[str]]
+
+logger = logging.getLogger(__name__)
+
+
+def cache_path(input_file: str) -> Path:
+    """Sidecar cache file living next to the *input_file*, e.g. `.conversations.json.gptctl-cache.json`."""
+    path = Path(input_file)
+    return path.with_name(f".{path.name}{CACHE_SUFFIX}")
+
+
+def source_key(input_file: str) -> Dict[str, Any]:
+    """Identify the exact version of *input_file* the cache was built from."""
+    st = os.stat(input_file)
+    return {
+        "path": os.path.abspath(input_file),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+def conversation_meta(
+    conv: dict, start: int = 0, end: int = 0, counts: bool = True
+) -> List[Any]:
+    """Everything `list` needs to know about a conversation, without its messages.
+
+    Returns a `META_COLUMNS` row; *start* and *end* are the byte span of the
+    conversation in the input file. Without *counts* the message counts are
+    left as None, see `fill_counts`.
+    """
+    if counts:
+        messages = normalize_messages(conv)
+        count_skip_system = count_user_messages(messages, skip_system=True)
+        count_all = count_user_messages(messages, skip_system=False)
+    else:
+        count_skip_system = count_all = None
+    return [
+        conv.get("id") or conv.get("conversation_id"),
+        conv.get("title") or conv.get("name", "Untitled"),
+        conv.get("create_time"),
+        conv.get("update_time"),
+        get_created_date(conv),
+        count_skip_system,
+        count_all,
+        start,
+        end,
+    ]
+
+
+def build_metadata(input_file: str, counts: bool = True) -> List[List[Any]]:
+    with open_input(input_file) as f:
+        return [
+            conversation_meta(conv, start, end, counts=counts)
+            for start, end, _, conv in iter_stream_elements(f)
+        ]
+
+
+def fill_counts(
+    input_file: str,
+    entries: List[List[Any]],
+    rows: Optional[Iterable[List[Any]]] = None,
+    save: bool = True,
+) -> None:
+    """Count the messages of the *rows* (all *entries* by default) of *input_file* built without counts.
+
+    Only those conversations are parsed again, from their byte spans in
+    file order. With *save* the completed entries are cached.
+    """
+    missing = sorted(
+        (row for row in (entries if rows is None else rows) if row[COUNT_ALL] is None),
+        key=lambda row: row[START],
+    )
+    if not missing:
+        return
+    reader = SpanReader(input_file)
+    try:
+        for row in missing:
+            messages = normalize_messages(reader.load(row[START], row[END]))
+            row[COUNT_SKIP_SYSTEM] = count_user_messages(messages, skip_system=True)
+            row[COUNT_ALL] = count_user_messages(messages, skip_system=False)
+    finally:
+        reader.close()
+    if save:
+        save_metadata(input_file, entries)
+
+
+def load_metadata(input_file: str) -> Optional[List[List[Any]]]:
+    """Return cached metadata for *input_file*, or None if missing or stale."""
+    path = cache_path(input_file)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(cached, dict)
+        or cached.get("version") != CACHE_VERSION
+        or cached.get("source") != source_key(input_file)
+    ):
+        return None
+    return cached.get("conversations")
+
+
+def save_metadata(input_file: str, entries: List[List[Any]]) -> bool:
+    """Atomically write the sidecar cache. Returns False if it can't be written."""
+    path = cache_path(input_file)
+    tmp = path.with_name(path.name + ".tmp")
+    payload = {
+        "version": CACHE_VERSION,
+        "source": source_key(input_file),
+        "conversations": entries,
+    }
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        return True
+    except OSError as e:
+        logger.debug(f"Metadata cache {path} not written: {e}")
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        return False
+
+
+def get_metadata(
+    input_file: str, use_cache: bool = True, counts: bool = False
+) -> List[List[Any]]:
+    """Per-conversation metadata of *input_file*, (re)building the cache when the file changed.
+
+    Message counts are only guaranteed with *counts*: otherwise they are
+    None unless an earlier call already computed them.
+    """
+    if use_cache:
+        entries = load_metadata(input_file)
+        if entries is not None:
+            if counts:
+                fill_counts(input_file, entries)
+            return entries
+    return refresh_metadata(input_file, save=use_cache, counts=counts)
+
+
+def refresh_metadata(
+    input_file: str, save: bool = True, counts: bool = False
+) -> List[List[Any]]:
+    """Build the metadata of *input_file* and, with *save*, cache it."""
+    entries = build_metadata(input_file, counts=counts)
+    if save:
+        save_metadata(input_file, entries)
+    return entries
+
+
+def get_all_metadata(
+    input_files: Sequence[str], use_cache: bool = True, counts: bool = False
+) -> List[List[List[Any]]]:
+    """`get_metadata` of every input file. Missing or stale caches of several
+    files are rebuilt concurrently, one worker process per file.
+    """
+    entries: List[Optional[List[List[Any]]]] = [
+        load_metadata(f) if use_cache else None for f in input_files
+    ]
+    missing = [i for i, rows in enumerate(entries) if rows is None]
+    if len(missing) > 1:
+        with make_executor(min(len(missing), default_jobs())) as pool:
+            built = pool.map(
+                refresh_metadata,
+                [input_files[i] for i in missing],
+                repeat(use_cache),
+                repeat(counts),
+            )
+            for i, rows in zip(missing, built):
+                entries[i] = rows
+    else:
+        for i in missing:
+            entries[i] = refresh_metadata(input_files[i], save=use_cache, counts=counts)
+    if counts:
+        for input_file, rows in zip(input_files, entries):
+            fill_counts(input_file, rows, save=use_cache)  # type: ignore[arg-type]
+    return entries  # type: ignore[return-value]
+
+
+def merged_rows(
+    input_files: Sequence[str], use_cache: bool = True, counts: bool = False
+) -> List[Tuple[str, List[Any]]]:
+    """``(input_file, row)`` of every conversation of *input_files*.
+
+    A conversation found in several files (same id) is kept once: from the
+    file with the newest `update_time`, or the first file on a tie, at the
+    position it first appeared.
+    """
+    all_rows = get_all_metadata(input_files, use_cache=use_cache, counts=counts)
+    if len(input_files) == 1:
+        return [(input_files[0], row) for row in all_rows[0]]
+    merged: Dict[Any, Tuple[str, List[Any]]] = {}
+    for input_file, rows in zip(input_files, all_rows):
+        for i, row in enumerate(rows):
+            key = row[ID] or (input_file, i)
+            kept = merged.get(key)
+            if kept is None or (row[UPDATE_TIME] or 0) > (kept[1][UPDATE_TIME] or 0):
+                merged[key] = (input_file, row)
+    return list(merged.values())
+
+
+def count_records(records: Iterable[Conversation], use_cache: bool = True) -> None:
+    """Count the messages of the span-backed *records* that don't have a count yet.
+
+    Each source file is read once, see `fill_counts`. With *use_cache* the
+    counts are added to the file's metadata cache, so the next listing of
+    the same records doesn't parse them again.
+    """
+    pending: Dict[str, List[Conversation]] = {}
+    for record in records:
+        if not record.counted and record.source:
+            pending.setdefault(record.source, []).append(record)
+    for source, source_records in pending.items():
+        entries = load_metadata(source) if use_cache else None
+        by_start = {row[START]: row for row in entries or ()}
+        rows = []
+        for record in source_records:
+            row = by_start.get(record.start)
+            if row is None:  # not cached: a row just for counting
+                row = [None] * len(META_COLUMNS)
+                row[START], row[END] = record.start, record.end
+            rows.append(row)
+        fill_counts(source, entries or rows, rows=rows, save=entries is not None)
+        for record, row in zip(source_records, rows):
+            record.count = row[COUNT_SKIP_SYSTEM if record.skip_system else COUNT_ALL]
+
+
+def as_inputs(input_files: Inputs) -> List[str]:
+    return [input_files] if isinstance(input_files, str) else list(input_files)
+
+
+def conversation_record(
+    input_file: str, row: List[Any], skip_system: bool = True
+) -> Conversation:
+    """Span-backed `Conversation` of a `META_COLUMNS` row of *input_file*.
+
+    A row without message counts makes a record that counts on first access.
+    """
+    (
+        conv_id,
+        title,
+        _,
+        update_time,
+        created,
+        count_skip_system,
+        count_all,
+        start,
+        end,
+    ) = row
+    return Conversation(
+        title=title,
+        created=created,
+        count=count_skip_system if skip_system else count_all,
+        id=conv_id,
+        update_time=update_time,
+        source=input_file,
+        start=start,
+        end=end,
+        skip_system=skip_system,
+    )
+
+
+def cached_conv(
+    input_file: Inputs,
+    skip_system: bool = True,
+    use_cache: bool = True,
+    counts: bool = False,
+) -> List[Conversation]:
+    """Same as `collect_conv` without titles, answered from the cache.
+
+    The conversations aren't kept in memory: each record loads its own
+    conversation from its `source` file on `to_dict()`. Message counts are
+    only computed upfront with *counts* (e.g. to sort on them); otherwise a
+    record missing its count parses its conversation when asked for it.
+    Several input files are merged, see `merged_rows`.
+    """
+    return [
+        conversation_record(source, row, skip_system)
+        for source, row in merged_rows(
+            as_inputs(input_file), use_cache=use_cache, counts=counts
+        )
+    ]
+
+
+def select_cached(
+    input_file: Inputs,
+    titles: Iterable[str] = (),
+    ids: Iterable[str] = (),
+    match: MatchMode = MatchMode.EXACT,
+    console: Optional[Console] = None,
+) -> List[Conversation]:
+    """`select_conversations` answered from the cache: records of the matching conversations, in request order."""
+    selector = Selector(titles=titles, ids=ids, match=match)
+    # Records are only made for matching rows
+    candidates = [
+        conversation_record(source, row)
+        for source, row in merged_rows(as_inputs(input_file))
+        if selector.matches_fields(row[ID], row[TITLE])
+    ]
+    return select_conversations(
+        candidates, titles=titles, ids=ids, match=match, console=console
+    )
+
+
+def load_records(records: Iterable[Conversation]) -> Iterator[dict]:
+    """Parse the conversations of span-backed *records*, keeping one memory map per source file open."""
+    readers: Dict[str, SpanReader] = {}
+    try:
+        for record in records:
+            reader = readers.get(record.source)  # type: ignore[arg-type]
+            if reader is None:
+                reader = readers[record.source] = SpanReader(record.source)  # type: ignore[index, arg-type]
+            yield reader.load(record.start, record.end)
+    finally:
+        for reader in readers.values():
+            reader.close()
+
+
+def iter_selected(
+    input_file: Inputs,
+    titles: Iterable[str] = (),
+    ids: Iterable[str] = (),
+    match: MatchMode = MatchMode.EXACT,
+    console: Optional[Console] = None,
+) -> Iterator[dict]:
+    """Conversations matching *titles*/*ids*, or all of them if none are given.
+
+    A selection is looked up in the metadata cache and only the selected
+    conversations are parsed, from their byte spans in a memory map of the
+    file, so picking a few conversations out of a large export is fast
+    once the cache exists. All conversations of a single file are streamed;
+    several files are merged, see `merged_rows`.
+    """
+    input_files = as_inputs(input_file)
+    titles, ids = list(titles), list(ids)
+    if titles or ids:
+        records = select_cached(input_files, titles=titles, ids=ids, match=match, console=console)
+    elif len(input_files) == 1:
+        yield from iter_conversations(input_files[0])
+        return
+    else:
+        records = cached_conv(input_files)
+    yield from load_records(records)
@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from gptctl.utils.utils import message_text, normalize_messages
+
+CATALOG_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE conversations (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    create_time REAL,
+    update_time REAL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE messages (
+    pk INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    conversation_id TEXT NOT NULL REFERENCES conversations(id),
+    parent TEXT,
+    role TEXT NOT NULL,
+    create_time REAL,
+    content TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE messages_fts USING fts5(
+    content,
+    content='messages',
+    content_rowid='pk',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+INDEXES = """
+CREATE INDEX messages_conversation ON messages(conversation_id);
+CREATE INDEX messages_role_created ON messages(role, create_time);
+"""
+
+SEARCH_SQL = """
+SELECT
+    c.id AS conversation_id,
+    c.title AS title,
+    m.id AS message_id,
+    m.role AS role,
+    m.create_time AS create_time,
+    snippet(messages_fts, 0, ?, ?, '…', ?) AS snippet,
+    bm25(messages_fts) AS score
+FROM messages_fts
+JOIN messages m ON m.pk = messages_fts.rowid
+JOIN conversations c ON c.id = m.conversation_id
+WHERE messages_fts MATCH ?{filters}
+ORDER BY score
+LIMIT ?
+"""
+
+
+class CatalogError(Exception):
+    """The catalog database is missing, outdated or can't be queried."""
+
+
+def fts5_available() -> bool:
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+def to_timestamp(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+def message_rows(conv: dict) -> Iterable[Tuple[str, Optional[str], str, Optional[float], str]]:
+    """Yield `(id, parent, role, create_time, text)` for every non-empty message of *conv*.
+
+    The text is rendered the same way as in markdown export, so what is
+    found is what is shown.
+    """
+    for message in normalize_messages(conv):
+        text = message_text(message)
+        if not text.strip():
+            continue
+        yield (
+            message.id,
+            message.parent,
+            str(message.role),
+            to_timestamp(message.create_time),
+            text,
+        )
+
+
+def build_catalog(
+    db_path: str, conversations: Iterable[dict], source: Any
+) -> Tuple[int, int]:
+    """(Re)create the catalog at *db_path* from *conversations*.
+
+    The database is built in a temporary file and atomically moved into
+    place, so a failed run never leaves a half-written catalog behind.
+
+    Returns:
+        Tuple[int, int]: number of conversations and messages indexed
+    """
+    dirname = os.path.dirname(db_path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # Throw-away file until it's moved into place: durability isn't needed
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        n_conv = n_msg = 0
+        for conv in conversations:
+            conv_id = conv.get("id") or conv.get("conversation_id") or f"#{n_conv}"
+            rows = list(message_rows(conv))
+            conn.execute(
+                "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?, ?)",
+                (
+                    conv_id,
+                    conv.get("title") or conv.get("name") or "Untitled",
+                    to_timestamp(conv.get("create_time")),
+                    to_timestamp(conv.get("update_time")),
+                    len(rows),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO messages (id, conversation_id, parent, role, create_time, content)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                ((mid, conv_id, parent, role, ts, text) for mid, parent, role, ts, text in rows),
+            )
+            n_conv += 1
+            n_msg += len(rows)
+        conn.executescript(INDEXES)
+        conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("version", str(CATALOG_VERSION)), ("source", json.dumps(source))],
+        )
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return n_conv, n_msg
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    if not os.path.exists(db_path):
+        raise CatalogError(f"Catalog {db_path} does not exist")
+    conn = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def catalog_source(db_path: str) -> Optional[Any]:
+    """Source key(s) stored at build time, or None if the catalog is missing/outdated."""
+    try:
+        conn = connect(db_path)
+    except CatalogError:
+        return None
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+    if meta.get("version") != str(CATALOG_VERSION):
+        return None
+    return json.loads(meta.get("source", "null"))
+
+
+def to_fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching all its words (implicit AND)."""
+    terms = re.findall(r"\w+", text)
+    return " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def search(
+    conn: sqlite3.Connection,
+    query: str,
+    role: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 20,
+    snippet_tokens: int = 12,
+    highlight: Tuple[str, str] = ("[", "]"),
+) -> List[sqlite3.Row]:
+    """Full-text search over message contents, best matches first (bm25).
+
+    Args:
+        conn (sqlite3.Connection): catalog connection, see `connect`
+        query (str): FTS5 MATCH expression, see `to_fts_query` for plain text
+        role (Optional[str]): only messages from this author role
+        since (Optional[float]): only messages created at/after this timestamp
+        until (Optional[float]): only messages created before this timestamp
+        limit (int): max number of results
+
+    Raises:
+        CatalogError: invalid query or unreadable catalog
+    """
+    filters = []
+    params: List[Any] = [highlight[0], highlight[1], snippet_tokens, query]
+    if role:
+        filters.append("m.role = ?")
+        params.append(role)
+    if since is not None:
+        filters.append("m.create_time >= ?")
+        params.append(since)
+    if until is not None:
+        filters.append("m.create_time < ?")
+        params.append(until)
+    params.append(limit)
+    sql = SEARCH_SQL.format(filters="".join(f"\n  AND {f}" for f in filters))
+    try:
+        return conn.execute(sql, params).fetchall()
+    except sqlite3.DatabaseError as e:
+        raise CatalogError(str(e)) from e
@@ -0,0 +1,97 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from gptctl.utils.cache import ID, merged_rows
+from gptctl.utils.parallel import map_conversations
+from gptctl.utils.suggestions import extract_text
+from gptctl.utils.utils import normalize_messages
+
+
+def grep_conversation(
+    conv: dict, regex: re.Pattern, context: int = 40, role: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Find *regex* in the text of every message of *conv*.
+
+    Returns:
+        List[Dict[str, Any]]: one row per match with conversation id/title,
+        message id/role, the match offsets and `context` characters around it
+    """
+    matches = []
+    title = conv.get("title") or conv.get("name") or "Untitled"
+    conv_id = conv.get("id") or conv.get("conversation_id") or ""
+    for msg in normalize_messages(conv):
+        if role and msg.role != role:
+            continue
+        text = extract_text(msg.raw)
+        if not text:
+            continue
+        for m in regex.finditer(text):
+            start = max(0, m.start() - context)
+            end = min(len(text), m.end() + context)
+            matches.append(
+                {
+                    "conversation_id": conv_id,
+                    "title": title,
+                    "message_id": msg.id,
+                    "role": msg.role,
+                    "before": text[start : m.start()],
+                    "match": m.group(0),
+                    "after": text[m.end() : end],
+                }
+            )
+    return matches
+
+
+def grep_conversations(
+    conversations: List[dict],
+    regex: re.Pattern,
+    context: int = 40,
+    role: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Worker task: `grep_conversation` over a batch of conversations."""
+    matches: List[Dict[str, Any]] = []
+    for conv in conversations:
+        matches.extend(grep_conversation(conv, regex, context, role))
+    return matches
+
+
+def grep_file(
+    path: str,
+    pattern: str,
+    ignore_case: bool = False,
+    context: int = 40,
+    role: Optional[str] = None,
+    jobs: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """Grep every message of a conversations.json file with a pool of *jobs* processes.
+
+    Conversations are parsed and matched in the workers, see
+    `map_conversations`. Matches are yielded in file order.
+
+    Raises:
+        re.error: invalid *pattern*
+        ValueError: the file is not a JSON array of conversations
+    """
+    regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+    for matches in map_conversations(
+        path, grep_conversations, regex, context, role, jobs=jobs
+    ):
+        yield from matches
+
+
+def grep_files(
+    paths: Sequence[str], pattern: str, **kwargs: Any
+) -> Iterator[Dict[str, Any]]:
+    """`grep_file` over several exports, file after file.
+
+    A conversation found in more than one file is only matched in the copy
+    `merged_rows` keeps, so merged exports don't report it twice.
+    """
+    if len(paths) == 1:
+        yield from grep_file(paths[0], pattern, **kwargs)
+        return
+    kept = {(path, row[ID]) for path, row in merged_rows(paths) if row[ID]}
+    for path in paths:
+        for m in grep_file(path, pattern, **kwargs):
+            if not m["conversation_id"] or (path, m["conversation_id"]) in kept:
+                yield m
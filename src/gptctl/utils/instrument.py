@@ -0,0 +1,304 @@
+import cProfile
+from contextlib import contextmanager, nullcontext
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from rich.console import Console
+from rich.table import Table
+
+from gptctl.definitions import Phase
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+try:  # Recent Typer releases ship their own copy of click
+    from typer._click.globals import get_current_context
+except ImportError:
+    from click import get_current_context
+
+T = TypeVar("T")
+
+
+class Instrumentation:
+    """Phases of one CLI run, the `--profile` profiler and the `--stats` report.
+
+    Commands mark their phases with `phase()` blocks and `iterate()`
+    wrappers. Phases nest: the innermost one is the current one, so pulling
+    from a `LOAD` iterator inside a `COLLECT` iterator is accounted to
+    `LOAD`, and phase times never overlap. With a *profile_phase* only the
+    code running in that phase is profiled, otherwise the whole command.
+    """
+
+    def __init__(
+        self,
+        profile_path: Optional[str] = None,
+        profile_top: int = 20,
+        profile_phase: Optional[Phase] = None,
+        stats: bool = False,
+        stats_json: Optional[str] = None,
+        trace_malloc: bool = False,
+    ):
+        self.profile_path = profile_path
+        self.profile_top = profile_top
+        self.profile_phase = profile_phase
+        self.profiler: Optional[cProfile.Profile] = (
+            cProfile.Profile() if profile_path else None
+        )
+        self.stats = stats or stats_json is not None
+        self.stats_json = stats_json
+        self.trace_malloc = self.stats and trace_malloc
+        self.command = ""
+        self.stack: List[Phase] = []
+        self.times: Dict[Phase, float] = {}
+        self.counters: Dict[str, float] = {}
+        self._profiling = False
+        self._started = 0.0
+        self._mark = 0.0
+        self._thread = threading.get_ident()
+
+    @property
+    def enabled(self) -> bool:
+        return self.profiler is not None or self.stats
+
+    def _sync_profiler(self) -> None:
+        if self.profiler is None:
+            return
+        wanted = self.profile_phase is None or (
+            bool(self.stack) and self.stack[-1] == self.profile_phase
+        )
+        if wanted and not self._profiling:
+            self.profiler.enable()
+        elif not wanted and self._profiling:
+            self.profiler.disable()
+        self._profiling = wanted
+
+    def _switch(self) -> None:
+        # Account the time since the last switch to the innermost phase
+        if not self.stats:
+            return
+        now = time.perf_counter()
+        if self.stack:
+            name = self.stack[-1]
+            self.times[name] = self.times.get(name, 0.0) + now - self._mark
+        self._mark = now
+
+    def start(self) -> None:
+        if self.trace_malloc:
+            tracemalloc.start()
+        self._started = self._mark = time.perf_counter()
+        self._thread = threading.get_ident()
+        self._sync_profiler()
+
+    @contextmanager
+    def phase(self, name: Phase) -> Iterator[None]:
+        if threading.get_ident() != self._thread:
+            # A --jobs worker thread: the command's thread accounts for the wait
+            yield
+            return
+        if not self.command:
+            # The first phase runs in the invoked (sub)command's context
+            ctx = get_current_context(silent=True)
+            self.command = ctx.command_path if ctx is not None else ""
+        self._switch()
+        self.stack.append(name)
+        self._sync_profiler()
+        try:
+            yield
+        finally:
+            self._switch()
+            self.stack.pop()
+            self._sync_profiler()
+
+    def iterate(self, name: Phase, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from *iterable*, accounting the time spent producing each item to phase *name*."""
+        it = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def detach(self) -> None:
+        """Stop profiling in a forked worker process, which inherits the parent's profiler."""
+        if self.profiler is not None and self._profiling:
+            self.profiler.disable()
+        self.profiler = None
+        self._profiling = False
+        self.stats = False
+
+    def report(self) -> Dict[str, Any]:
+        """Timings, counters, throughput and memory peaks of the run so far."""
+        wall = time.perf_counter() - self._started
+        phases = {p.value: self.times[p] for p in Phase if p in self.times}
+        phases["other"] = max(0.0, wall - sum(self.times.values()))
+        counters = dict(self.counters)
+        throughput: Dict[str, float] = {}
+        if wall > 0:
+            for name in ("conversations_read", "conversations"):
+                if counters.get(name):
+                    throughput[f"{name}_per_s"] = counters[name] / wall
+        io_time = self.times.get(Phase.READ, 0.0) + self.times.get(Phase.LOAD, 0.0)
+        if counters.get("bytes_read") and io_time > 0:
+            throughput["read_mb_per_s"] = counters["bytes_read"] / io_time / 1e6
+        write_time = self.times.get(Phase.WRITE, 0.0)
+        if counters.get("bytes_written") and write_time > 0:
+            throughput["write_mb_per_s"] = counters["bytes_written"] / write_time / 1e6
+        memory: Dict[str, int] = {}
+        if resource is not None:
+            # Kilobytes on Linux, bytes on macOS
+            scale = 1 if sys.platform == "darwin" else 1024
+            memory["rss_peak_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+            # Largest finished child process, e.g. a --jobs worker
+            children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+            if children:
+                memory["children_rss_peak_bytes"] = children
+        if self.trace_malloc and tracemalloc.is_tracing():
+            memory["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        return {
+            "command": self.command,
+            "wall_s": wall,
+            "phases_s": phases,
+            "counters": counters,
+            "throughput": throughput,
+            "memory": memory,
+        }
+
+    def finish(self, console: Console) -> None:
+        """Stop profiling and tracing, then print/write the profile and the stats."""
+        if self.stats:
+            self._switch()
+            report = self.report()
+            if self.trace_malloc:
+                tracemalloc.stop()
+            if self.stats_json == "-":
+                console.print_json(data=report)
+            elif self.stats_json:
+                with open(self.stats_json, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2)
+                    f.write("\n")
+            else:
+                console.print(create_stats_table(report))
+        if self.profiler is None:
+            return
+        if self._profiling:
+            self.profiler.disable()
+            self._profiling = False
+        self.profiler.dump_stats(self.profile_path)
+        stats = pstats.Stats(self.profiler)
+        if not stats.stats:  # type: ignore[attr-defined]
+            where = f" in phase '{self.profile_phase.value}'" if self.profile_phase else ""
+            console.print(f"[yellow]Nothing was profiled{where}[/yellow]")
+        else:
+            console.print(create_hotspots_table(stats, self.profile_top, self.profile_phase))
+        console.print(
+            f"Profile written to {self.profile_path} (open with: python -m pstats {self.profile_path})"
+        )
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def create_stats_table(report: Dict[str, Any]) -> Table:
+    wall = report["wall_s"]
+    table = Table(title=f"Stats: {report['command'] or 'gptctl'} ({wall:.3f} s)")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    table.add_column("Share", justify="right")
+    for name, seconds in report["phases_s"].items():
+        share = f"{seconds / wall:.0%}" if wall else "-"
+        table.add_row(f"phase: {name}", f"{seconds:.3f} s", share)
+    for name, value in report["counters"].items():
+        text = format_bytes(value) if name.startswith("bytes") else f"{value:g}"
+        table.add_row(name.replace("_", " "), text, "")
+    for name, value in report["throughput"].items():
+        if name.endswith("_mb_per_s"):
+            label, text = name[: -len("_mb_per_s")], f"{value:.1f} MB/s"
+        else:
+            label, text = name[: -len("_per_s")], f"{value:.1f} /s"
+        table.add_row(f"throughput: {label.replace('_', ' ')}", text, "")
+    for name, value in report["memory"].items():
+        table.add_row(name.replace("_bytes", "").replace("_", " "), format_bytes(value), "")
+    return table
+
+
+def create_hotspots_table(
+    stats: pstats.Stats, top: int = 20, profile_phase: Optional[Phase] = None
+) -> Table:
+    """Top *top* functions by own time."""
+    stats.sort_stats(pstats.SortKey.TIME)
+    phase = f" in phase '{profile_phase.value}'" if profile_phase else ""
+    table = Table(title=f"Top {top} hotspots{phase} ({stats.total_tt:.3f} s)")  # type: ignore[attr-defined]
+    table.add_column("Function")
+    table.add_column("Calls", justify="right")
+    table.add_column("Own, s", justify="right")
+    table.add_column("Total, s", justify="right")
+    for func in stats.fcn_list[:top]:  # type: ignore[attr-defined]
+        cc, nc, tt, ct, _ = stats.stats[func]  # type: ignore[attr-defined]
+        filename, line, name = func
+        # Built-ins have no file ("~")
+        where = f" ({os.path.basename(filename)}:{line})" if line else ""
+        calls = str(nc) if nc == cc else f"{nc}/{cc}"
+        table.add_row(f"{name}{where}", calls, f"{tt:.3f}", f"{ct:.3f}")
+    return table
+
+
+_current = Instrumentation()
+
+
+def current() -> Instrumentation:
+    return _current
+
+
+def activate(instrumentation: Instrumentation) -> Instrumentation:
+    """Make *instrumentation* the one `phase`, `iterate` and `count` report to."""
+    global _current
+    _current = instrumentation
+    return instrumentation
+
+
+def phase(name: Phase) -> ContextManager[None]:
+    """Mark a block as phase *name* of the running command."""
+    return _current.phase(name) if _current.enabled else nullcontext()
+
+
+def iterate(name: Phase, iterable: Iterable[T]) -> Iterable[T]:
+    """Account the time spent producing items of *iterable* to phase *name*."""
+    return _current.iterate(name, iterable) if _current.enabled else iterable
+
+
+def count(name: str, value: float = 1) -> None:
+    """Add *value* to the counter *name* of the `--stats` report."""
+    if _current.stats:
+        _current.count(name, value)
+
+
+def detach_worker() -> None:
+    """Pool initializer: don't profile or count in worker processes."""
+    _current.detach()
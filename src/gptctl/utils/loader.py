@@ -0,0 +1,388 @@
+import codecs
+import errno
+import glob
+import json
+import mmap
+import os
+import posixpath
+import re
+import zipfile
+from typing import IO, Any, Iterable, Iterator, List, Optional, Tuple
+
+from gptctl.definitions import Phase
+from gptctl.utils.instrument import count, phase
+
+CHUNK_SIZE = 1 << 20  # 1 MiB
+CONVERSATIONS_MEMBER = "conversations.json"
+
+_WS_RE = re.compile(r"[ \t\r\n]*")
+_DECODER = json.JSONDecoder()
+_BYTES_WS_RE = re.compile(rb"[ \t\r\n]*")
+_BYTES_SEP_RE = re.compile(rb"[ \t\r\n]*(?:,[ \t\r\n]*)?")
+# A likely boundary between two elements: the end of one object and the start of the next
+_SPLIT_RE = re.compile(rb"\}[ \t\r\n]*,[ \t\r\n]*\{")
+
+
+def _utf8_len(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class _BufferReader:
+    """Minimal `read()` over a bytes-like object (`bytes`, `mmap`) without copying it."""
+
+    __slots__ = ("buf", "pos")
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def read(self, size: int) -> bytes:
+        chunk = self.buf[self.pos : self.pos + size]
+        self.pos += len(chunk)
+        return chunk
+
+
+def expand_inputs(patterns: Iterable[str]) -> List[str]:
+    """Input files named by *patterns*: paths or globs, expanded in sorted order.
+
+    A path listed twice (or matched by two globs) is only returned once.
+
+    Raises:
+        FileNotFoundError: a glob matches no file
+    """
+    files: List[str] = []
+    seen = set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(errno.ENOENT, "No input file matches", pattern)
+        else:
+            matches = [pattern]
+        for path in matches:
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def is_zip_input(path: str) -> bool:
+    """Whether *path* is a ZIP archive, e.g. the ChatGPT data export as downloaded."""
+    return zipfile.is_zipfile(path)
+
+
+def conversations_member(archive: zipfile.ZipFile) -> str:
+    """Name of the conversations.json member of *archive*, the least nested one if there are several.
+
+    Raises:
+        ValueError: the archive has no conversations.json
+    """
+    names = [
+        name
+        for name in archive.namelist()
+        if posixpath.basename(name) == CONVERSATIONS_MEMBER
+    ]
+    if not names:
+        raise ValueError(f"No {CONVERSATIONS_MEMBER} in {archive.filename}")
+    return min(names, key=lambda name: (name.count("/"), name))
+
+
+def open_input(path: str) -> IO[bytes]:
+    """Open the conversations.json *path* for binary reading.
+
+    A ZIP archive is read in place: its conversations.json member is
+    decompressed as it is read, nothing is extracted to disk. Offsets in
+    the returned stream are offsets in the uncompressed member.
+
+    Raises:
+        ValueError: the archive has no conversations.json
+    """
+    if not is_zip_input(path):
+        return open(path, "rb")
+    with zipfile.ZipFile(path) as archive:
+        # The member keeps the archive's file open until it is closed itself
+        return archive.open(conversations_member(archive))
+
+
+def iter_stream_elements(
+    fp: IO[bytes], chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[int, int, str, Any]]:
+    """Yield ``(start, end, text, value)`` for every top-level element of a binary stream.
+
+    Elements are parsed by the C JSON decoder straight from an incrementally
+    decoded text buffer, which only holds the element being parsed plus the
+    rest of the last chunk read. ``start`` and ``end`` are absolute byte
+    offsets in the stream; ``text`` is the element's JSON source.
+
+    Raises:
+        ValueError: the document is not a JSON array of objects/arrays.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    text = ""
+    pos = 0  # next character of text to look at
+    offset = 0  # absolute byte offset of text[pos]
+    eof = False
+    opened = False
+
+    def need_more(p: int) -> None:
+        # Drop everything before p, then read at least as much as is buffered
+        # so an element larger than chunk_size is only retried a logarithmic
+        # number of times.
+        nonlocal text, pos, offset, eof
+        offset += _utf8_len(text[pos:p])
+        text = text[p:]
+        pos = 0
+        with phase(Phase.READ):
+            chunk = fp.read(max(chunk_size, len(text)))
+        count("bytes_read", len(chunk))
+        if chunk:
+            text += decode(chunk)
+        else:
+            text += decode(b"", final=True)
+            eof = True
+
+    while True:
+        p = _WS_RE.match(text, pos).end()
+        if not opened:
+            if text.startswith("\ufeff", p):  # UTF-8 BOM
+                p = _WS_RE.match(text, p + 1).end()
+            if p >= len(text):
+                if eof:
+                    raise ValueError("Empty input: expected a JSON array of conversations")
+                need_more(p)
+                continue
+            if text[p] != "[":
+                raise ValueError("Expected a JSON array of conversations")
+            opened = True
+            p = _WS_RE.match(text, p + 1).end()
+        elif text.startswith(",", p):
+            p = _WS_RE.match(text, p + 1).end()
+
+        if p >= len(text):
+            if eof:
+                raise ValueError("Unexpected end of input inside the array")
+            need_more(p)
+            continue
+        ch = text[p]
+        if ch == "]":
+            return
+        if ch not in "{[":
+            at = offset + _utf8_len(text[pos:p])
+            raise ValueError(f"Unexpected {ch!r} at offset {at}: expected a conversation object")
+        try:
+            value, end = _DECODER.raw_decode(text, p)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"Invalid or truncated conversation: {e}") from e
+            need_more(p)
+            continue
+        source = text[p:end]
+        start = offset + _utf8_len(text[pos:p])
+        offset = start + _utf8_len(source)
+        pos = end
+        count("conversations_read")
+        yield start, offset, source, value
+
+
+def iter_buffer_spans(buf) -> Iterator[Tuple[int, int]]:
+    """Yield ``(start, end)`` offsets of every top-level element of an in-memory buffer.
+
+    ``buf`` is any bytes-like object supporting slicing, e.g. ``bytes`` or
+    an ``mmap.mmap`` of a conversations.json file.
+    """
+    for start, end, _, _ in iter_stream_elements(_BufferReader(buf)):
+        yield start, end
+
+
+def buffer_bounds(buf) -> Tuple[int, int]:
+    """Offsets of the first element and of the closing bracket of the JSON array in *buf*.
+
+    Raises:
+        ValueError: *buf* doesn't hold a JSON array
+    """
+    p = _BYTES_WS_RE.match(buf).end()
+    if buf[p : p + 3] == b"\xef\xbb\xbf":  # UTF-8 BOM
+        p = _BYTES_WS_RE.match(buf, p + 3).end()
+    if p >= len(buf):
+        raise ValueError("Empty input: expected a JSON array of conversations")
+    if buf[p : p + 1] != b"[":
+        raise ValueError("Expected a JSON array of conversations")
+    last = len(buf) - 1
+    while last > p and buf[last : last + 1] in (b" ", b"\t", b"\r", b"\n"):
+        last -= 1
+    if last <= p or buf[last : last + 1] != b"]":
+        raise ValueError("Unexpected end of input inside the array")
+    first = _BYTES_WS_RE.match(buf, p + 1).end()
+    return min(first, last), last
+
+
+def next_boundary(buf, pos: int, end: int) -> int:
+    """Offset of the first likely element start at/after *pos*, or *end*.
+
+    Found with a byte search for ``}, {``, which also matches inside nested
+    lists of objects and strings: see `parse_range` for how a wrong guess
+    is detected.
+    """
+    m = _SPLIT_RE.search(buf, pos, end)
+    return m.end() - 1 if m else end
+
+
+def _truncated(e: json.JSONDecodeError, size: int) -> bool:
+    # Text cut at a `}, {` boundary ends in the middle of a value or inside a string
+    return e.pos >= size or e.msg.startswith("Unterminated string")
+
+
+def _decode_at(buf, offset: int, size: int) -> Tuple[Any, int]:
+    """Parse the element starting at byte *offset*, reading at least *size* bytes of it."""
+    while True:
+        end = next_boundary(buf, offset + size, len(buf))
+        text = buf[offset:end].decode("utf-8")
+        try:
+            value, stop = _DECODER.raw_decode(text)
+        except json.JSONDecodeError as e:
+            if end < len(buf) and _truncated(e, len(text)):
+                size *= 2
+                continue
+            raise ValueError(f"Invalid or truncated conversation at offset {offset}: {e}") from e
+        return value, offset + _utf8_len(text[:stop])
+
+
+def parse_range(buf, start: int, stop: int) -> Tuple[List[Any], int]:
+    """Parse the consecutive top-level elements of *buf* from byte *start* up to byte *stop*.
+
+    *start* must be where an element starts. When *stop* isn't where one
+    starts (a wrong `next_boundary` guess), the element running past it is
+    parsed too, so a chain of elements started at a real boundary always
+    ends at a real one.
+
+    Returns:
+        The elements, and the offset of the element (or closing bracket)
+        that follows them: *stop* unless it was a wrong guess
+
+    Raises:
+        ValueError: no chain of elements starts at *start*, e.g. it is a
+            wrong guess too, or the JSON is invalid
+    """
+    text = buf[start:stop].decode("utf-8")
+    size = len(text)
+    values = []
+    pos = 0
+    while pos < size:
+        if text[pos] not in "{[":
+            at = start + _utf8_len(text[:pos])
+            raise ValueError(f"Unexpected {text[pos]!r} at offset {at}: expected a conversation object")
+        try:
+            value, end = _DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            if not _truncated(e, size):
+                raise ValueError(f"Invalid conversation: {e}") from e
+            offset = start + _utf8_len(text[:pos])
+            value, end = _decode_at(buf, offset, 2 * (stop - offset))
+            values.append(value)
+            return values, _BYTES_SEP_RE.match(buf, end).end()
+        values.append(value)
+        p = _WS_RE.match(text, end).end()
+        if p < size:
+            if text[p] != ",":
+                at = start + _utf8_len(text[:p])
+                raise ValueError(f"Unexpected {text[p]!r} at offset {at}: expected ','")
+            p = _WS_RE.match(text, p + 1).end()
+        pos = p
+    return values, stop
+
+
+def iter_stream_spans(
+    fp: IO[bytes], chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield ``(start, end, raw_bytes)`` for every top-level element of a binary stream.
+
+    Only the element being scanned is buffered, so memory is bounded by the
+    largest single conversation instead of the whole file. ``start`` and
+    ``end`` are absolute byte offsets in the stream.
+    """
+    for start, end, source, _ in iter_stream_elements(fp, chunk_size=chunk_size):
+        yield start, end, source.encode("utf-8")
+
+
+def iter_conversations(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """Incrementally parse a conversations.json file, one conversation at a time.
+
+    Args:
+        path (str): Path to the ChatGPT export conversations.json file, or
+            to the export ZIP archive containing it
+        chunk_size (int): Number of bytes read from disk at once
+
+    Yields:
+        dict: One parsed conversation
+
+    Raises:
+        ValueError: the file is not a JSON array of conversations
+    """
+    with open_input(path) as f:
+        for _, _, _, conv in iter_stream_elements(f, chunk_size=chunk_size):
+            yield conv
+
+
+class SpanReader:
+    """Random access to the conversations of a file by their byte span.
+
+    The file is memory-mapped, so only the pages of the conversations
+    actually parsed are read from disk, however large the file is. A ZIP
+    archive can't be mapped: its member is seeked instead, which
+    decompresses everything up to the span (from the start again when
+    seeking backwards), so spans are best loaded in file order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open_input(path)
+        self._map: Optional[mmap.mmap] = None
+        if isinstance(self._file, zipfile.ZipExtFile):
+            return
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"Empty input: {path}") from None
+
+    @property
+    def mapped(self) -> bool:
+        """Whether spans are sliced from a memory map, which several threads can do at once."""
+        return self._map is not None
+
+    def load(self, start: int, end: int) -> dict:
+        """Parse the single conversation stored at bytes ``start:end``."""
+        with phase(Phase.READ):
+            if self._map is not None:
+                raw = self._map[start:end]
+            else:
+                self._file.seek(start)
+                raw = self._file.read(end - start)
+        count("bytes_read", len(raw))
+        conv = json.loads(raw)
+        if not isinstance(conv, dict):
+            raise ValueError(f"No conversation at bytes {start}:{end} of {self.path}")
+        return conv
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "SpanReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def load_span(path: str, start: int, end: int) -> dict:
+    """Parse the single conversation stored at bytes ``start:end`` of *path*."""
+    with SpanReader(path) as reader:
+        return reader.load(start, end)
+
+
+def load_conversations(path: str) -> list[Any]:
+    """Parse the whole conversations.json file into a list of conversations."""
+    return list(iter_conversations(path))
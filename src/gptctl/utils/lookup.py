@@ -0,0 +1,160 @@
+from bisect import bisect_left
+from typing import Any, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from rich.console import Console
+
+from gptctl.definitions import MatchMode
+
+T = TypeVar("T")
+
+
+def conversation_id(conv: dict) -> Optional[str]:
+    return conv.get("id") or conv.get("conversation_id")
+
+
+def conversation_title(conv: dict) -> str:
+    return conv.get("title") or conv.get("name") or ""
+
+
+class ConversationIndex(Generic[T]):
+    """Lookup of records by conversation id, exact title, case-folded title and title prefix.
+
+    Built in one pass with `add`; id and title lookups are dict hits, prefix
+    lookups bisect a sorted list of case-folded titles. Duplicate titles
+    map to all their records, in insertion order.
+    """
+
+    def __init__(self):
+        self.by_id: Dict[str, T] = {}
+        self.by_title: Dict[str, List[T]] = {}
+        self.by_folded: Dict[str, List[T]] = {}
+        self._prefixes: Optional[List[Tuple[str, int]]] = None
+        self._records: List[T] = []
+        self._titles: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, record: T, id: Optional[str], title: str) -> None:
+        if id and id not in self.by_id:
+            self.by_id[id] = record
+        self.by_title.setdefault(title, []).append(record)
+        self.by_folded.setdefault(title.casefold(), []).append(record)
+        self._records.append(record)
+        self._titles.append(title)
+        self._prefixes = None
+
+    @classmethod
+    def from_conversations(cls, conversations: Iterable[dict]) -> "ConversationIndex[dict]":
+        index = cls()
+        for conv in conversations:
+            index.add(conv, conversation_id(conv), conversation_title(conv))
+        return index
+
+    def get(self, id: str) -> Optional[T]:
+        return self.by_id.get(id)
+
+    def find(self, title: str, match: MatchMode = MatchMode.EXACT) -> List[T]:
+        """All records whose title matches *title*, in insertion order."""
+        if match == MatchMode.EXACT:
+            return list(self.by_title.get(title, []))
+        folded = title.casefold()
+        if match == MatchMode.CASEFOLD:
+            return list(self.by_folded.get(folded, []))
+        if self._prefixes is None:
+            self._prefixes = sorted(
+                (t.casefold(), i) for i, t in enumerate(self._titles)
+            )
+        found = []
+        i = bisect_left(self._prefixes, (folded, -1))
+        while i < len(self._prefixes) and self._prefixes[i][0].startswith(folded):
+            found.append(self._prefixes[i][1])
+            i += 1
+        return [self._records[j] for j in sorted(found)]
+
+
+class Selector:
+    """Requested ids/titles, testable against a conversation in O(1)."""
+
+    def __init__(
+        self,
+        titles: Iterable[str] = (),
+        ids: Iterable[str] = (),
+        match: MatchMode = MatchMode.EXACT,
+    ):
+        self.titles = list(titles)
+        self.ids = list(ids)
+        self.match = match
+        self._ids = set(self.ids)
+        if match == MatchMode.EXACT:
+            self._keys = set(self.titles)
+        else:
+            self._keys = {t.casefold() for t in self.titles}
+        self._lengths = sorted({len(k) for k in self._keys})
+
+    def __bool__(self) -> bool:
+        return bool(self.titles or self.ids)
+
+    def matches(self, conv: dict) -> bool:
+        return self.matches_fields(conversation_id(conv), conversation_title(conv))
+
+    def matches_fields(self, id: Optional[str], title: str) -> bool:
+        """Same as `matches`, for the id and title of a conversation."""
+        if self._ids and id in self._ids:
+            return True
+        if not self._keys:
+            return False
+        if self.match == MatchMode.EXACT:
+            return title in self._keys
+        folded = title.casefold()
+        if self.match == MatchMode.CASEFOLD:
+            return folded in self._keys
+        return any(folded[:n] in self._keys for n in self._lengths)
+
+
+def select_conversations(
+    conversations: Iterable[dict],
+    titles: Iterable[str] = (),
+    ids: Iterable[str] = (),
+    match: MatchMode = MatchMode.EXACT,
+    console: Optional[Console] = None,
+) -> List[dict]:
+    """Conversations matching requested *ids* and *titles*, in request order.
+
+    One pass over *conversations* indexes only the matching ones; every
+    match of a duplicate title is returned. Missing ids/titles are reported
+    to *console*.
+    """
+    selector = Selector(titles=titles, ids=ids, match=match)
+    index: ConversationIndex[dict] = ConversationIndex()
+    pending_ids = set(selector.ids)
+    for conv in conversations:
+        if selector.matches(conv):
+            conv_id = conversation_id(conv)
+            index.add(conv, conv_id, conversation_title(conv))
+            pending_ids.discard(conv_id)
+            # Titles may be duplicated anywhere in the archive, ids may not
+            if not selector.titles and not pending_ids:
+                break
+
+    selected: List[dict] = []
+    seen = set()
+
+    def extend(found: List[Any], what: str) -> None:
+        if not found:
+            if console:
+                console.print(
+                    f"[red]The {what} not found in conversations file[/red]"
+                )
+            return
+        for conv in found:
+            if id(conv) not in seen:
+                seen.add(id(conv))
+                selected.append(conv)
+
+    for i in selector.ids:
+        conv = index.get(i)
+        extend([conv] if conv is not None else [], f"id [bold]'{i}'[/bold]")
+    for t in selector.titles:
+        extend(index.find(t, match), f"title [bold]'{t}'[/bold]")
+    return selected
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_dir: str, format: str) -> str:
+    """Manifest of the *format* exports in *output_dir*, e.g. `.gptctl-md-manifest.json`."""
+    return os.path.join(output_dir, f".gptctl-{format}-manifest.json")
+
+
+def content_hash(conv: dict) -> str:
+    """Stable digest of a conversation, independent of its keys order."""
+    raw = json.dumps(conv, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """What was exported to an output directory: per conversation id its
+    `update_time`, content hash and output file name.
+
+    Entries are only trusted if the export *options* are the same as the
+    ones recorded, since they change the output of every conversation.
+    """
+
+    def __init__(
+        self, output_dir: str, format: str, options: Optional[Dict[str, Any]] = None
+    ):
+        self.output_dir = output_dir
+        self.format = format
+        self.options = options or {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.owners: Dict[str, str] = {}
+        self.seen: set = set()
+
+    @property
+    def path(self) -> str:
+        return manifest_path(self.output_dir, self.format)
+
+    @classmethod
+    def load(
+        cls, output_dir: str, format: str, options: Optional[Dict[str, Any]] = None
+    ) -> "Manifest":
+        manifest = cls(output_dir, format, options)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if (
+            isinstance(stored, dict)
+            and stored.get("version") == MANIFEST_VERSION
+            and stored.get("options") == manifest.options
+        ):
+            manifest.entries = stored.get("conversations", {})
+            manifest.owners = {
+                entry["filename"]: conv_id
+                for conv_id, entry in manifest.entries.items()
+            }
+        return manifest
+
+    def filename(self, conv_id: Optional[str]) -> Optional[str]:
+        """File name the conversation was exported to last time, if any."""
+        entry = self.entries.get(conv_id) if conv_id else None
+        return entry["filename"] if entry else None
+
+    def assign(self, conv_id: Optional[str], filename: str) -> str:
+        """Keep the file name a conversation was exported to before. A new one
+        gets *filename*, or a numbered variant if another conversation owns it.
+        """
+        previous = self.filename(conv_id)
+        if previous:
+            return previous
+        stem, ext = os.path.splitext(filename)
+        n = 1
+        while self.owners.get(filename, conv_id) != conv_id:
+            n += 1
+            filename = f"{stem}_{n}{ext}"
+        return filename
+
+    def is_current(self, conv_id: Optional[str], update_time: Any, digest: str) -> bool:
+        """Whether the conversation is unchanged since its last export and its file is still there."""
+        if not conv_id:
+            return False
+        self.seen.add(conv_id)
+        entry = self.entries.get(conv_id)
+        return bool(
+            entry
+            and entry.get("update_time") == update_time
+            and entry.get("hash") == digest
+            and os.path.exists(os.path.join(self.output_dir, entry["filename"]))
+        )
+
+    def record(
+        self, conv_id: Optional[str], update_time: Any, digest: str, filename: str
+    ) -> None:
+        if not conv_id:
+            return
+        self.seen.add(conv_id)
+        # The file now belongs to this conversation only
+        owner = self.owners.get(filename)
+        if owner is not None and owner != conv_id:
+            del self.entries[owner]
+        previous = self.filename(conv_id)
+        if previous and previous != filename:
+            del self.owners[previous]
+        self.owners[filename] = conv_id
+        self.entries[conv_id] = {
+            "update_time": update_time,
+            "hash": digest,
+            "filename": filename,
+        }
+
+    def prune(self, dry_run: bool = False) -> List[str]:
+        """Forget conversations not seen in this run and delete their files.
+
+        Returns:
+            List[str]: paths of the removed (or, with *dry_run*, removable) files
+        """
+        removed = []
+        for conv_id in [c for c in self.entries if c not in self.seen]:
+            filename = self.entries[conv_id]["filename"]
+            path = os.path.join(self.output_dir, filename)
+            removed.append(path)
+            if dry_run:
+                continue
+            del self.entries[conv_id]
+            del self.owners[filename]
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def save(self) -> None:
+        """Atomically write the manifest to the output directory."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "options": self.options,
+                    "conversations": self.entries,
+                },
+                f,
+                ensure_ascii=False,
+                indent=1,
+            )
+        os.replace(tmp, self.path)
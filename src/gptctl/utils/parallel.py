@@ -0,0 +1,200 @@
+from collections import deque
+from functools import partial
+from itertools import repeat
+import json
+import mmap
+import os
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import IO, Any, Callable, Deque, Iterable, Iterator, List, Tuple, TypeVar
+
+from gptctl.definitions import ExecutorKind
+from gptctl.utils.instrument import count, detach_worker
+from gptctl.utils.loader import (
+    buffer_bounds,
+    is_zip_input,
+    iter_stream_spans,
+    next_boundary,
+    open_input,
+    parse_range,
+)
+
+BATCH_BYTES = 4 << 20  # 4 MiB of raw JSON per worker task
+
+T = TypeVar("T")
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def make_executor(
+    jobs: int = 0, kind: ExecutorKind = ExecutorKind.PROCESS
+) -> Executor:
+    """Worker pool with *jobs* workers (all CPUs if 0)."""
+    jobs = jobs or default_jobs()
+    if kind == ExecutorKind.THREAD:
+        return ThreadPoolExecutor(max_workers=jobs)
+    return ProcessPoolExecutor(max_workers=jobs, initializer=detach_worker)
+
+
+def batch_raw(fp: IO[bytes], batch_bytes: int = BATCH_BYTES) -> Iterator[List[bytes]]:
+    """Raw conversations of a stream, grouped into batches of about *batch_bytes*."""
+    batch: List[bytes] = []
+    size = 0
+    for _, _, raw in iter_stream_spans(fp):
+        batch.append(raw)
+        size += len(raw)
+        if size >= batch_bytes:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def imap_ordered(
+    executor: Executor, fn: Callable[..., T], *iterables: Iterable, window: int = 0
+) -> Iterator[T]:
+    """Like `Executor.map`, but submits lazily with at most *window* tasks in flight.
+
+    Results are yielded in input order while the inputs are still being
+    produced, so neither the inputs nor the results have to fit in memory.
+    """
+    window = window or 2 * default_jobs()
+    pending: Deque[Future] = deque()
+    for args in zip(*iterables):
+        pending.append(executor.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def worker_name() -> str:
+    """Identify the current pool worker, whether it's a process or a thread."""
+    return f"{os.getpid()}/{threading.current_thread().name}"
+
+
+def run_range(
+    task: Callable[..., T], path: str, start: int, stop: int, *args: Any
+) -> Tuple[int, int, int, Any]:
+    """Worker side of `map_conversations`: parse the conversations from byte *start* to *stop* of *path*.
+
+    Returns ``(start, next start, number of conversations, task result)``.
+    Errors are returned instead of raised, with a next start of -1: a
+    range that doesn't start at a conversation parses garbage or nothing,
+    so `map_conversations` only raises them once the previous range has
+    confirmed *start*.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        try:
+            conversations, end = parse_range(mm, start, stop)
+        except ValueError as e:
+            return start, -1, 0, e
+    try:
+        return start, end, len(conversations), task(conversations, *args)
+    except Exception as e:
+        return start, -1, 0, e
+
+
+def run_raw(task: Callable[..., T], raws: List[bytes], *args: Any) -> T:
+    """Worker side of `map_conversations`: parse raw JSON conversations."""
+    return task([json.loads(raw) for raw in raws], *args)
+
+
+def map_conversations(
+    path: str, task: Callable[..., T], *args: Any, jobs: int = 0
+) -> Iterator[T]:
+    """Apply ``task(conversations, *args)`` to batches of the conversations of *path*.
+
+    Batches run on a pool of *jobs* processes (1 runs them in this
+    process). The file is memory-mapped and split into ranges of about
+    `BATCH_BYTES` at likely conversation boundaries (see `next_boundary`),
+    so the parent doesn't scan it: workers parse their range and report
+    where it really ends. A range whose start turns out not to be a
+    boundary is run again from the real one. A ZIP export is decompressed
+    by the parent, which sends the raw conversations instead. Results are
+    yielded in file order. *task* and *args* must be picklable, e.g. a
+    module-level function.
+
+    Raises:
+        ValueError: the file is not a JSON array of conversations
+    """
+    if is_zip_input(path):
+        with open_input(path) as fp:
+            yield from _map_batches(partial(run_raw, task), batch_raw(fp), args, jobs)
+        return
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            raise ValueError("Empty input: expected a JSON array of conversations")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _map_ranges(partial(run_range, task, path), mm, args, jobs)
+
+
+def _map_ranges(
+    fn: Callable[..., Tuple[int, int, int, Any]], mm: mmap.mmap, args: Tuple[Any, ...], jobs: int
+) -> Iterator[Any]:
+    first, last = buffer_bounds(mm)
+    expected = first  # where the next conversation really starts
+
+    def confirm(end: int, n: int, result: Any) -> Any:
+        nonlocal expected
+        if end < 0:
+            raise result
+        count("conversations_read", n)
+        count("bytes_read", end - expected)
+        expected = end
+        return result
+
+    if jobs == 1:
+        while expected < last:
+            stop = next_boundary(mm, expected + BATCH_BYTES, last)
+            _, end, n, result = fn(expected, stop, *args)
+            yield confirm(end, n, result)
+        return
+
+    def ranges() -> Iterator[Tuple[int, int]]:
+        start = first
+        while start < last:
+            stop = next_boundary(mm, start + BATCH_BYTES, last)
+            yield start, stop
+            start = stop
+
+    jobs = jobs or default_jobs()
+    planned = ranges()
+    pending: Deque[Tuple[int, Future]] = deque()
+    with make_executor(jobs) as pool:
+        while True:
+            for start, stop in planned:
+                pending.append((stop, pool.submit(fn, start, stop, *args)))
+                if len(pending) >= 2 * jobs:
+                    break
+            if not pending:
+                return
+            stop, future = pending.popleft()
+            start, end, n, result = future.result()
+            if start == expected:
+                yield confirm(end, n, result)
+            elif stop > expected:
+                # The previous range ran past this one's start: run the rest again
+                pending.appendleft((stop, pool.submit(fn, expected, stop, *args)))
+
+
+def _map_batches(
+    fn: Callable[..., T], batches: Iterable[Any], args: Tuple[Any, ...], jobs: int
+) -> Iterator[T]:
+    if jobs == 1:
+        for batch in batches:
+            yield fn(batch, *args)
+        return
+    jobs = jobs or default_jobs()
+    with make_executor(jobs) as pool:
+        yield from imap_ordered(
+            pool, fn, batches, *(repeat(arg) for arg in args), window=2 * jobs
+        )
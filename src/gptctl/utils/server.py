@@ -0,0 +1,360 @@
+from collections import OrderedDict
+from contextlib import nullcontext
+from http.client import HTTPConnection, HTTPResponse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import socket
+from socketserver import ThreadingMixIn, UnixStreamServer
+import threading
+from typing import Any, ContextManager, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from gptctl.definitions import Conversation, MatchMode, SortFields, SortOrder
+from gptctl.utils.cache import cached_conv, source_key
+from gptctl.utils.catalog import CatalogError, connect, search, to_fts_query
+from gptctl.utils.loader import SpanReader
+from gptctl.utils.lookup import ConversationIndex
+from gptctl.utils.utils import conversation_to_md, sort_conv
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+logger = logging.getLogger(__name__)
+
+
+class QueryError(Exception):
+    """A request the archive can't answer, with its HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Archive:
+    """The input exports, loaded once and queried from memory.
+
+    Only the listing records (see `cached_conv`) and a `ConversationIndex`
+    of them are kept. Conversations are parsed from their byte spans, one
+    memory map per file, when requested, and rendered markdown is kept in
+    an LRU cache of *cache_size* entries. Everything is reloaded when an
+    input file changes.
+    """
+
+    def __init__(
+        self,
+        input_files: Sequence[str],
+        catalog_file: Optional[str] = None,
+        cache_size: int = 256,
+        skip_system: bool = True,
+    ):
+        self.input_files = list(input_files)
+        self.catalog_file = catalog_file
+        self.cache_size = cache_size
+        self.skip_system = skip_system
+        self.records: List[Conversation] = []
+        self.index: ConversationIndex[Conversation] = ConversationIndex()
+        self._keys: List[Dict[str, Any]] = []
+        self._readers: Dict[str, Tuple[SpanReader, ContextManager[Any]]] = {}
+        self._markdown: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self) -> None:
+        keys = [source_key(f) for f in self.input_files]
+        # Counted once here rather than per listing request
+        records = cached_conv(self.input_files, skip_system=self.skip_system, counts=True)
+        index: ConversationIndex[Conversation] = ConversationIndex()
+        for record in records:
+            index.add(record, record.id, record.title or "")
+        with self._lock:
+            # Not closed: requests still reading from the old readers release them when done
+            self._readers = {}
+            self.records, self.index, self._keys = records, index, keys
+            self._markdown.clear()
+
+    def refresh(self) -> None:
+        """Reload if an input file changed since it was loaded."""
+        if [source_key(f) for f in self.input_files] != self._keys:
+            logger.info("Input changed, reloading %s", ", ".join(self.input_files))
+            self.load()
+
+    def close(self) -> None:
+        with self._lock:
+            for reader, _ in self._readers.values():
+                reader.close()
+            self._readers.clear()
+
+    def _reader(self, source: str) -> Tuple[SpanReader, ContextManager[Any]]:
+        """The reader of *source* and the guard to hold while loading from it."""
+        with self._lock:
+            entry = self._readers.get(source)
+            if entry is None:
+                reader = SpanReader(source)
+                # Memory maps are read concurrently; a ZIP member is read by seeking, one load at a time
+                guard = nullcontext() if reader.mapped else threading.Lock()
+                entry = self._readers[source] = (reader, guard)
+            return entry
+
+    def conversation(self, record: Conversation) -> dict:
+        reader, guard = self._reader(record.source)  # type: ignore[arg-type]
+        with guard:
+            return reader.load(record.start, record.end)
+
+    def markdown(self, record: Conversation, active_branch: bool = True) -> str:
+        key = (record.source, record.start, active_branch)
+        with self._lock:
+            if key in self._markdown:
+                self._markdown.move_to_end(key)
+                return self._markdown[key]
+        _, md = conversation_to_md(
+            self.conversation(record),
+            "",
+            self.skip_system,
+            active_branch=active_branch,
+        )
+        with self._lock:
+            self._markdown[key] = md
+            if len(self._markdown) > self.cache_size:
+                self._markdown.popitem(last=False)
+        return md
+
+    def select(
+        self,
+        ids: Sequence[str] = (),
+        titles: Sequence[str] = (),
+        match: MatchMode = MatchMode.EXACT,
+    ) -> List[Conversation]:
+        """Records of *ids*, then of every conversation matching *titles*, in request order."""
+        selected: List[Conversation] = []
+        seen = set()
+        found: List[Conversation] = []
+        for i in ids:
+            record = self.index.get(i)
+            found.extend([record] if record is not None else [])
+        for t in titles:
+            found.extend(self.index.find(t, match))
+        for record in found:
+            if id(record) not in seen:
+                seen.add(id(record))
+                selected.append(record)
+        return selected
+
+    def listing(
+        self,
+        sort: SortFields = SortFields.NO_SORT,
+        order: SortOrder = SortOrder.DESC,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": r.id,
+                "title": r.title,
+                "created": r.created,
+                "update_time": r.update_time,
+                "count": r.count,
+                "source": r.source,
+            }
+            for r in sort_conv(self.records, sort=sort, order=order, limit=limit, offset=offset)
+        ]
+
+    def search(
+        self, query: str, role: Optional[str] = None, limit: int = 20, fts: bool = False
+    ) -> List[Dict[str, Any]]:
+        if not self.catalog_file:
+            raise QueryError(503, "No catalog configured")
+        match = query if fts else to_fts_query(query)
+        if not match:
+            raise QueryError(400, f"Nothing to search for in '{query}'")
+        try:
+            conn = connect(self.catalog_file)
+        except CatalogError:
+            raise QueryError(503, f"Catalog {self.catalog_file} not found. Run gptctl index first.")
+        try:
+            rows = search(conn, match, role=role, limit=limit)
+        except CatalogError as e:
+            raise QueryError(400, f"Search failed: {e}")
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+
+def _one(params: Dict[str, List[str]], name: str, default: Any = None) -> Any:
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _enum(params: Dict[str, List[str]], name: str, enum: Any, default: Any) -> Any:
+    value = _one(params, name)
+    if value is None:
+        return default
+    try:
+        return enum(value.lower())
+    except ValueError:
+        choices = ", ".join(e.value for e in enum)
+        raise QueryError(400, f"Invalid {name} '{value}', expected one of: {choices}")
+
+
+def _int(params: Dict[str, List[str]], name: str, default: Optional[int]) -> Optional[int]:
+    value = _one(params, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise QueryError(400, f"Invalid {name} '{value}', expected a number >= 0")
+    return number
+
+
+def _flag(params: Dict[str, List[str]], name: str, default: bool) -> bool:
+    value = _one(params, name)
+    return default if value is None else value.lower() in ("1", "true", "yes", "on")
+
+
+def answer(archive: Archive, path: str, params: Dict[str, List[str]]) -> Tuple[str, Any]:
+    """Answer a query: ``(content type, body)``, a JSON body unless it's markdown text.
+
+    Raises:
+        QueryError: unknown endpoint, bad parameters or nothing found
+    """
+    archive.refresh()
+    if path == "/health":
+        return "json", {"conversations": len(archive.records), "inputs": archive.input_files}
+    if path == "/list":
+        return "json", archive.listing(
+            sort=_enum(params, "sort", SortFields, SortFields.NO_SORT),
+            order=_enum(params, "order", SortOrder, SortOrder.DESC),
+            limit=_int(params, "limit", None),
+            offset=_int(params, "offset", 0) or 0,
+        )
+    if path == "/search":
+        query = _one(params, "q", "")
+        return "json", archive.search(
+            query,
+            role=_one(params, "role"),
+            limit=_int(params, "limit", 20) or 0,
+            fts=_flag(params, "fts", False),
+        )
+    if path in ("/show", "/export"):
+        records = archive.select(
+            ids=params.get("id", []),
+            titles=params.get("title", []),
+            match=_enum(params, "match", MatchMode, MatchMode.EXACT),
+        )
+        if not records:
+            if not params.get("id") and not params.get("title"):
+                raise QueryError(400, "Missing id or title")
+            raise QueryError(404, "Conversation not found")
+        if path == "/show":
+            records = records[:1]
+        if _one(params, "format", "json") == "markdown":
+            active_branch = _flag(params, "active_branch", True)
+            return "markdown", "\n---\n".join(
+                archive.markdown(r, active_branch=active_branch) for r in records
+            )
+        conversations = [archive.conversation(r) for r in records]
+        return "json", conversations[0] if path == "/show" else conversations
+    raise QueryError(404, f"Unknown endpoint {path}")
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    """GET-only JSON/markdown API over the server's `Archive`, see `answer`."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive: no connection setup per query
+    server_version = "gptctl"
+
+    def setup(self) -> None:
+        super().setup()
+        if self.connection.family != socket.AF_UNIX:
+            # Headers and body are sent separately: don't wait for a delayed ACK in between
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        try:
+            kind, body = answer(self.server.archive, url.path, parse_qs(url.query))  # type: ignore[attr-defined]
+            status = 200
+        except QueryError as e:
+            kind, body, status = "json", {"error": str(e)}, e.status
+        except Exception as e:  # keep serving
+            logger.exception("Failed to answer %s", self.path)
+            kind, body, status = "json", {"error": str(e)}, 500
+        if kind == "json":
+            data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        else:
+            data = body.encode("utf-8")
+            content_type = "text/markdown; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+class ArchiveHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], archive: Archive):
+        super().__init__(address, ArchiveHandler)
+        self.archive = archive
+
+
+class ArchiveUnixServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, archive: Archive):
+        super().__init__(path, ArchiveHandler)
+        self.archive = archive
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path: str, timeout: float = 30):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def query(
+    endpoint: str,
+    params: Sequence[Tuple[str, str]] = (),
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+    timeout: float = 30,
+) -> Tuple[int, str, str]:
+    """GET *endpoint* of a running `gptctl serve`: ``(status, content type, body)``.
+
+    Raises:
+        OSError: no server is listening
+    """
+    conn: HTTPConnection = (
+        UnixHTTPConnection(socket_path, timeout=timeout)
+        if socket_path
+        else HTTPConnection(host, port, timeout=timeout)
+    )
+    try:
+        conn.request("GET", "/" + endpoint.lstrip("/") + ("?" + urlencode(params) if params else ""))
+        response: HTTPResponse = conn.getresponse()
+        return (
+            response.status,
+            response.getheader("Content-Type", ""),
+            response.read().decode("utf-8"),
+        )
+    finally:
+        conn.close()
@@ -1,5 +1,12 @@
+from collections import Counter
 import json
 import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from gptctl.definitions import SuggestionKey
+from gptctl.utils.cache import ID, merged_rows
+from gptctl.utils.parallel import map_conversations
+from gptctl.utils.utils import format_timestamp, normalize_messages
 
 SUGGESTION_KEY_PHRASES = [
     "would you like",
@@ -14,6 +21,12 @@ SUGGESTION_KEY_PHRASES = [
 SUGGESTION_RE = re.compile(
     r"(?i)\b(?:" + "|".join(re.escape(p) for p in SUGGESTION_KEY_PHRASES) + r")\b.*\?$"
 )
+# Any key phrase anywhere in lowercased text, in one scan instead of one
+# `in` test per phrase. Longest first, so "would you like me to" wins over
+# "would you like". (re.IGNORECASE makes the scan several times slower.)
+PHRASE_RE = re.compile(
+    "|".join(re.escape(p) for p in sorted(SUGGESTION_KEY_PHRASES, key=len, reverse=True))
+)
 
 
 def extract_text(node):
@@ -119,20 +132,29 @@ def extract_suggestion(node):
     if not text:
         return ""
     # examine last non-empty line
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    lines = text.rstrip().splitlines()
     if not lines:
         return ""
-    last = lines[-1]
-    # match heuristic: contains key phrase and ends with a question mark
-    if SUGGESTION_RE.search(last):
-        return last
-    # also accept polite offers with no question mark (optional; comment/uncomment)
-    if any(k in last.lower() for k in SUGGESTION_KEY_PHRASES):
+    last = lines[-1].strip()
+    # match heuristic: contains a key phrase. Offers usually end with a
+    # question mark (SUGGESTION_RE), polite ones may not: both are accepted.
+    if PHRASE_RE.search(last.lower()):
         return last
     return ""
 
 
-def analyze_conversations(data):
+def suggestion_phrase(suggestion: str) -> str:
+    """The (lowercase) key phrase a suggestion was recognized by."""
+    m = PHRASE_RE.search(suggestion.lower())
+    return m.group(0) if m else ""
+
+
+def analyze_conversations(data, active_branch: bool = False):
+    """User messages and assistant suggestions of *data*, paired.
+
+    With *active_branch* only the messages on the path to `current_node`
+    are paired, see `normalize_messages`.
+    """
     rows = []
     for conv in data:
         title = conv.get("title", "Untitled")
@@ -142,29 +164,15 @@ def analyze_conversations(data):
         if not isinstance(mapping, dict):
             continue
 
-        # print(f"Total messages in mapping: {len(mapping)}")
-        sorted_msgs = sorted(mapping.values(), key=lambda x: x.get("create_time", 0))
-        # print(f"Total sorted messages: {len(sorted_msgs)}")
         previous_user_msg = None
 
-        for msg in sorted_msgs:
-            m_obj = msg.get("message", {})
-            message_id = msg.get("id", "unknown")
-            # print(f"Message object: {m_obj}")
-
-            if m_obj is None:
-                print(f"Skipping message ID {message_id} with no content.")
-                continue
-
-            role = m_obj.get("author", {}).get("role")
-            text = extract_text(m_obj)
+        for msg in normalize_messages(conv, active_branch=active_branch):
+            message_id = msg.id or "unknown"
+            role = msg.role
+            text = extract_text(msg.raw)
             if not text:
                 continue
 
-            # print(
-            #     f"Processing message ID {message_id} with role {role} created at {m_obj.get('create_time', 0)} text: {text[:30]}..."
-            # )
-
             if role == "user":
                 previous_user_msg = text
                 rows.append(
@@ -181,7 +189,7 @@ def analyze_conversations(data):
                 # break
 
             elif role == "assistant":
-                suggestion = extract_suggestion(msg)
+                suggestion = extract_suggestion(msg.raw)
                 if suggestion:
                     rows.append(
                         {
@@ -196,7 +204,7 @@ def analyze_conversations(data):
     return rows
 
 
-def export_markdown(rows):
+def export_markdown(rows, limit: Optional[int] = 50):
     md_lines = ["### 🧩 User ↔ Assistant Suggestion Pairs\n"]
     md_lines.append(
         "| Conversation | Role | Message ID | Message Text | Paired User Message | Assistant Suggestion |"
@@ -204,8 +212,83 @@ def export_markdown(rows):
     md_lines.append(
         "|--------------|------|-------------|---------------|----------------------|----------------------|"
     )
-    for r in rows[:50]:  # limit output
+    for r in rows[:limit]:
         md_lines.append(
             f"| {r['conversation_title']} | {r['role']} | {r['message_id']} | {r['message_text'][:40]} | {r['paired_user_message'][:40]} | {r['paired_assistant_suggestion'][:40]} |"
         )
     return "\n".join(md_lines)
+
+
+def count_suggestions(conversations: Iterable[dict]) -> Tuple[int, Counter]:
+    """Worker task: count the assistant suggestions of *conversations*.
+
+    Returns:
+        Tuple[int, Counter]: the number of conversations and the suggestions
+        counted by ``(phrase, month, conversation id, title)``
+    """
+    counts: Counter = Counter()
+    n = 0
+    for conv in conversations:
+        n += 1
+        title = conv.get("title") or "Untitled"
+        conv_id = conv.get("id") or conv.get("conversation_id") or ""
+        for msg in normalize_messages(conv):
+            if msg.role != "assistant":
+                continue
+            suggestion = extract_suggestion(msg.raw)
+            if suggestion:
+                ts = msg.create_time or conv.get("create_time")
+                month = format_timestamp(ts)[:7] or "unknown"
+                counts[(suggestion_phrase(suggestion), month, conv_id, title)] += 1
+    return n, counts
+
+
+def analyze_files(
+    paths: Sequence[str], jobs: int = 0
+) -> Tuple[int, Counter]:
+    """`count_suggestions` over whole exports, with a pool of *jobs* processes.
+
+    Several exports are merged: a conversation found in more than one is
+    only counted in the copy `merged_rows` keeps.
+    """
+    kept = None
+    if len(paths) > 1:
+        rows = merged_rows(paths)
+        kept = {(path, row[ID]) for path, row in rows if row[ID]}
+    total: Counter = Counter()
+    n_total = 0
+    for path in paths:
+        for n, counts in map_conversations(path, count_suggestions, jobs=jobs):
+            n_total += n
+            if kept is None:
+                total.update(counts)
+                continue
+            for key, value in counts.items():
+                if not key[2] or (path, key[2]) in kept:
+                    total[key] += value
+    if kept is not None:
+        n_total = len(rows)
+    return n_total, total
+
+
+def aggregate_suggestions(
+    counts: Counter, by: Sequence[SuggestionKey] = (SuggestionKey.PHRASE,)
+) -> List[Dict[str, Any]]:
+    """Roll *counts* up to one row per *by* group, most frequent first."""
+    columns: List[str] = []
+    for key in by:
+        if key == SuggestionKey.CONVERSATION:
+            columns += ["conversation_id", "title"]
+        elif key.value not in columns:
+            columns.append(key.value)
+    rolled: Counter = Counter()
+    for (phrase, month, conv_id, title), value in counts.items():
+        fields = {
+            "phrase": phrase,
+            "month": month,
+            "conversation_id": conv_id,
+            "title": title,
+        }
+        rolled[tuple(fields[c] for c in columns)] += value
+    rows = sorted(rolled.items(), key=lambda item: (-item[1], item[0]))
+    return [{**dict(zip(columns, key)), "count": value} for key, value in rows]
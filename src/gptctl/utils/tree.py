@@ -0,0 +1,183 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def node_time(node: dict) -> float:
+    return (node.get("message") or {}).get("create_time") or 0
+
+
+class ThreadTree:
+    """Parent → children adjacency of one conversation's `mapping`, built once.
+
+    Only nodes carrying a message are kept. Children lists and the
+    chronological order are sorted by message `create_time`.
+    """
+
+    def __init__(self, conv: dict):
+        self.conversation = conv
+        self.id: str = conv.get("id") or conv.get("conversation_id") or ""
+        mapping = conv.get("mapping")
+        self.nodes: Dict[str, dict] = {
+            node_id: node
+            for node_id, node in (mapping.items() if isinstance(mapping, dict) else [])
+            if isinstance(node, dict) and isinstance(node.get("message"), dict)
+        }
+        self.children: Dict[str, List[str]] = {}
+        self.keys: Dict[str, str] = {}
+        for node_id, node in self.nodes.items():
+            parent = node.get("parent")
+            if parent in self.nodes:
+                self.children.setdefault(parent, []).append(node_id)
+            self.keys[node_id] = node_id
+            msg_id = node["message"].get("id")
+            if msg_id:
+                self.keys.setdefault(msg_id, node_id)
+        # Titles never shadow ids
+        for node_id, node in self.nodes.items():
+            msg = node["message"]
+            for key in (msg.get("title"), (msg.get("metadata") or {}).get("title")):
+                if key:
+                    self.keys.setdefault(key, node_id)
+        for kids in self.children.values():
+            kids.sort(key=lambda k: node_time(self.nodes[k]))
+        self.chronological: List[str] = sorted(
+            self.nodes, key=lambda k: node_time(self.nodes[k])
+        )
+        self.position: Dict[str, int] = {
+            node_id: i for i, node_id in enumerate(self.chronological)
+        }
+
+    def find(self, key: str) -> Optional[str]:
+        """Node id of the message with id or title *key*."""
+        return self.keys.get(key)
+
+    def parent(self, node_id: str) -> Optional[str]:
+        parent = self.nodes[node_id].get("parent")
+        return parent if parent in self.nodes else None
+
+    def root(self, node_id: str) -> str:
+        while (parent := self.parent(node_id)) is not None:
+            node_id = parent
+        return node_id
+
+    def ancestors(self, node_id: str, limit: Optional[int] = None) -> List[str]:
+        """Ancestors of *node_id*, root first; only the *limit* nearest ones if given."""
+        parents = []
+        current = self.parent(node_id)
+        while current is not None and (limit is None or len(parents) < limit):
+            parents.append(current)
+            current = self.parent(current)
+        return list(reversed(parents))
+
+    def descendants(self, node_id: str, depth: Optional[int] = None) -> List[str]:
+        """Descendants of *node_id* in pre-order, at most *depth* levels down."""
+        result = []
+        stack: List[Tuple[str, int]] = [
+            (c, 1) for c in reversed(self.children.get(node_id, []))
+        ]
+        while stack:
+            current, level = stack.pop()
+            result.append(current)
+            if depth is None or level < depth:
+                stack.extend((c, level + 1) for c in reversed(self.children.get(current, [])))
+        return result
+
+    def between(self, start_id: str, end_id: str) -> List[str]:
+        """Messages after *start_id* up to *end_id* (inclusive), chronologically."""
+        start_idx = self.position[start_id]
+        end_idx = self.position[end_id]
+        return self.chronological[start_idx + 1 : end_idx + 1]
+
+    def extract(
+        self,
+        start_id: str,
+        end_id: Optional[str] = None,
+        include_children: bool = False,
+        depth: Optional[int] = None,
+        context_limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Nodes of a range or subtree, with its ancestors as context, chronologically."""
+        exported = self.ancestors(start_id, context_limit) + [start_id]
+        if end_id:
+            exported += self.between(start_id, end_id)
+        if include_children:
+            exported += self.descendants(start_id, depth)
+        unique = sorted(set(exported), key=self.position.__getitem__)
+        return [self.nodes[node_id] for node_id in unique]
+
+
+class PartialRange:
+    """One requested `start[..end]` range and, once resolved, where it lives."""
+
+    __slots__ = ("start", "end", "tree", "start_id", "end_id")
+
+    def __init__(self, start: str, end: Optional[str] = None):
+        self.start = start
+        self.end = end or None
+        self.tree: Optional[ThreadTree] = None
+        self.start_id: Optional[str] = None
+        self.end_id: Optional[str] = None
+
+    def __repr__(self):
+        return f"PartialRange(start={self.start}, end={self.end})"
+
+
+def parse_ranges(lines: Iterable[str]) -> List[PartialRange]:
+    """Parse `START<TAB>END` lines (END optional). Blank and `#` lines are skipped."""
+    ranges = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        start, _, end = line.partition("\t")
+        ranges.append(PartialRange(start.strip(), end.strip()))
+    return ranges
+
+
+def message_keys(conv: dict) -> Iterable[str]:
+    """Ids and titles a message of *conv* can be referred to by."""
+    mapping = conv.get("mapping")
+    if not isinstance(mapping, dict):
+        return
+    for node_id, node in mapping.items():
+        yield node_id
+        msg = node.get("message") if isinstance(node, dict) else None
+        if isinstance(msg, dict):
+            for key in (msg.get("id"), msg.get("title"), (msg.get("metadata") or {}).get("title")):
+                if key:
+                    yield key
+
+
+def resolve_ranges(
+    conversations: Iterable[dict],
+    ranges: List[PartialRange],
+    thread: Optional[str] = None,
+) -> List[PartialRange]:
+    """Locate every range's start/end message in a single pass over *conversations*.
+
+    A `ThreadTree` is only built for conversations containing a requested
+    start message, and reading stops once all ranges are resolved. With
+    *thread* only that conversation (by conversation or root message id) is
+    searched.
+    """
+    pending: Dict[str, List[PartialRange]] = {}
+    for r in ranges:
+        pending.setdefault(r.start, []).append(r)
+
+    for conv in conversations:
+        if not pending:
+            break
+        wanted = [k for k in dict.fromkeys(message_keys(conv)) if k in pending]
+        if not wanted:
+            continue
+        tree = ThreadTree(conv)
+        for key in wanted:
+            start_id = tree.find(key)
+            if start_id is None:
+                continue
+            if thread and thread not in (tree.id, tree.root(start_id)):
+                continue
+            for r in pending.pop(key):
+                r.tree = tree
+                r.start_id = start_id
+                r.end_id = tree.find(r.end) if r.end else None
+    return ranges
@@ -1,18 +1,30 @@
 from datetime import datetime
+import heapq
 import os
 from pathlib import Path
 import re
 import textwrap
 import time
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 import json
 from rich.console import Console
 from rich.table import Table
 import typer
-from gptctl.definitions import Conversation, SortFields, SortOrder
+from gptctl.definitions import (
+    Conversation,
+    MatchMode,
+    Message,
+    SortFields,
+    SortOrder,
+)
+from gptctl.utils.lookup import select_conversations
 
 
 FENCED_CODE_RE = re.compile(r"```[\s\S]*?```", re.MULTILINE)
+BRACKET_RE = re.compile(r"[{}\[\]]")
+# What may follow the opening bracket of a JSON object/array (json.loads also accepts NaN/Infinity)
+JSON_START_RE = re.compile(r'\{[ \t\n\r]*["}]|\[[ \t\n\r]*[-"{\[\]0-9tfnNI]')
 ELIPSIS = "..."
 
 
@@ -73,7 +85,7 @@ def get_created_date(conv: dict) -> str:
     return ""
 
 
-def find_by_title(conversations: List[dict], title: str) -> Any:
+def find_by_title(conversations: Iterable[dict], title: str) -> Any:
     for conv in conversations:
         if conv.get("title") == title:
             return conv
@@ -175,39 +187,53 @@ def extract_strings(obj: Any) -> List[str]:
     return []
 
 
-def extract_json_fragments(text: str):
+def extract_json_fragments(text: str, max_size: Optional[int] = None):
     """
     Scan text and yield (start, end, snippet) for balanced {...} or [...] fragments.
+
+    Only bracket characters are visited (via `BRACKET_RE`), so plain prose
+    costs a single regex pass. Fragments longer than *max_size* characters
+    are dropped when it is given.
     """
+    if "{" not in text and "[" not in text:
+        return []
+
     results = []
     stack = []
     start_idx = None
 
-    for i, ch in enumerate(text):
+    for m in BRACKET_RE.finditer(text):
+        ch = m.group()
         if ch in "{[":
             if not stack:  # new fragment starts
-                start_idx = i
+                start_idx = m.start()
             stack.append(ch)
-        elif ch in "}]":
-            if stack:
-                opening = stack.pop()
-                # simple validation of match
-                if (opening == "{" and ch != "}") or (opening == "[" and ch != "]"):
-                    # mismatched brackets → reset
-                    stack = []
-                    start_idx = None
-                elif not stack and start_idx is not None:
-                    snippet = text[start_idx : i + 1]
-                    results.append((start_idx, i + 1, snippet))
-                    start_idx = None
+        elif stack:
+            opening = stack.pop()
+            # simple validation of match
+            if (opening == "{" and ch != "}") or (opening == "[" and ch != "]"):
+                # mismatched brackets → reset
+                stack = []
+                start_idx = None
+            elif not stack and start_idx is not None:
+                end_idx = m.end()
+                if max_size is None or end_idx - start_idx <= max_size:
+                    results.append((start_idx, end_idx, text[start_idx:end_idx]))
+                start_idx = None
     return results
 
 
-def replace_inline_json(text: str) -> str:
+def maybe_json(snippet: str) -> bool:
+    """Cheap test whether a bracketed *snippet* can be JSON: `{` must be
+    followed by a key or `}`, `[` by the start of a value or `]`."""
+    return JSON_START_RE.match(snippet) is not None
+
+
+def replace_inline_json(text: str, max_size: Optional[int] = None) -> str:
     """
     Replace balanced inline JSON fragments with fenced ```json blocks.
     """
-    fragments = extract_json_fragments(text)
+    fragments = extract_json_fragments(text, max_size=max_size)
     if not fragments:
         return text
 
@@ -218,10 +244,11 @@ def replace_inline_json(text: str) -> str:
         out.append(text[last:start])
 
         obj = None
-        try:
-            obj = json.loads(snippet)
-        except Exception:
-            pass
+        if maybe_json(snippet):
+            try:
+                obj = json.loads(snippet)
+            except Exception:
+                pass
 
         if obj is not None:
             pretty = json.dumps(obj, indent=2, ensure_ascii=False)
@@ -250,50 +277,162 @@ def truncate_string_with_ellipsis(text, length, placeholder="..."):
     return textwrap.shorten(text, width=length, placeholder=placeholder)
 
 
-def get_messages_iter(conv: dict):
+def iter_message_nodes(conv: dict) -> Iterator[tuple]:
+    """Yield `(node_id, node, message)` for every message of *conv*.
+
+    *node* is the `mapping` entry wrapping the message (holding `parent` and
+    `children`) or None when messages are stored flat.
+    """
     # Support messages in different structures
     for key in ("mapping", "messages", "items", "chat", "message_list", "updates"):
         if key in conv and conv[key] is not None:
             val = conv[key]
             if isinstance(val, dict):
-                for entry in val.values():
-                    if isinstance(entry, dict):
-                        if "message" in entry and isinstance(entry["message"], dict):
-                            # HERE we process messages
-                            yield entry["message"]
-                        elif "author" in entry and "content" in entry:
-                            yield entry
-                        else:
-                            for v in entry.values():
-                                if (
-                                    isinstance(v, dict)
-                                    and "author" in v
-                                    and "content" in v
-                                ):
-                                    yield v
-                                    break
-                return
+                entries = val.items()
             elif isinstance(val, list):
-                for item in val:
-                    if isinstance(item, dict):
-                        if "message" in item and isinstance(item["message"], dict):
-                            yield item["message"]
-                        elif "author" in item and "content" in item:
-                            yield item
-                        else:
-                            for v in item.values():
-                                if (
-                                    isinstance(v, dict)
-                                    and "author" in v
-                                    and "content" in v
-                                ):
-                                    yield v
-                                    break
-                return
+                entries = ((None, item) for item in val)
+            else:
+                continue
+            for node_id, entry in entries:
+                if isinstance(entry, dict):
+                    if "message" in entry and isinstance(entry["message"], dict):
+                        # HERE we process messages
+                        yield node_id, entry, entry["message"]
+                    elif "author" in entry and "content" in entry:
+                        yield node_id, None, entry
+                    else:
+                        for v in entry.values():
+                            if isinstance(v, dict) and "author" in v and "content" in v:
+                                yield node_id, None, v
+                                break
+            return
     # Fallback: scan all dict values
     for v in conv.values():
         if isinstance(v, dict) and "author" in v and "content" in v:
-            yield v
+            yield None, None, v
+
+
+def iter_active_nodes(conv: dict) -> Iterator[tuple]:
+    """Yield `(node_id, node, message)` along the active branch of *conv*.
+
+    Walks from `current_node` up the parent chain, so edited and regenerated
+    messages not shown in ChatGPT are skipped. Falls back to all messages
+    when the conversation has no `mapping`/`current_node`.
+    """
+    mapping = conv.get("mapping")
+    node_id = conv.get("current_node")
+    if not isinstance(mapping, dict) or node_id not in mapping:
+        yield from iter_message_nodes(conv)
+        return
+    path = []
+    seen = set()
+    while node_id in mapping and node_id not in seen:
+        seen.add(node_id)
+        node = mapping[node_id]
+        if not isinstance(node, dict):
+            break
+        if isinstance(node.get("message"), dict):
+            path.append((node_id, node, node["message"]))
+        node_id = node.get("parent")
+    yield from reversed(path)
+
+
+def get_messages_iter(conv: dict):
+    for _, _, msg in iter_message_nodes(conv):
+        yield msg
+
+
+def message_role(msg: dict) -> str:
+    author = msg.get("author")
+    return (
+        (author or {}).get("role", "unknown")
+        if isinstance(author, dict)
+        else msg.get("author", "unknown")
+    )
+
+
+def message_parts(msg: dict) -> list:
+    content = msg.get("content", msg)
+    if isinstance(content, dict):
+        return content.get("parts") or [content]
+    elif isinstance(content, list):
+        return content
+    elif isinstance(content, str):
+        return [content]
+    return []
+
+
+def normalize_messages(conv: dict, active_branch: bool = False) -> List[Message]:
+    """Walk *conv* once and return its messages as compact `Message` records.
+
+    With *active_branch* only the messages on the path to `current_node`
+    are returned, in conversation order.
+    """
+    messages = []
+    nodes = iter_active_nodes(conv) if active_branch else iter_message_nodes(conv)
+    for node_id, node, msg in nodes:
+        metadata = msg.get("metadata") or {}
+        messages.append(
+            Message(
+                id=(node.get("id") if node else None) or msg.get("id") or node_id or "",
+                role=message_role(msg),
+                hidden=bool(
+                    metadata.get("is_visually_hidden_from_conversation", False)
+                ),
+                create_time=msg.get("create_time"),
+                update_time=msg.get("update_time"),
+                parent=node.get("parent") if node else None,
+                children=node.get("children") if node else None,
+                parts=message_parts(msg),
+                raw=msg,
+            )
+        )
+    return messages
+
+
+def message_text(message: Message) -> str:
+    """Render all parts of *message* as markdown."""
+    return "\n\n".join([stringify_part(p) for p in message.parts if p])
+
+
+def part_has_text(part) -> bool:
+    """Whether `stringify_part(part)` renders non-blank text, without rendering it when possible."""
+    if isinstance(part, str):
+        s = part.strip()
+        if not s:
+            return False
+        if looks_like_json(s):
+            # JSON strings may render to nothing (e.g. empty canvas updates)
+            return bool(stringify_part(part).strip())
+        return True
+    if isinstance(part, dict):
+        t = part.get("type") or part.get("content_type", "")
+        if t and t.startswith("code/"):
+            return True
+        if part.get("image_url") or part.get("url"):
+            return True
+        if "updates" in part and isinstance(part["updates"], list):
+            return any(upd.get("replacement") for upd in part["updates"])
+        if "parts" in part and isinstance(part["parts"], list):
+            return any(part_has_text(p) for p in part["parts"])
+        content = part.get("content") or part.get("text") or ""
+        if content:
+            return bool(str(content).strip())
+        return True  # rendered as JSON
+    return bool(str(part).strip())
+
+
+def message_has_text(message: Message) -> bool:
+    """Same as `bool(message_text(message).strip())`, but much cheaper."""
+    return any(part_has_text(p) for p in message.parts if p)
+
+
+def count_user_messages(messages: List[Message], skip_system: bool = True) -> int:
+    return sum(
+        1
+        for m in messages
+        if m.role == "user" and m.is_visible(skip_system) and message_has_text(m)
+    )
 
 
 def stringify_part(part, collapse_threshold=40) -> str:
@@ -397,7 +536,11 @@ def make_bookmark(
 
 
 def conversation_to_md(
-    conv: dict, anchor: str = "", skip_system: bool = True, truncate_length: int = 80
+    conv: dict,
+    anchor: str = "",
+    skip_system: bool = True,
+    truncate_length: int = 80,
+    active_branch: bool = False,
 ) -> tuple[list, str]:
     title = conv.get("title") or conv.get("name") or "Untitled"
     created = conv.get("create_time") or conv.get("created") or ""
@@ -405,44 +548,36 @@ def conversation_to_md(
     thread_toc: List[Dict[str,str]] = []
     lines: List[str] = []
 
-    for msg in get_messages_iter(conv):
-        metadata = msg.get("metadata", {})
-        is_visually_hidden_from_conversation = metadata.get(
-            "is_visually_hidden_from_conversation", False
-        )
-
-        role = (
-            (msg.get("author") or {}).get("role", "unknown")
-            if isinstance(msg.get("author"), dict)
-            else msg.get("author", "unknown")
+    if anchor:
+        lines.append(f'<a id="{anchor}"></a>\n')
+    # Title / H1
+    lines.append(f"# {title}\n")
+    # Make bookmark text
+    lines.append(
+        make_bookmark(
+            title=title,
+            created=format_timestamp(created),
+            url=f"#{anchor}",
+            tags=["to be implemented", "another-tag"],
+            keywords=["keyword1", "keyword2"],
         )
+    )
+    lines.append("## Conversation TOC")
 
-        if skip_system and (
-            role == "system"
-            or role == "error_reporting_system"
-            or role == "tool"
-            or is_visually_hidden_from_conversation
-        ):
+    for message in normalize_messages(conv, active_branch=active_branch):
+        if not message.is_visible(skip_system):
             # Skip system messages
             continue
 
-        content = msg.get("content", msg)
-        parts = []
-        if isinstance(content, dict):
-            parts = content.get("parts") or [content]
-        elif isinstance(content, list):
-            parts = content
-        elif isinstance(content, str):
-            parts = [content]
-
-        text = "\n\n".join([stringify_part(p) for p in parts if p])
+        role = message.role
+        text = message_text(message)
         if not text.strip():
             continue
 
         if role == "user":
             msg_text = text.replace("\n", " ").strip()
             # TODO: -> to structure in order to be sorted
-            msg_created = format_timestamp(msg.get("create_time", "")) or ""
+            msg_created = format_timestamp(message.create_time or "") or ""
             thread_toc.append({"content":msg_text,"created":msg_created, "link":md_anchor(msg_text,truncate_length)})
             lines.append(f'<a id="{md_anchor(msg_text)}"></a>\n**You:**\n{text}\n')
         elif role == "assistant":
@@ -450,23 +585,6 @@ def conversation_to_md(
         else:
             lines.append(f"**{str(role).capitalize()}:**\n{text}\n")
 
-    lines = ["## Conversation TOC"] + lines
-
-    # Make bookmark text
-    bkm = make_bookmark(
-        title=title,
-        created=format_timestamp(created),
-        url=f"#{anchor}",
-        tags=["to be implemented", "another-tag"],
-        keywords=["keyword1", "keyword2"],
-    )
-    lines = [bkm] + lines
-
-    # Title / H1
-    lines = [f"# {title}\n"] + lines
-    if anchor:
-        lines = [f'<a id="{anchor}"></a>\n'] + lines
-
     # Whole Content
     thread_content = "\n".join(lines).strip() + "\n"
 
@@ -474,101 +592,117 @@ def conversation_to_md(
 
 
 def thread_msg_count(conv: dict, anchor: str = "", skip_system: bool = True) -> int:
-    msg_count = 0
-
-    for msg in get_messages_iter(conv):
-        metadata = msg.get("metadata", {})
-        is_visually_hidden_from_conversation = metadata.get(
-            "is_visually_hidden_from_conversation", False
-        )
+    return count_user_messages(normalize_messages(conv), skip_system=skip_system)
 
-        role = (
-            (msg.get("author") or {}).get("role", "unknown")
-            if isinstance(msg.get("author"), dict)
-            else msg.get("author", "unknown")
-        )
 
-        if skip_system and (
-            role == "system"
-            or role == "error_reporting_system"
-            or role == "tool"
-            or is_visually_hidden_from_conversation
-        ):
-            # Skip system messages
-            continue
+def iter_conv(
+    conversations: Iterable[dict[Any, Any]],
+    titles: list = [],
+    skip_system: bool = True,
+    console: Optional[Console] = None,
+    keep_conversation: bool = True,
+    ids: list = [],
+    match: MatchMode = MatchMode.EXACT,
+) -> Iterator[Conversation]:
+    """Lazily wrap (selected) conversations into `Conversation` objects.
 
-        content = msg.get("content", msg)
-        parts = []
-        if isinstance(content, dict):
-            parts = content.get("parts") or [content]
-        elif isinstance(content, list):
-            parts = content
-        elif isinstance(content, str):
-            parts = [content]
+    Conversations are consumed in a single pass, so *conversations* may be a
+    stream such as `gptctl.utils.loader.iter_conversations`. With *ids* or
+    *titles* the matching conversations are yielded in request order, see
+    `gptctl.utils.lookup.select_conversations`.
 
-        text = "\n\n".join([stringify_part(p) for p in parts if p])
-        if not text.strip():
-            continue
+    Args:
+        conversations (Iterable[dict]): parsed conversations
+        titles (list): titles to select, all conversations if empty
+        skip_system (bool): don't count system/tool/hidden messages
+        console (Optional[Console]): console to report missing titles to
+        keep_conversation (bool): keep the full conversation dict in the
+            result. Disable when only title/created/count are needed. Kept
+            conversations are only counted if their `count` is read.
+        ids (list): conversation ids to select
+        match (MatchMode): how *titles* are compared to conversation titles
+    """
 
-        if role == "user":
-            msg_count += 1
+    def make(conv: dict) -> Conversation:
+        return Conversation(
+            title=conv.get("title") or conv.get("name", "Untitled"),
+            created=get_created_date(conv),
+            count=(
+                None
+                if keep_conversation
+                else thread_msg_count(conv, "", skip_system=skip_system)
+            ),
+            conversation=conv if keep_conversation else None,
+            id=conv.get("id") or conv.get("conversation_id"),
+            update_time=conv.get("update_time"),
+            skip_system=skip_system,
+        )
 
-    return msg_count
+    if len(titles) or len(ids):
+        conversations = select_conversations(
+            conversations, titles=titles, ids=ids, match=match, console=console
+        )
+    for conv in conversations:
+        yield make(conv)
 
 
 def collect_conv(
-    conversations: List[dict[Any, Any]],
+    conversations: Iterable[dict[Any, Any]],
     titles: list = [],
     skip_system: bool = True,
     console: Optional[Console] = None,
+    keep_conversation: bool = True,
+    ids: list = [],
+    match: MatchMode = MatchMode.EXACT,
 ) -> List[Conversation]:
-    conv_coll = []
-    if len(titles):
-        for t in titles:
-            verified = find_by_title(conversations, t)
-            if not verified:
-                if console:
-                    console.print(
-                        f"[red]The title [bold]'{t}'[/bold] not found in conversations file[/red]"
-                    )
-                continue
-            conv_coll.append(verified)
-    else:
-        conv_coll = conversations
-
-    conv_objs = []
-    for conv in conv_coll:
-        msg_count = thread_msg_count(conv, "", skip_system=skip_system)
-        conv_obj = Conversation(
-            title=conv.get("title") or conv.get("name", "Untitled"),
-            created=get_created_date(conv),
-            count=msg_count,
-            conversation=conv,
+    return list(
+        iter_conv(
+            conversations=conversations,
+            titles=titles,
+            skip_system=skip_system,
+            console=console,
+            keep_conversation=keep_conversation,
+            ids=ids,
+            match=match,
         )
-        conv_objs.append(conv_obj)
-    return conv_objs
+    )
 
 
 def sort_conv(
-    data: List[Conversation] = [],
+    data: Iterable[Conversation] = [],
     sort: SortFields = SortFields.NO_SORT,
     order: SortOrder = SortOrder.ASC,
-) -> list:
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Iterable[Conversation]:
+    """Conversations of *data* sorted by *sort*, from *offset* on, at most *limit* of them.
+
+    With a *limit* only the top ``offset + limit`` are kept while sorting,
+    in a heap, instead of sorting everything. The order is the same as a
+    full (stable) sort. Unsorted *data* is sliced lazily, so a stream is
+    only read as far as needed.
+    """
     if sort and sort != SortFields.NO_SORT:
         key_cbk = (
             (lambda c: c[sort])
             if sort != SortFields.CREATED
             else (lambda c: parse_timestamp(c[sort]) or datetime.min)
         )
+        if limit is not None:
+            top = heapq.nlargest if order == SortOrder.DESC else heapq.nsmallest
+            return top(offset + limit, data, key=key_cbk)[offset:]
         conv_sorted = sorted(
             data,
             key=key_cbk,
             reverse=(order == SortOrder.DESC),
         )
-        return conv_sorted
+        return conv_sorted[offset:] if offset else conv_sorted
+    elif limit is not None or offset:
+        return islice(data, offset, None if limit is None else offset + limit)
     else:
         return data
 
+
 def is_jinja_template_string(s: str) -> bool:
     """
     Checks if a string contains common Jinja2 template syntax.
@@ -588,6 +722,7 @@ def create_rich_table(
     input_file: str = "",
     sort: SortFields = SortFields.NO_SORT,
     order: SortOrder = SortOrder.ASC,
+    show_source: bool = False,
 ) -> Table:
     table = Table(
         title=f"File: [bold green]{input_file}[/bold green] ({'Not sorted' if sort == SortFields.NO_SORT else 'Sorted by' + ' [bold green]' + sort.value + '[/bold green]' + ' [bold green]' + order.value.upper() + '[/bold green]'})"
@@ -596,6 +731,8 @@ def create_rich_table(
     table.add_column("Title")
     table.add_column("Created")
     table.add_column("Message Count", justify="right")
+    if show_source:
+        table.add_column("Source")
 
     return table
 
@@ -628,10 +765,10 @@ def get_batch_filepath(
     return filepath
 
 
-def get_batch_list(lst: list = [], chunk_size: int = 0):
+def get_batch_list(lst: Iterable = [], chunk_size: int = 0):
     """
-    Chunks a list into sublists of size chunk_size using a generator.
-    If the list length is not a multiple of chunk_size, the last sublist will contain the remaining elements.
+    Chunks an iterable into sublists of size chunk_size using a generator.
+    If the length is not a multiple of chunk_size, the last sublist will contain the remaining elements.
 
     # Example usage:
         my_list = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
@@ -643,8 +780,14 @@ def get_batch_list(lst: list = [], chunk_size: int = 0):
         chunked_list = list(get_batch_list(my_list, chunk_size))
         print(chunked_list)
     """
-    for i in range(0, len(lst), chunk_size):
-        yield lst[i : i + chunk_size]
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    it = iter(lst)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
 
 def get_filepath(
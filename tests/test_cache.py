@@ -0,0 +1,145 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from gptctl.utils.cache import (
+    META_COLUMNS,
+    cache_path,
+    cached_conv,
+    get_metadata,
+    iter_selected,
+    load_metadata,
+    merged_rows,
+)
+from gptctl.definitions import MatchMode
+from gptctl.utils.loader import expand_inputs, iter_conversations
+from gptctl.utils.lookup import select_conversations
+from gptctl.utils.utils import collect_conv
+
+
+def test_metadata_cache(tmp_path):
+    input_file = str(tmp_path / "conversations.json")
+    shutil.copy("./tests/data/conversations.json", input_file)
+    assert load_metadata(input_file) is None
+
+    entries = get_metadata(input_file)
+    assert cache_path(input_file).exists()
+    assert load_metadata(input_file) == entries
+    id_column = META_COLUMNS.index("id")
+    assert [e[id_column] for e in entries] == ["conv-1", "conv-2", "conv-3"]
+
+    for skip_system in (True, False):
+        expected = collect_conv(
+            iter_conversations(input_file), skip_system=skip_system
+        )
+        cached = cached_conv(input_file, skip_system=skip_system)
+        assert [(c.title, c.created, c.count) for c in cached] == [
+            (c.title, c.created, c.count) for c in expected
+        ]
+    # Records only hold a byte span, the conversation is read on demand
+    assert [c.to_dict() for c in cached] == list(iter_conversations(input_file))
+
+    # Touching the input file invalidates the cache
+    st = os.stat(input_file)
+    os.utime(input_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert load_metadata(input_file) is None
+
+
+def test_counts_deferred_until_needed(tmp_path):
+    input_file = str(tmp_path / "conversations.json")
+    shutil.copy("./tests/data/conversations.json", input_file)
+    count_column = META_COLUMNS.index("count_all")
+    expected = collect_conv(iter_conversations(input_file), skip_system=False)
+
+    # Nothing counted while building, records count on first access
+    assert {e[count_column] for e in get_metadata(input_file)} == {None}
+    cached = cached_conv(input_file, skip_system=False)
+    assert [c.count for c in cached] == [c.count for c in expected]
+    assert {e[count_column] for e in load_metadata(input_file)} == {None}
+
+    # Counts asked for are filled in and cached
+    cached = cached_conv(input_file, skip_system=False, counts=True)
+    assert [c.count for c in cached] == [c.count for c in expected]
+    assert [e[count_column] for e in load_metadata(input_file)] == [
+        c.count for c in expected
+    ]
+
+
+def test_iter_selected_matches_streaming(tmp_path):
+    input_file = str(tmp_path / "conversations.json")
+    shutil.copy("./tests/data/conversations.json", input_file)
+    titles = [c["title"] for c in iter_conversations(input_file)]
+
+    for kwargs in (
+        {"ids": ["conv-3", "conv-1"]},
+        {"titles": [titles[1]]},
+        {"titles": [titles[0][:3].lower()], "match": MatchMode.PREFIX},
+        {"titles": ["missing"]},
+    ):
+        expected = select_conversations(iter_conversations(input_file), **kwargs)
+        assert list(iter_selected(input_file, **kwargs)) == expected
+    # The lookup reuses the cache built by the first selection
+    assert load_metadata(input_file) is not None
+    assert len(list(iter_selected(input_file))) == len(titles)
+
+
+def test_merge_keeps_newest_copy(tmp_path):
+    old = str(tmp_path / "old.json")
+    new = str(tmp_path / "new.json")
+    shutil.copy("./tests/data/conversations.json", old)
+    conversations = list(iter_conversations(old))
+    updated = dict(conversations[1], title="Diagram ideas v2")
+    updated["update_time"] += 1
+    stale = dict(conversations[0], title="Stale copy")
+    stale["update_time"] -= 1
+    added = dict(conversations[2], id="conv-new")
+    with open(new, "w", encoding="utf-8") as f:
+        json.dump([updated, stale, added], f)
+
+    merged = cached_conv([old, new])
+    assert [(c.id, c.title, c.source) for c in merged] == [
+        ("conv-1", "Parsing JSON in Python", old),
+        ("conv-2", "Diagram ideas v2", new),
+        ("conv-3", "diagram ideas", old),
+        ("conv-new", "diagram ideas", new),
+    ]
+    assert len(merged_rows([old])) == len(conversations)
+    assert list(iter_selected([old, new], ids=["conv-2"])) == [updated]
+    assert [c["id"] for c in iter_selected([old, new])] == [c.id for c in merged]
+
+
+def test_expand_inputs(tmp_path):
+    for name in ("b.json", "a.json"):
+        (tmp_path / name).write_text("[]", encoding="utf-8")
+    a, b = str(tmp_path / "a.json"), str(tmp_path / "b.json")
+    assert expand_inputs([str(tmp_path / "*.json"), a]) == [a, b]
+    assert expand_inputs([b, a]) == [b, a]
+    with pytest.raises(FileNotFoundError):
+        expand_inputs([str(tmp_path / "*.zip")])
+
+
+def test_list_caches_counts_of_rows_shown(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    from gptctl.cli import app
+    import gptctl.utils.loader
+
+    input_file = str(tmp_path / "conversations.json")
+    shutil.copy("./tests/data/conversations.json", input_file)
+    args = ["--input", input_file, "list", "-s", "created", "-n", "2"]
+    runner = CliRunner()
+    first = runner.invoke(app, args)
+    assert first.exit_code == 0, first.output
+    count_column = META_COLUMNS.index("count_all")
+    assert sum(e[count_column] is not None for e in load_metadata(input_file)) == 2
+
+    def no_span_loads(*args, **kwargs):
+        raise AssertionError("conversation parsed again")
+
+    monkeypatch.setattr(gptctl.utils.loader, "load_span", no_span_loads)
+    monkeypatch.setattr(gptctl.utils.loader.SpanReader, "load", no_span_loads)
+    second = runner.invoke(app, args)
+    assert second.exit_code == 0, second.output
+    assert second.output == first.output
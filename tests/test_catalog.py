@@ -0,0 +1,50 @@
+import pytest
+
+from gptctl.utils.catalog import (
+    CatalogError,
+    build_catalog,
+    catalog_source,
+    connect,
+    fts5_available,
+    search,
+    to_fts_query,
+)
+from gptctl.utils.loader import iter_conversations
+
+pytestmark = pytest.mark.skipif(not fts5_available(), reason="sqlite3 without FTS5")
+
+
+@pytest.fixture()
+def catalog(tmp_path):
+    db_path = str(tmp_path / "catalog.sqlite")
+    source = {"path": "conversations.json", "size": 1, "mtime_ns": 1}
+    n_conv, n_msg = build_catalog(
+        db_path, iter_conversations("./tests/data/conversations.json"), source
+    )
+    assert (n_conv, n_msg) == (3, 12)
+    assert catalog_source(db_path) == source
+    conn = connect(db_path)
+    yield conn
+    conn.close()
+
+
+def test_search_ranked_with_filters(catalog):
+    rows = search(catalog, to_fts_query("parse JSON"))
+    assert [r["message_id"] for r in rows] == ["u-1"]
+
+    rows = search(catalog, to_fts_query("json"), role="assistant")
+    assert rows and all(r["role"] == "assistant" for r in rows)
+
+    rows = search(catalog, to_fts_query("json"), since=1700000050.0)
+    assert {r["message_id"] for r in rows} == {"a-2", "a-4"}
+
+    rows = search(catalog, to_fts_query("nodes"), highlight=("<", ">"))
+    assert rows[0]["title"] == "Diagram ideas"
+    assert "<nodes>" in rows[0]["snippet"]
+
+
+def test_search_invalid_query(catalog, tmp_path):
+    with pytest.raises(CatalogError):
+        search(catalog, "a AND (")
+    with pytest.raises(CatalogError):
+        connect(str(tmp_path / "missing.sqlite"))
@@ -1,2 +1,43 @@
+import json
+
+from gptctl.commands.export.json import write_files, write_json
+from gptctl.definitions import Conversation
+from gptctl.utils.loader import load_conversations
+
+DATA_FILE = "./tests/data/conversations.json"
+
+
 def test_export_json():
-    assert True
\ No newline at end of file
+    assert True
+
+
+def test_write_json_streams_same_output(tmp_path):
+    conversations = load_conversations(DATA_FILE)
+    records = [Conversation(c["title"], 0, 0, conversation=c) for c in conversations]
+    path = tmp_path / "out" / "batch.json"
+    write_json(data=records, path=str(path))
+    assert path.read_text(encoding="utf-8") == (
+        json.dumps(conversations, ensure_ascii=False, indent=2) + "\n"
+    )
+
+    write_json(data=conversations, path=str(path), compact=True)
+    text = path.read_text(encoding="utf-8")
+    assert text == json.dumps(conversations, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    write_json(data=conversations[0], path=str(path))
+    assert json.loads(path.read_text(encoding="utf-8")) == conversations[0]
+    write_json(data=[], path=str(path))
+    assert path.read_text(encoding="utf-8") == "[]\n"
+
+
+def test_write_files_pool_keeps_order(tmp_path):
+    conversations = load_conversations(DATA_FILE) * 5
+    for jobs in (1, 3):
+        out = tmp_path / str(jobs)
+        out.mkdir()
+        files = ((c, str(out / f"{i}.json"), i) for i, c in enumerate(conversations))
+        results = list(write_files(files, jobs=jobs, compact=True))
+        assert [tag for _, tag in results] == list(range(len(conversations)))
+        for written, i in results:
+            assert written == (out / f"{i}.json").stat().st_size
+            assert json.loads((out / f"{i}.json").read_text(encoding="utf-8")) == conversations[i]
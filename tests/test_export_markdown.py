@@ -1,2 +1,16 @@
+from typer.testing import CliRunner
+
+from gptctl.cli import app
+
+
 def test_export_md():
-    assert True
\ No newline at end of file
+    assert True
+
+
+def test_export_md_rejects_negative_jobs(tmp_path):
+    out = tmp_path / "out"
+    args = ["--input", "./tests/data/conversations.json", "--output-dir", str(out)]
+    result = CliRunner().invoke(app, args + ["export", "markdown", "-t", "*", "-j", "-1"])
+    assert result.exit_code == 2
+    assert "-1 is not in the range x>=0" in result.output
+    assert not out.exists() or not any(out.iterdir())
@@ -0,0 +1,68 @@
+import json
+import zipfile
+
+import pytest
+
+from gptctl.utils import parallel
+from gptctl.utils.grep import grep_file
+from gptctl.utils.parallel import map_conversations
+
+DATA_FILE = "./tests/data/conversations.json"
+
+
+def test_grep_file_parallel_matches_sequential():
+    sequential = list(grep_file(DATA_FILE, r"json", ignore_case=True, jobs=1))
+    assert len(sequential) == 7
+    assert list(grep_file(DATA_FILE, r"json", ignore_case=True, jobs=2)) == sequential
+
+
+def test_grep_file_role_and_context():
+    matches = list(grep_file(DATA_FILE, r"want", role="assistant", context=5, jobs=1))
+    assert [(m["title"], m["message_id"]) for m in matches] == [("Diagram ideas", "a-4")]
+    assert matches[0]["before"] == " you "
+    assert matches[0]["after"] == " me t"
+    assert not list(grep_file(DATA_FILE, r"want", role="user", jobs=1))
+
+
+def test_grep_zip_export(tmp_path):
+    archive = str(tmp_path / "export.zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.write(DATA_FILE, "conversations.json")
+    expected = list(grep_file(DATA_FILE, r"json", ignore_case=True, jobs=1))
+    assert list(grep_file(archive, r"json", ignore_case=True, jobs=1)) == expected
+    assert list(grep_file(archive, r"json", ignore_case=True, jobs=2)) == expected
+
+
+def test_map_conversations_tiny_ranges(tmp_path, monkeypatch):
+    # Every `}, {`, including the ones in nested lists and strings, is a range boundary guess
+    convs = [
+        {"title": f"t{i}}}, {{", "mapping": [{"a": "}, {"}, {"b": [{}, {}]}] * i}
+        for i in range(20)
+    ]
+    path = tmp_path / "conversations.json"
+    path.write_text(json.dumps(convs), encoding="utf-8")
+    monkeypatch.setattr(parallel, "BATCH_BYTES", 1)
+    titles = [c["title"] for c in convs]
+    got = map_conversations(str(path), lambda batch: [c["title"] for c in batch], jobs=1)
+    assert [t for batch in got for t in batch] == titles
+    assert sum(map_conversations(str(path), len, jobs=2)) == len(convs)
+
+    path.write_text(json.dumps(convs)[:-40], encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(map_conversations(str(path), len, jobs=2))
+
+
+def test_grep_command_jobs():
+    from typer.testing import CliRunner
+
+    from gptctl.cli import app
+
+    runner = CliRunner()
+    args = ["--input", DATA_FILE, "grep", "-i", "json", "-j"]
+    sequential = runner.invoke(app, args + ["1"])
+    assert sequential.exit_code == 0, sequential.output
+    # 0 means all CPUs, not one worker
+    assert runner.invoke(app, args + ["0"]).output == sequential.output
+    rejected = runner.invoke(app, args + ["-1"])
+    assert rejected.exit_code == 2
+    assert "-1 is not in the range x>=0" in rejected.output
@@ -0,0 +1,83 @@
+import json
+import random
+
+import pytest
+
+from gptctl.utils.utils import extract_json_fragments, replace_inline_json
+
+
+def reference_extract_json_fragments(text: str):
+    """The original character-by-character scanner, kept as the spec."""
+    results = []
+    stack = []
+    start_idx = None
+    for i, ch in enumerate(text):
+        if ch in "{[":
+            if not stack:
+                start_idx = i
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                opening = stack.pop()
+                if (opening == "{" and ch != "}") or (opening == "[" and ch != "]"):
+                    stack = []
+                    start_idx = None
+                elif not stack and start_idx is not None:
+                    results.append((start_idx, i + 1, text[start_idx : i + 1]))
+                    start_idx = None
+    return results
+
+
+def reference_replace_inline_json(text: str) -> str:
+    out = []
+    last = 0
+    for start, end, snippet in reference_extract_json_fragments(text):
+        out.append(text[last:start])
+        obj = None
+        try:
+            obj = json.loads(snippet)
+        except Exception:
+            pass
+        if obj is not None:
+            out.append("\n```json\n" + json.dumps(obj, indent=2, ensure_ascii=False) + "\n```\n")
+        else:
+            out.append(snippet)
+        last = end
+    out.append(text[last:])
+    return "".join(out)
+
+
+CASES = [
+    "",
+    "no brackets at all",
+    'config: {"a": 1, "b": [1, 2, {"c": null}]} done',
+    "see [the docs](https://example.com) and {not json}",
+    "[] and {} and [ ] and { }",
+    "mismatch {] then {\"ok\": true}",
+    "unbalanced {\"a\": [1, 2} trailing ] } [",
+    '["NaN", NaN, -Infinity, 1e5, true, false, null]',
+    "nested [[1, 2], [3, [4]]] list",
+    '{"s": "string with } and ] inside"}',
+    "dict(a=1) {'single': 'quotes'} [x for x in y]",
+    '{\n  "multi": "line"\n}\n[\n\t1\n]',
+]
+
+
+@pytest.mark.parametrize("text", CASES)
+def test_inline_json_matches_reference(text):
+    assert extract_json_fragments(text) == reference_extract_json_fragments(text)
+    assert replace_inline_json(text) == reference_replace_inline_json(text)
+
+
+def test_inline_json_matches_reference_fuzz():
+    rng = random.Random(12)
+    alphabet = ['{', '}', '[', ']', '"', ':', ',', ' ', '\n', 'a', '1', '-', 'true', 'null', 'N', 'x']
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert replace_inline_json(text) == reference_replace_inline_json(text), text
+
+
+def test_extract_json_fragments_max_size():
+    text = '{"a": 1} and {"long": "' + "x" * 100 + '"}'
+    assert [f[2] for f in extract_json_fragments(text, max_size=20)] == ['{"a": 1}']
+    assert replace_inline_json(text, max_size=20).endswith("x" * 100 + '"}')
@@ -0,0 +1,71 @@
+import json
+import os
+import pstats
+
+from typer.testing import CliRunner
+
+from gptctl.cli import app
+from gptctl.definitions import Phase
+from gptctl.utils.instrument import Instrumentation
+
+
+def slow_render():
+    return sum(i * i for i in range(1000))
+
+
+def slow_load():
+    return sorted(range(1000), reverse=True)
+
+
+def profiled_functions(path):
+    return {name for _, _, name in pstats.Stats(str(path)).stats}
+
+
+def test_profile_only_selected_phase(tmp_path):
+    path = tmp_path / "run.prof"
+    inst = Instrumentation(str(path), profile_phase=Phase.RENDER)
+    inst.start()
+    with inst.phase(Phase.RENDER):
+        slow_render()
+        # A nested phase is not part of the selected one
+        with inst.phase(Phase.LOAD):
+            slow_load()
+    for _ in inst.iterate(Phase.LOAD, [slow_load()]):
+        pass
+    inst.profiler.disable()
+    inst.profiler.dump_stats(str(path))
+
+    names = profiled_functions(path)
+    assert "slow_render" in names
+    assert "slow_load" not in names
+    assert inst.stack == []
+
+
+def test_cli_profile(tmp_path):
+    path = tmp_path / "list.prof"
+    result = CliRunner().invoke(
+        app,
+        ["--profile", str(path), "--profile-top", "3", "--input", "./tests/data/conversations.json", "list", "--no-cache"],
+    )
+    assert result.exit_code == 0, result.output
+    assert "Top 3 hotspots" in result.output
+    assert "cached_conv" in profiled_functions(path)
+
+
+def test_cli_stats_json(tmp_path):
+    path = tmp_path / "stats.json"
+    result = CliRunner().invoke(
+        app,
+        [
+            "--stats-json", str(path), "--trace-malloc",
+            "--input", "./tests/data/conversations.json", "--output-dir", str(tmp_path / "out"),
+            "export", "json", "-t", "*",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    report = json.loads(path.read_text())
+    assert report["command"].endswith("export json")
+    assert {"read", "load", "write", "other"} <= set(report["phases_s"])
+    assert report["counters"]["conversations"] == report["counters"]["files_written"] > 0
+    assert report["counters"]["bytes_read"] == os.path.getsize("./tests/data/conversations.json")
+    assert report["memory"]["tracemalloc_peak_bytes"] > 0
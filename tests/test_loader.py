@@ -0,0 +1,103 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from gptctl.utils.loader import (
+    SpanReader,
+    iter_buffer_spans,
+    iter_conversations,
+    iter_stream_spans,
+    load_conversations,
+    next_boundary,
+    parse_range,
+)
+
+DATA_FILE = "./tests/data/conversations.json"
+
+
+def test_iter_conversations_matches_json_load():
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    assert list(iter_conversations(DATA_FILE)) == expected
+    # Tiny chunks force elements and strings to span several reads
+    assert list(iter_conversations(DATA_FILE, chunk_size=7)) == expected
+    assert load_conversations(DATA_FILE) == expected
+
+
+def test_stream_spans_are_absolute_offsets():
+    with open(DATA_FILE, "rb") as f:
+        raw = f.read()
+    spans = list(iter_stream_spans(io.BytesIO(raw), chunk_size=13))
+    assert len(spans) == 3
+    for start, end, chunk in spans:
+        assert raw[start:end] == chunk
+        assert isinstance(json.loads(chunk), dict)
+    assert [(s, e) for s, e, _ in spans] == list(iter_buffer_spans(raw))
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        (b"[]", []),
+        (b'\xef\xbb\xbf [ {"title": "a"} ]', [{"title": "a"}]),
+        (b'[{"t": "]}\\"{["}, {"t": [1, {"x": "\\\\"}]}]', [{"t": ']}"{['}, {"t": [1, {"x": "\\"}]}]),
+    ],
+)
+def test_stream_edge_cases(raw, expected):
+    for chunk_size in (1, 2, 1024):
+        spans = iter_stream_spans(io.BytesIO(raw), chunk_size=chunk_size)
+        assert [json.loads(c) for _, _, c in spans] == expected
+
+
+@pytest.mark.parametrize("raw", [b"", b'{"title": "a"}', b'[{"title": "a"', b"[1, 2]"])
+def test_stream_invalid_input(raw):
+    with pytest.raises(ValueError):
+        list(iter_stream_spans(io.BytesIO(raw), chunk_size=4))
+
+
+def test_spans_are_byte_offsets_for_non_ascii():
+    raw = json.dumps(
+        [{"t": "héllo ☃ " * 50 + str(i)} for i in range(5)], ensure_ascii=False
+    ).encode("utf-8")
+    spans = list(iter_buffer_spans(raw))
+    assert [json.loads(raw[s:e]) for s, e in spans] == json.loads(raw)
+    # Multi-byte characters split across reads
+    assert [(s, e) for s, e, _ in iter_stream_spans(io.BytesIO(raw), chunk_size=5)] == spans
+
+
+def test_parse_range_runs_past_wrong_boundaries():
+    convs = [{"id": i, "items": [{"t": "}, {"}, {"u": [{}, {}]}]} for i in range(3)]
+    raw = json.dumps(convs).encode("utf-8")
+    starts = [s for s, _ in iter_buffer_spans(raw)]
+    # The first guess after the first conversation's start is in its items
+    guess = next_boundary(raw, starts[0] + 1, len(raw))
+    assert starts[0] < guess < starts[1]
+    values, end = parse_range(raw, starts[0], guess)
+    assert (values, end) == (convs[:1], starts[1])
+    values, end = parse_range(raw, starts[1], len(raw) - 1)
+    assert (values, end) == (convs[1:], len(raw) - 1)
+    with pytest.raises(ValueError):
+        parse_range(raw, guess, starts[1])
+
+
+def test_zip_export(tmp_path):
+    archive = str(tmp_path / "export.zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("chat.html", "<html></html>")
+        zf.write(DATA_FILE, "export/conversations.json")
+    expected = load_conversations(DATA_FILE)
+    assert list(iter_conversations(archive)) == expected
+
+    with open(DATA_FILE, "rb") as f:
+        spans = [(start, end) for start, end, _ in iter_stream_spans(f)]
+    with SpanReader(archive) as reader:
+        # Backwards too: the member is decompressed again from its start
+        assert [reader.load(*span) for span in reversed(spans)] == expected[::-1]
+
+    empty = str(tmp_path / "empty.zip")
+    with zipfile.ZipFile(empty, "w") as zf:
+        zf.writestr("chat.html", "<html></html>")
+    with pytest.raises(ValueError, match="No conversations.json"):
+        list(iter_conversations(empty))
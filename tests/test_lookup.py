@@ -0,0 +1,48 @@
+from gptctl.definitions import MatchMode
+from gptctl.utils.loader import load_conversations
+from gptctl.utils.lookup import ConversationIndex, select_conversations
+
+CONVERSATIONS = load_conversations("./tests/data/conversations.json")
+
+
+def ids(convs):
+    return [c["id"] for c in convs]
+
+
+def test_conversation_index():
+    index = ConversationIndex.from_conversations(CONVERSATIONS)
+    assert len(index) == 3
+    assert index.get("conv-2")["title"] == "Diagram ideas"
+    assert index.get("missing") is None
+    assert ids(index.find("diagram ideas")) == ["conv-3"]
+    assert ids(index.find("DIAGRAM IDEAS", MatchMode.CASEFOLD)) == ["conv-2", "conv-3"]
+    assert ids(index.find("dia", MatchMode.PREFIX)) == ["conv-2", "conv-3"]
+    assert ids(index.find("p", MatchMode.PREFIX)) == ["conv-1"]
+    assert index.find("x", MatchMode.PREFIX) == []
+
+
+def test_select_conversations_in_request_order():
+    selected = select_conversations(
+        iter(CONVERSATIONS),
+        titles=["Diagram ideas", "Parsing JSON in Python"],
+        ids=["conv-3"],
+    )
+    assert ids(selected) == ["conv-3", "conv-2", "conv-1"]
+
+    selected = select_conversations(
+        iter(CONVERSATIONS), titles=["diagram"], match=MatchMode.PREFIX
+    )
+    assert ids(selected) == ["conv-2", "conv-3"]
+    assert select_conversations(iter(CONVERSATIONS), titles=["missing"]) == []
+
+
+def test_select_by_id_stops_reading():
+    consumed = []
+
+    def stream():
+        for conv in CONVERSATIONS:
+            consumed.append(conv["id"])
+            yield conv
+
+    assert ids(select_conversations(stream(), ids=["conv-1"])) == ["conv-1"]
+    assert consumed == ["conv-1"]
@@ -0,0 +1,111 @@
+import json
+import os
+
+from gptctl.utils.manifest import Manifest, content_hash, manifest_path
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_manifest_roundtrip(tmp_path):
+    out = str(tmp_path)
+    manifest = Manifest.load(out, "json")
+    assert manifest.entries == {}
+
+    (tmp_path / "a.json").write_text("{}")
+    manifest.record("conv-1", 1.0, "h1", "a.json")
+    manifest.save()
+    assert os.path.exists(manifest_path(out, "json"))
+
+    manifest = Manifest.load(out, "json")
+    assert manifest.is_current("conv-1", 1.0, "h1")
+    assert not manifest.is_current("conv-1", 2.0, "h1")
+    assert not manifest.is_current("conv-1", 1.0, "h2")
+    # Different export options invalidate every entry
+    assert Manifest.load(out, "json", {"active_branch": False}).entries == {}
+
+    # Missing output file means the conversation must be exported again
+    os.remove(tmp_path / "a.json")
+    assert not Manifest.load(out, "json").is_current("conv-1", 1.0, "h1")
+
+
+def test_manifest_assign_and_prune(tmp_path):
+    out = str(tmp_path)
+    manifest = Manifest(out, "json")
+    for conv_id, name in (("conv-1", "a.json"), ("conv-2", "b.json")):
+        (tmp_path / name).write_text("{}")
+        manifest.record(conv_id, 1.0, "h", name)
+
+    assert manifest.assign("conv-1", "other.json") == "a.json"
+    # A new conversation never takes over another one's file
+    assert manifest.assign("conv-3", "a.json") == "a_2.json"
+
+    manifest.seen = {"conv-1"}
+    assert manifest.prune(dry_run=True) == [os.path.join(out, "b.json")]
+    assert (tmp_path / "b.json").exists()
+    assert manifest.prune() == [os.path.join(out, "b.json")]
+    assert not (tmp_path / "b.json").exists()
+    assert list(manifest.entries) == ["conv-1"]
+
+
+def test_export_json_incremental(tmp_path):
+    from typer.testing import CliRunner
+
+    from gptctl.cli import app
+
+    input_file = tmp_path / "conversations.json"
+    conversations = json.load(open("./tests/data/conversations.json", encoding="utf-8"))
+    input_file.write_text(json.dumps(conversations), encoding="utf-8")
+    out = tmp_path / "out"
+    args = ["--input", str(input_file), "--output-dir", str(out)]
+    args += ["export", "json", "-t", "*", "--incremental", "--prune"]
+
+    runner = CliRunner()
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.output
+    exported = lambda: [p for p in out.glob("*.json") if not p.name.startswith(".")]
+    assert len(exported()) == 3
+
+    result = runner.invoke(app, args)
+    assert "Exported 0 conversation(s)" in result.output
+    assert "Unchanged: 3" in result.output
+
+    conversations[0]["update_time"] = (conversations[0].get("update_time") or 0) + 1
+    del conversations[2]
+    input_file.write_text(json.dumps(conversations), encoding="utf-8")
+    result = runner.invoke(app, args)
+    assert "Exported 1 conversation(s)" in result.output
+    assert "Removed: 1" in result.output
+    assert len(exported()) == 2
+
+    # A page of the input isn't the whole input: nothing may be pruned
+    result = runner.invoke(app, args + ["-n", "1"])
+    assert result.exit_code != 0
+    assert len(exported()) == 2
+
+
+def test_export_json_full_run_skips_hashing(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    from gptctl.cli import app
+    from gptctl.commands.export import json as export_json
+
+    def no_hash(data):
+        raise AssertionError("hashed without --incremental")
+
+    out = tmp_path / "out"
+    args = ["--input", "./tests/data/conversations.json", "--output-dir", str(out)]
+    args += ["export", "json", "-t", "*"]
+    runner = CliRunner()
+    monkeypatch.setattr(export_json, "content_hash", no_hash)
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.output
+
+    # Files are recorded without a hash: the next incremental run writes them again
+    monkeypatch.undo()
+    result = runner.invoke(app, args + ["--incremental"])
+    assert "Exported 3 conversation(s)" in result.output
+    result = runner.invoke(app, args + ["--incremental"])
+    assert "Unchanged: 3" in result.output
@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import shutil
+import threading
+import zipfile
+
+import pytest
+
+from gptctl.utils.catalog import build_catalog, fts5_available
+from gptctl.utils.loader import iter_conversations
+from gptctl.utils.server import Archive, ArchiveHTTPServer, query
+
+
+@pytest.fixture()
+def server(tmp_path):
+    input_file = str(tmp_path / "conversations.json")
+    shutil.copy("./tests/data/conversations.json", input_file)
+    catalog_file = str(tmp_path / "catalog.sqlite")
+    if fts5_available():
+        build_catalog(catalog_file, iter_conversations(input_file), {"path": input_file})
+    archive = Archive([input_file], catalog_file=catalog_file, cache_size=1)
+    httpd = ArchiveHTTPServer(("127.0.0.1", 0), archive)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    archive.close()
+
+
+def get(server, endpoint, **params):
+    status, content_type, body = query(
+        endpoint, list(params.items()), port=server.server_address[1]
+    )
+    return status, json.loads(body) if content_type.startswith("application/json") else body
+
+
+def test_list_and_show(server):
+    status, rows = get(server, "list", sort="title", order="asc", limit="2")
+    assert status == 200
+    assert [r["id"] for r in rows] == ["conv-2", "conv-1"]
+
+    status, conv = get(server, "show", id="conv-1")
+    assert (status, conv["title"]) == (200, "Parsing JSON in Python")
+
+    status, convs = get(server, "export", title="diagram ideas", match="casefold")
+    assert [c["id"] for c in convs] == ["conv-2", "conv-3"]
+
+    assert get(server, "show", id="missing")[0] == 404
+    assert get(server, "list", sort="bad")[0] == 400
+    assert get(server, "nope")[0] == 404
+
+
+def test_markdown_cache_and_reload(server):
+    archive = server.archive
+    status, md = get(server, "show", id="conv-1", format="markdown")
+    assert status == 200 and md.startswith("# Parsing JSON in Python")
+    assert get(server, "show", id="conv-1", format="markdown")[1] == md
+    get(server, "show", id="conv-2", format="markdown")
+    assert len(archive._markdown) == 1  # cache_size=1
+
+    input_file = archive.input_files[0]
+    with open(input_file, encoding="utf-8") as f:
+        data = json.load(f)
+    with open(input_file, "w", encoding="utf-8") as f:
+        json.dump(data[:1], f)
+    os.utime(input_file, ns=(1, 1))
+    status, health = get(server, "health")
+    assert health["conversations"] == 1
+    assert not archive._markdown
+
+
+def test_concurrent_conversations(tmp_path):
+    input_file = str(tmp_path / "conversations.json")
+    shutil.copy("./tests/data/conversations.json", input_file)
+    zip_file = str(tmp_path / "export.zip")
+    with zipfile.ZipFile(zip_file, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.write(input_file, "conversations.json")
+    expected = list(iter_conversations(input_file))
+
+    for path in (input_file, zip_file):
+        archive = Archive([path])
+        try:
+            with ThreadPoolExecutor(8) as pool:
+                loaded = list(pool.map(archive.conversation, archive.records * 50))
+        finally:
+            archive.close()
+        assert loaded == expected * 50
+
+
+@pytest.mark.skipif(not fts5_available(), reason="sqlite3 without FTS5")
+def test_search(server):
+    status, rows = get(server, "search", q="parse JSON")
+    assert status == 200
+    assert [r["message_id"] for r in rows] == ["u-1"]
+    assert get(server, "search", q="a AND (", fts="1")[0] == 400
+
+
+def test_serve_refuses_to_replace_a_file(tmp_path):
+    from typer.testing import CliRunner
+
+    from gptctl.cli import app
+
+    path = tmp_path / "not-a-socket"
+    path.write_text("keep me", encoding="utf-8")
+    args = ["--input", "./tests/data/conversations.json", "serve", "--socket", str(path)]
+    result = CliRunner().invoke(app, args)
+    assert result.exit_code == 1
+    assert "Not a socket" in result.output
+    assert path.read_text(encoding="utf-8") == "keep me"
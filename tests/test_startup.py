@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+from typer.testing import CliRunner
+
+from gptctl.cli import app
+
+runner = CliRunner()
+
+
+def imported_modules(*argv, env=None):
+    code = (
+        "import sys\n"
+        "from gptctl.cli import app\n"
+        f"sys.argv = ['gptctl', *{list(argv)!r}]\n"
+        "try:\n"
+        "    app()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(' '.join(sorted(sys.modules)), file=sys.stderr)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, **env} if env else None,
+    )
+    return set(result.stderr.split())
+
+
+def test_version_imports_no_commands():
+    modules = imported_modules("--version")
+    assert "gptctl.commands.view.list" not in modules
+    assert "gptctl.commands.export" not in modules
+    assert "rich" not in modules
+    assert "importlib.metadata" not in modules
+
+
+def test_completion_imports_no_commands():
+    env = {"_GPTCTL_COMPLETE": "complete_bash", "COMP_WORDS": "gptctl ex", "COMP_CWORD": "1"}
+    modules = imported_modules(env=env)
+    assert "gptctl.commands.export" not in modules
+    assert "rich" not in modules
+
+
+def test_help_imports_no_commands():
+    modules = imported_modules("--help")
+    assert "gptctl.commands.view.list" not in modules
+    assert "gptctl.commands.export" not in modules
+    assert not any(m.startswith("gptctl.utils") for m in modules)
+    # rich only comes with Typer's help formatter
+    assert "typer.rich_utils" in modules
+
+
+def test_command_imports_only_itself():
+    modules = imported_modules("export", "--help")
+    assert "gptctl.commands.export" in modules
+    assert "gptctl.commands.export.markdown" not in modules
+    assert "gptctl.commands.view.show" not in modules
+    assert not any(m.startswith("gptctl.utils") for m in modules)
+
+
+def test_lazy_commands_help():
+    result = runner.invoke(app, ["export", "--help"])
+    assert result.exit_code == 0
+    assert "markdown" in result.output
+    result = runner.invoke(app, ["export", "json", "--help"])
+    assert result.exit_code == 0
+    assert "--incremental" in result.output
@@ -0,0 +1,18 @@
+from benchmarks.synthetic import SyntheticSpec, generate_archive, write_archive
+from gptctl.utils.loader import iter_conversations
+from gptctl.utils.utils import count_user_messages, normalize_messages
+
+
+def test_synthetic_archive_is_deterministic(tmp_path):
+    spec = SyntheticSpec(conversations=5, messages=8, branching=0.5, seed=3)
+    first, second = tmp_path / "a.json", tmp_path / "b.json"
+    write_archive(str(first), spec)
+    write_archive(str(second), spec)
+    assert first.read_bytes() == second.read_bytes()
+
+    conversations = list(iter_conversations(str(first)))
+    assert conversations == list(generate_archive(spec))
+    for conv in conversations:
+        messages = normalize_messages(conv, active_branch=True)
+        assert count_user_messages(messages, skip_system=True) == 4
+        assert conv["current_node"] == messages[-1].id
@@ -0,0 +1,42 @@
+from gptctl.utils.loader import load_conversations
+from gptctl.utils.tree import ThreadTree, parse_ranges, resolve_ranges
+
+CONVERSATIONS = load_conversations("./tests/data/conversations.json")
+
+
+def ids(nodes):
+    return [n["id"] for n in nodes]
+
+
+def test_thread_tree():
+    tree = ThreadTree(CONVERSATIONS[0])
+    assert tree.children["u-1"] == ["a-1", "a-1b"]
+    assert tree.root("a-2") == "sys-1"
+    assert tree.ancestors("u-2") == ["sys-1", "u-1", "a-1b"]
+    assert tree.ancestors("u-2", limit=1) == ["a-1b"]
+    assert tree.descendants("u-1") == ["a-1", "a-1b", "u-2", "t-1", "a-2"]
+    assert tree.descendants("u-1", depth=1) == ["a-1", "a-1b"]
+    assert ids(tree.extract("u-2", "a-2")) == ["sys-1", "u-1", "a-1b", "u-2", "t-1", "a-2"]
+    assert ids(tree.extract("a-1b", include_children=True, context_limit=0)) == [
+        "a-1b",
+        "u-2",
+        "t-1",
+        "a-2",
+    ]
+
+
+def test_resolve_ranges_in_one_pass():
+    ranges = parse_ranges(["u-1\ta-1b\n", "# comment\n", "\n", "Diagram request\n", "nope\n"])
+    assert [(r.start, r.end) for r in ranges] == [
+        ("u-1", "a-1b"),
+        ("Diagram request", None),
+        ("nope", None),
+    ]
+    resolve_ranges(iter(CONVERSATIONS), ranges)
+    assert (ranges[0].tree.id, ranges[0].start_id, ranges[0].end_id) == ("conv-1", "u-1", "a-1b")
+    assert (ranges[1].tree.id, ranges[1].start_id) == ("conv-2", "u-3")
+    assert ranges[2].tree is None
+
+    ranges = parse_ranges(["u-1"])
+    resolve_ranges(iter(CONVERSATIONS), ranges, thread="conv-2")
+    assert ranges[0].tree is None
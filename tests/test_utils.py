@@ -1,2 +1,128 @@
+import pytest
+
+from gptctl.definitions import Conversation, SortFields, SortOrder
+from gptctl.utils.loader import load_conversations
+from gptctl.utils.utils import (
+    collect_conv,
+    conversation_to_md,
+    get_batch_list,
+    message_has_text,
+    message_text,
+    normalize_messages,
+    part_has_text,
+    sort_conv,
+    stringify_part,
+    thread_msg_count,
+)
+
+CONVERSATIONS = load_conversations("./tests/data/conversations.json")
+
+
 def test_utils():
-    assert True
\ No newline at end of file
+    assert True
+
+
+def test_normalize_messages():
+    messages = normalize_messages(CONVERSATIONS[0])
+    assert [m.id for m in messages] == ["sys-1", "u-1", "a-1", "a-1b", "u-2", "t-1", "a-2"]
+    u1 = messages[1]
+    assert (u1.role, u1.parent, u1.children) == ("user", "sys-1", ["a-1", "a-1b"])
+    assert u1.create_time == 1700000000.0
+    assert messages[0].hidden and not messages[0].is_visible(skip_system=True)
+    assert messages[0].is_visible(skip_system=False)
+    assert not messages[5].is_visible(skip_system=True)  # tool
+
+
+@pytest.mark.parametrize(
+    "part",
+    [
+        "",
+        "   ",
+        "text",
+        '{"a": 1}',
+        '{"updates": []}',
+        "[1, 2]",
+        {"content_type": "code/python", "content": ""},
+        {"url": "https://example.com"},
+        {"updates": [{"pattern": ".*", "replacement": ""}]},
+        {"updates": [{"pattern": ".*", "replacement": "x"}]},
+        {"parts": ["", "  "]},
+        {"parts": ["", "x"]},
+        {"content": "  "},
+        {"text": "x"},
+        {"other": 1},
+        42,
+    ],
+)
+def test_part_has_text_matches_rendering(part):
+    assert part_has_text(part) == bool(stringify_part(part).strip())
+
+
+def test_thread_msg_count_matches_rendering():
+    for conv in CONVERSATIONS:
+        for skip_system in (True, False):
+            rendered = [
+                m
+                for m in normalize_messages(conv)
+                if m.role == "user"
+                and m.is_visible(skip_system)
+                and message_text(m).strip()
+            ]
+            assert thread_msg_count(conv, skip_system=skip_system) == len(rendered)
+            assert all(message_has_text(m) for m in rendered)
+
+
+def test_active_branch():
+    conv = CONVERSATIONS[0]
+    active = normalize_messages(conv, active_branch=True)
+    assert [m.id for m in active] == ["sys-1", "u-1", "a-1b", "u-2", "t-1", "a-2"]
+    _, all_md = conversation_to_md(conv)
+    _, active_md = conversation_to_md(conv, active_branch=True)
+    assert "becomes a dict" in all_md
+    assert "becomes a dict" not in active_md
+    # No current_node: every message is rendered
+    conv = {k: v for k, v in conv.items() if k != "current_node"}
+    assert len(normalize_messages(conv, active_branch=True)) == 7
+
+
+@pytest.mark.parametrize("sort", [SortFields.TITLE, SortFields.CREATED, SortFields.COUNT])
+@pytest.mark.parametrize("order", [SortOrder.ASC, SortOrder.DESC])
+def test_sort_conv_limit_matches_full_sort(sort, order):
+    # Many ties, to check the heap keeps the stable sort order
+    records = [
+        Conversation(f"t{i % 7}", f"2024-01-{i % 5 + 1:02d}", i % 3, id=str(i))
+        for i in range(50)
+    ]
+    full = [c.id for c in sort_conv(records, sort=sort, order=order)]
+    for offset, limit in ((0, 10), (5, 10), (45, 10), (0, 0)):
+        top = sort_conv(records, sort=sort, order=order, limit=limit, offset=offset)
+        assert [c.id for c in top] == full[offset : offset + limit]
+    assert [c.id for c in sort_conv(records, sort=sort, order=order, offset=48)] == full[48:]
+
+
+def test_sort_conv_unsorted_slices_lazily():
+    consumed = []
+
+    def stream():
+        for i in range(100):
+            consumed.append(i)
+            yield Conversation(str(i), "", 0)
+
+    top = sort_conv(stream(), limit=3, offset=2)
+    assert [c.title for c in top] == ["2", "3", "4"]
+    assert len(consumed) == 5
+
+
+def test_counts_are_lazy():
+    conv = CONVERSATIONS[0]
+    record = collect_conv([conv], skip_system=False)[0]
+    assert record._count is None
+    assert record.count == thread_msg_count(conv, skip_system=False)
+    assert collect_conv([conv], keep_conversation=False)[0]._count is not None
+
+
+def test_get_batch_list():
+    assert list(get_batch_list(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    for chunk_size in (0, -1):
+        with pytest.raises(ValueError):
+            list(get_batch_list([1, 2], chunk_size))
@@ -1,6 +1,18 @@
+import copy
+
 import pytest
 
-from gptctl.utils.suggestions import extract_text  # adjust to your actual module path
+from gptctl.definitions import SuggestionKey
+from gptctl.utils.loader import load_conversations
+from gptctl.utils.suggestions import (  # adjust to your actual module path
+    aggregate_suggestions,
+    analyze_conversations,
+    analyze_files,
+    extract_suggestion,
+    extract_text,
+)
+
+DATA_FILE = "./tests/data/conversations.json"
 
 
 @pytest.mark.parametrize("msg,expected", [
@@ -75,4 +87,45 @@ from gptctl.utils.suggestions import extract_text  # adjust to your actual modul
 
 ])
 def test_extract_text(msg, expected):
-    assert extract_text(msg) == expected
\ No newline at end of file
+    assert extract_text(msg) == expected
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("Done.\nWould you like me to add tests?\n\n", "Would you like me to add tests?"),
+    ("Let me know if that helps", "Let me know if that helps"),
+    ("Is it async?", ""),
+    ("Shall I continue?\nDone.", ""),
+    ("", ""),
+])
+def test_extract_suggestion(text, expected):
+    assert extract_suggestion({"content": {"parts": [text]}}) == expected
+
+
+def test_analyze_suggestions():
+    n, counts = analyze_files([DATA_FILE], jobs=1)
+    assert n == 3
+    assert analyze_files([DATA_FILE], jobs=2) == (n, counts)
+    by_phrase = aggregate_suggestions(counts)
+    assert sum(r["count"] for r in by_phrase) == sum(counts.values()) > 0
+    assert list(by_phrase[0]) == ["phrase", "count"]
+    rows = aggregate_suggestions(counts, [SuggestionKey.CONVERSATION, SuggestionKey.MONTH])
+    assert list(rows[0]) == ["conversation_id", "title", "month", "count"]
+    assert [r["count"] for r in rows] == sorted((r["count"] for r in rows), reverse=True)
+
+
+def test_analyze_conversations_active_branch():
+    conv = copy.deepcopy(load_conversations(DATA_FILE)[0])
+    # a-1 was regenerated as a-1b: its suggestion is off the active branch
+    conv["mapping"]["a-1"]["message"]["content"]["parts"] = ["Would you like me to explain?"]
+    all_ids = [r["message_id"] for r in analyze_conversations([conv])]
+    active_ids = [r["message_id"] for r in analyze_conversations([conv], active_branch=True)]
+    assert "a-1" in all_ids
+    assert "a-1" not in active_ids
+
+
+def test_analyze_conversations_node_order():
+    conv = copy.deepcopy(load_conversations(DATA_FILE)[0])
+    # Messages are paired in node order, whatever their timestamps
+    conv["mapping"]["u-2"]["message"]["create_time"] = 1
+    user_ids = [r["message_id"] for r in analyze_conversations([conv]) if r["role"] == "user"]
+    assert user_ids == ["u-1", "u-2"]